@@ -1,8 +1,62 @@
 """Entry point for the AI Agent CLI"""
 
+import time
+
+_STARTED = time.perf_counter()
+
 import sys
 
+
+def report_startup_time():
+    """Print the measured time to the first prompt; exit 1 if over budget"""
+    from src.simplified_cli import measure_startup
+    
+    report = measure_startup(_STARTED)
+    print(f"Imports:   {report['import_ms']:.1f} ms")
+    print(f"CLI init:  {report['init_ms']:.1f} ms")
+    print(f"To prompt: {report['total_ms']:.1f} ms (budget {report['budget_ms']} ms)")
+    if report["api_client_created"] or report["memory_loaded"]:
+        print("[WARN] API client or conversation memory was built before the prompt")
+    if not report["within_budget"]:
+        print("[ERROR] Startup is over budget")
+        sys.exit(1)
+    print("[OK] Startup within budget")
+
+
 if __name__ == "__main__":
+    if "--startup-time" in sys.argv[1:]:
+        report_startup_time()
+        sys.exit(0)
+
+    # SIGTERM unwinds like Ctrl-C so in-flight predictions get cancelled
+    from src.prediction_tracker import install_signal_handlers
+    install_signal_handlers()
+
+    if sys.argv[1:2] == ["run"]:
+        # Headless: python main.py run jobs.jsonl [--workers N] [--output results.jsonl]
+        from src.job_runner import main as run_jobs
+        sys.exit(run_jobs(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["daemon"]:
+        # Resident daemon holding warm agents: python main.py daemon [--stop | --status]
+        from src.daemon import serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["serve"]:
+        # Multi-client HTTP/JSON service: python main.py serve [--port 8080] [--workers 8]
+        from src.service import main as serve
+        sys.exit(serve(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["mcp"]:
+        # MCP server for external clients: python main.py mcp [--socket PATH | --port N]
+        from src.mcp_stdio import main as serve_mcp
+        sys.exit(serve_mcp(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["client"]:
+        # Thin client for the daemon: python main.py client generate "..." -f a.ts
+        from src.daemon import client_main
+        sys.exit(client_main(sys.argv[2:]))
+
     try:
         from src.simplified_cli import main
         main()
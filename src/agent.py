@@ -1,11 +1,20 @@
 """Main AI Agent module - orchestrates file operations and code generation"""
 
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+from src.batch import BatchJob
+from src.batch_refactor import StagedRefactor, resolve_targets
+from src.patching import PatchError, apply_response
+from src.config import BATCH_CONCURRENCY
 from src.file_handler import FileHandler
-from src.replicate_api import ReplicateClient
+from src.response_cache import ResponseCache
 from src.conversation_memory import ConversationMemory
 
+if TYPE_CHECKING:
+    # Imported lazily at runtime: requests dominates startup time
+    from src.replicate_api import ReplicateClient
+
 
 class CodeAgent:
     """AI Agent that can read, create, and modify files with AI assistance"""
@@ -22,9 +31,68 @@ class CodeAgent:
             workspace_root = WORKSPACE_ROOT
         
         self.file_handler = FileHandler(workspace_root)
-        self.api_client = ReplicateClient()
         self.workspace_root = workspace_root
-        self.memory = ConversationMemory(workspace_root)
+        
+        # Built on first use so file commands never wait on the network,
+        # the token prompt or history loading
+        self._api_client: Optional["ReplicateClient"] = None
+        self._memory: Optional[ConversationMemory] = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def api_client(self) -> "ReplicateClient":
+        """Replicate client, created on first use (may prompt for the API token)"""
+        if self._api_client is None:
+            with self._init_lock:
+                if self._api_client is None:
+                    from src.config import REPLICATE_API_BASE
+                    from src.http_transport import preconnect
+                    from src.replicate_api import ReplicateClient
+                    
+                    # Warm the shared connection pool while the token prompt runs
+                    preconnect(REPLICATE_API_BASE)
+                    client = ReplicateClient(
+                        transport=self.transport,
+                        cache=self._build_response_cache(self.workspace_root)
+                    )
+                    # Resolve the model version off the request path
+                    client.warm_model_version()
+                    self._api_client = client
+        return self._api_client
+
+    @api_client.setter
+    def api_client(self, client: "ReplicateClient"):
+        self._api_client = client
+
+    @property
+    def transport(self):
+        """Shared HTTP connection pool used by the API client"""
+        from src.http_transport import get_transport
+        return get_transport()
+
+    @property
+    def memory(self) -> ConversationMemory:
+        """Conversation memory, created on first use"""
+        if self._memory is None:
+            with self._init_lock:
+                if self._memory is None:
+                    self._memory = ConversationMemory(self.workspace_root)
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory: ConversationMemory):
+        self._memory = memory
+
+    def _build_response_cache(self, workspace_root: Path) -> Optional[ResponseCache]:
+        """Create the response cache if enabled in config"""
+        from src.config import RESPONSE_CACHE, RESPONSE_CACHE_MAX_MB, RESPONSE_CACHE_TTL
+        if not RESPONSE_CACHE:
+            return None
+        return ResponseCache(
+            Path(workspace_root) / ".agent_history" / "response_cache",
+            max_bytes=RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+            ttl=RESPONSE_CACHE_TTL
+        )
 
     def read_file(self, file_path: str) -> Optional[str]:
         """Read a file from the workspace"""
@@ -50,10 +118,49 @@ class CodeAgent:
         """Generate code based on specification"""
         return self.api_client.generate_code(specification)
 
+    def generate_code_stream(self, specification: str) -> Iterator[str]:
+        """Stream generated code chunks as they arrive"""
+        return self.api_client.generate_code_stream(specification)
+
     def analyze_code(self, code: str, instruction: str) -> str:
         """Analyze and modify code"""
         return self.api_client.analyze_code(code, instruction)
 
+    def edit_code(self, code: str, instruction: str, path: Optional[str] = None) -> str:
+        """
+        Modify code by asking for search/replace edits instead of the whole file
+        
+        Falls back to a full rewrite (analyze_code) when the model's edits
+        don't apply, or always when EDIT_MODE is "rewrite".
+        
+        Args:
+            code: Current code
+            instruction: What to change
+            path: File name shown to the model, if any
+            
+        Returns:
+            The modified code
+        """
+        from src.config import EDIT_MODE
+        if EDIT_MODE == "patch":
+            try:
+                return apply_response(code, self.api_client.edit_code(code, instruction, path))
+            except PatchError:
+                pass
+        return self.analyze_code(code, instruction)
+
+    def analyze_code_stream(self, code: str, instruction: str) -> Iterator[str]:
+        """Stream analysis output chunks as they arrive"""
+        return self.api_client.analyze_code_stream(code, instruction)
+
+    def generate_code_many(self, specifications: list[str], concurrency: int = BATCH_CONCURRENCY) -> BatchJob:
+        """Generate code for many specifications concurrently"""
+        return self.api_client.generate_code_many(specifications, concurrency)
+
+    def analyze_code_many(self, requests: list[tuple[str, str]], concurrency: int = BATCH_CONCURRENCY) -> BatchJob:
+        """Analyze many (code, instruction) pairs concurrently"""
+        return self.api_client.analyze_code_many(requests, concurrency)
+
     def plan_tasks(self, objective: str) -> list[str]:
         """Create a plan for an objective"""
         return self.api_client.plan_tasks(objective)
@@ -73,10 +180,44 @@ class CodeAgent:
         if not code:
             raise FileNotFoundError(f"File {file_path} not found")
         
-        refactored = self.analyze_code(code, refactoring_rules)
+        refactored = self.edit_code(code, refactoring_rules, file_path)
         self.modify_file(file_path, refactored)
         return refactored
 
+    def stage_refactor(
+        self,
+        targets: Union[str, list[str]],
+        refactoring_rules: str,
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> StagedRefactor:
+        """
+        Refactor many workspace files concurrently without writing anything yet
+        
+        Args:
+            targets: Glob (e.g. "src/**/*.py") or list of paths/globs in the workspace
+            refactoring_rules: Rules applied to every file
+            concurrency: Maximum files being refactored at once
+            
+        Returns:
+            StagedRefactor to review (summary(), diff()) and apply()
+        """
+        paths = resolve_targets(self.file_handler.workspace_root, targets)
+        return StagedRefactor(self.file_handler, self.edit_code, paths, refactoring_rules, concurrency)
+
+    def refactor_many(
+        self,
+        targets: Union[str, list[str]],
+        refactoring_rules: str,
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> dict:
+        """
+        Refactor many workspace files concurrently and apply the results together
+        
+        Returns:
+            Summary with per-file status, timings, failures and the combined diff
+        """
+        return self.stage_refactor(targets, refactoring_rules, concurrency).apply()
+
     def create_from_template(self, file_path: str, template_spec: str) -> str:
         """
         Create a file from a template specification
@@ -0,0 +1,207 @@
+"""Asyncio-native Replicate API client"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from src.config import MAX_CONTINUATION_TOKENS, MAX_CONTINUATIONS, PREDICTION_MAX_WAIT
+from src.wait_strategy import AdaptivePollStrategy, WaitStrategy
+from src.replicate_api import (
+    PromptTooLargeError,
+    ReplicateClient,
+    TERMINAL_STATUSES,
+    _analyze_prompt,
+    _code_prompt,
+    _parse_plan,
+    _plan_prompt,
+    _stitch,
+)
+
+
+class AsyncReplicateClient:
+    """
+    Async counterpart of ReplicateClient with the same surface
+
+    Waiting between polls happens on the event loop, so a single loop can
+    keep dozens of predictions in flight. Each individual HTTP call runs on
+    a small executor bounded by the connection pool size, reusing the shared
+    keep-alive transport; no thread is held for the life of a prediction.
+
+    Predictions are never created with `Prefer: wait`, which would park an
+    executor thread on the create call for up to a minute. A client set up
+    with the sync strategy is polled adaptively instead.
+    """
+
+    def __init__(self, client: Optional[ReplicateClient] = None, **client_kwargs):
+        """
+        Initialize the async client
+
+        Args:
+            client: Existing ReplicateClient to share token, model, transport
+                and polling strategy with (created from client_kwargs if omitted)
+            **client_kwargs: Passed to ReplicateClient when creating one
+        """
+        self.client = client or ReplicateClient(**client_kwargs)
+        self.model = self.client.model
+        self.wait_strategy = _polling_strategy(self.client.wait_strategy)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.client.transport.pool_maxsize,
+            thread_name_prefix="blink-http"
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        use_cache: bool = True,
+        continue_truncated: bool = True,
+        max_total_tokens: int = MAX_CONTINUATION_TOKENS,
+    ) -> str:
+        """
+        Generate text using the Replicate API
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt for the model
+            max_tokens: Maximum tokens in response (None picks it from the context window)
+            temperature: Temperature for sampling (0-1, defaults to the client's)
+            use_cache: Set False to bypass cached responses (the fresh result is still stored)
+            continue_truncated: Resume outputs that stopped at max_tokens
+            max_total_tokens: Output token cap across the original and its continuations
+
+        Returns:
+            Generated text
+        """
+        cache = self.client.cache
+        try:
+            # Building the payload may fetch the model version over HTTP
+            payload = await self._run(self.client._build_payload, prompt, system_prompt, max_tokens, temperature)
+
+            cache_key = self.client._cache_key(payload)
+            if cache_key and use_cache:
+                cached = await self._run(cache.get, cache_key)
+                if cached is not None:
+                    return cached
+
+            prediction = await self._run_prediction(payload)
+            output = self.client._extract_output(prediction)
+
+            if continue_truncated and self.client._is_truncated(prediction, output, payload["input"]["max_tokens"]):
+                output = await self._continue_output(payload, output, max_total_tokens)
+
+            if cache_key:
+                await self._run(cache.put, cache_key, output)
+            return output
+
+        except PromptTooLargeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error calling Replicate API: {e}")
+
+    def submit(self, prompt: str, **generate_kwargs) -> asyncio.Task:
+        """
+        Start generate() as a task on the running loop
+
+        Calling cancel() on the returned task cancels the prediction on
+        Replicate as well as the local wait.
+        """
+        return asyncio.create_task(self.generate(prompt, **generate_kwargs))
+
+    async def cancel_prediction(self, prediction_id: str) -> bool:
+        """Cancel a running prediction"""
+        return await self._run(self.client.cancel_prediction, prediction_id)
+
+    async def _run_prediction(self, payload: dict) -> dict:
+        """Create a prediction and wait for it to finish"""
+        created_at = time.time()
+        prediction = await self._run(
+            self.client._create_prediction,
+            payload,
+            timeout=self.wait_strategy.create_timeout
+        )
+        return await self._await_prediction(prediction, created_at)
+
+    async def _continue_output(self, payload: dict, output: str, max_total_tokens: int) -> str:
+        """Issue continuation predictions and stitch the pieces, like ReplicateClient._continue_output"""
+        for _ in range(MAX_CONTINUATIONS):
+            next_payload = await self._run(self.client._continuation_payload, payload, output, max_total_tokens)
+            if next_payload is None:
+                break
+
+            prediction = await self._run_prediction(next_payload)
+            piece = self.client._extract_output(prediction)
+            output = _stitch(output, piece)
+
+            if not self.client._is_truncated(prediction, piece, next_payload["input"]["max_tokens"]):
+                break
+
+        return output
+
+    async def _await_prediction(self, prediction: dict, created_at: float) -> dict:
+        """Poll a tracked prediction, cancelling it on timeout, error or task cancellation"""
+        prediction_id = prediction["id"]
+        tracker = self.client.tracker
+        tracker.add(prediction_id, self.client.cancel_prediction)
+        try:
+            return await self._poll_prediction(prediction, created_at)
+        except BaseException:
+            await self.cancel_prediction(prediction_id)
+            raise
+        finally:
+            tracker.discard(prediction_id)
+
+    async def _poll_prediction(
+        self,
+        prediction: dict,
+        created_at: float,
+        max_wait: int = PREDICTION_MAX_WAIT,
+    ) -> dict:
+        """Poll a prediction until it reaches a terminal status"""
+        strategy = self.wait_strategy
+        poll_count = 0
+        while prediction.get("status") not in TERMINAL_STATUSES:
+            elapsed = time.time() - created_at
+            if elapsed >= max_wait:
+                raise RuntimeError("Prediction timeout")
+
+            delay = strategy.next_delay(poll_count, elapsed)
+            await asyncio.sleep(min(delay, max_wait - elapsed))
+            poll_count += 1
+
+            prediction = await self._run(self.client._get_prediction, prediction["id"])
+
+        strategy.observe(time.time() - created_at)
+        self.client._record_latency(prediction, time.time() - created_at)
+        return prediction
+
+    async def analyze_code(self, code: str, instruction: str) -> str:
+        """Analyze and modify code based on instruction"""
+        return await self.generate(_analyze_prompt(code, instruction))
+
+    async def generate_code(self, specification: str) -> str:
+        """Generate code based on specification"""
+        return await self.generate(_code_prompt(specification))
+
+    async def plan_tasks(self, objective: str) -> list[str]:
+        """Create a step-by-step plan for an objective"""
+        result = await self.generate(_plan_prompt(objective), max_tokens=1024)
+        return _parse_plan(result)
+
+    async def aclose(self):
+        """Release the HTTP executor (the shared transport stays open)"""
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func, *args, **kwargs):
+        """Run one blocking HTTP call on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+
+def _polling_strategy(strategy: WaitStrategy) -> WaitStrategy:
+    """The client's strategy if it only polls, otherwise adaptive polling"""
+    if strategy.create_headers():
+        return AdaptivePollStrategy()
+    return strategy
@@ -0,0 +1,124 @@
+"""Bounded-concurrency batch execution for prediction calls"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+from src.prediction_tracker import get_prediction_tracker
+
+
+class BatchJob:
+    """
+    Runs `func` over many items on a bounded worker pool
+
+    Work starts as soon as the job is created. Each item produces a result
+    dict, so one failing item never aborts the rest of the batch:
+
+        {"index": 0, "success": True, "output": "...", "error": None, "elapsed": 1.7}
+
+    Iterating the job yields results in input order; as_completed() yields
+    them as soon as each one finishes. cancel() stops the whole batch, and
+    so does Ctrl-C (or SIGTERM) while waiting on results - before the
+    interpreter joins the worker threads.
+    """
+
+    def __init__(self, func: Callable[[Any], Any], items: Iterable[Any], concurrency: int = 4):
+        """
+        Start the batch
+
+        Args:
+            func: Called once per item
+            items: Inputs, one per call
+            concurrency: Maximum calls in flight at once
+        """
+        self.items = list(items)
+        self.concurrency = max(1, min(concurrency, len(self.items) or 1))
+        self.started_at = time.time()
+        # Predictions made by the workers are tagged with this job's id
+        self._jobs = get_prediction_tracker().new_job("batch")
+        self.job_id = self._jobs[-1]
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="blink-batch"
+        )
+        self._futures: list[Future] = [
+            self._executor.submit(self._run_one, func, index, item)
+            for index, item in enumerate(self.items)
+        ]
+        self._executor.shutdown(wait=False)
+
+    def results(self) -> list[dict]:
+        """Wait for every item and return results in input order"""
+        with self._cancel_on_interrupt():
+            return [self._result(index, future) for index, future in enumerate(self._futures)]
+
+    def as_completed(self) -> Iterator[dict]:
+        """Yield results in completion order"""
+        positions = {future: index for index, future in enumerate(self._futures)}
+        with self._cancel_on_interrupt():
+            for future in as_completed(self._futures):
+                yield self._result(positions[future], future)
+
+    def cancel(self) -> int:
+        """
+        Cancel the batch: drop queued items and cancel predictions in flight
+
+        Cancelled items finish with success False.
+
+        Returns:
+            Number of in-flight predictions cancelled
+        """
+        for future in self._futures:
+            future.cancel()
+        return get_prediction_tracker().cancel_all(self.job_id)
+
+    def done(self) -> bool:
+        """True once every item has finished"""
+        return all(future.done() for future in self._futures)
+
+    def __iter__(self) -> Iterator[dict]:
+        with self._cancel_on_interrupt():
+            for index, future in enumerate(self._futures):
+                yield self._result(index, future)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @contextmanager
+    def _cancel_on_interrupt(self) -> Iterator[None]:
+        """Cancel the batch if the wait is interrupted by Ctrl-C or an exit"""
+        try:
+            yield
+        except (KeyboardInterrupt, SystemExit):
+            self.cancel()
+            raise
+
+    @staticmethod
+    def _result(index: int, future: Future) -> dict:
+        """Result dict for a future, including items cancelled before they started"""
+        if future.cancelled():
+            return {"index": index, "success": False, "output": None, "error": "cancelled", "elapsed": 0.0}
+        return future.result()
+
+    def _run_one(self, func: Callable[[Any], Any], index: int, item: Any) -> dict:
+        """Run a single item, capturing its outcome instead of raising"""
+        start = time.time()
+        try:
+            with get_prediction_tracker().job_scope(self._jobs):
+                output = func(item)
+            return {
+                "index": index,
+                "success": True,
+                "output": output,
+                "error": None,
+                "elapsed": round(time.time() - start, 3)
+            }
+        except Exception as e:
+            return {
+                "index": index,
+                "success": False,
+                "output": None,
+                "error": str(e),
+                "elapsed": round(time.time() - start, 3)
+            }
@@ -0,0 +1,197 @@
+"""Concurrent refactoring of many workspace files, staged before being applied"""
+
+import difflib
+import glob
+import time
+from pathlib import Path
+from typing import Callable, Union
+
+from src.batch import BatchJob
+
+
+def resolve_targets(workspace_root: Path, targets: Union[str, list[str]]) -> list[str]:
+    """
+    Expand a glob or list of paths/globs into workspace-relative file paths
+
+    Args:
+        workspace_root: Workspace directory globs are evaluated in
+        targets: A glob like "src/**/*.py", or a list of paths and globs
+
+    Returns:
+        Sorted unique file paths relative to the workspace
+
+    Raises:
+        PermissionError: If a path or glob match lies outside the workspace
+            (absolute paths, ".." and symlinks are resolved first)
+    """
+    if isinstance(targets, str):
+        targets = [targets]
+
+    root = Path(workspace_root)
+    resolved_root = root.resolve()
+    paths = []
+    for target in targets:
+        if glob.has_magic(target):
+            matches = [Path(p) for p in glob.glob(str(root / target), recursive=True)]
+            candidates = [p for p in matches if p.is_file()]
+        else:
+            candidates = [root / target]
+
+        for path in candidates:
+            resolved = path.resolve()
+            if resolved_root not in resolved.parents:
+                raise PermissionError(f"Refactor target is outside the workspace: {target} ({resolved})")
+            paths.append(str(resolved.relative_to(resolved_root)))
+    return sorted(set(paths))
+
+
+class StagedRefactor:
+    """
+    Refactors files concurrently and holds the results until apply()
+
+    Every file is read and sent to the model on a bounded worker pool;
+    nothing is written until all of them have finished, so the whole sweep
+    can be reviewed (summary(), diff()) and then applied in one go.
+    """
+
+    def __init__(
+        self,
+        file_handler,
+        analyze: Callable[[str, str], str],
+        paths: list[str],
+        refactoring_rules: str,
+        concurrency: int = 4,
+    ):
+        """
+        Run the refactor and stage its results
+
+        Args:
+            file_handler: FileHandler used to read and write files
+            analyze: Called as analyze(code, instruction) -> new code (e.g. agent.edit_code)
+            paths: Workspace-relative files to refactor
+            refactoring_rules: Instruction applied to every file
+            concurrency: Maximum model calls in flight
+        """
+        self.file_handler = file_handler
+        self.rules = refactoring_rules
+        self.started_at = time.time()
+        self.applied = False
+
+        def refactor(path: str) -> tuple[str, str]:
+            original = file_handler.read_file(path)
+            if original is None:
+                raise FileNotFoundError(f"File {path} not found")
+            return original, analyze(original, refactoring_rules)
+
+        self.job = BatchJob(refactor, paths, concurrency)
+        self.entries = []
+        for path, result in zip(paths, self.job.results()):
+            entry = {
+                "path": path,
+                "status": "failed",
+                "error": result["error"],
+                "elapsed": result["elapsed"],
+                "original": None,
+                "refactored": None,
+            }
+            if result["success"]:
+                original, refactored = result["output"]
+                entry.update({
+                    "status": "changed" if refactored != original else "unchanged",
+                    "original": original,
+                    "refactored": refactored,
+                })
+            self.entries.append(entry)
+        self.wall_time = round(time.time() - self.started_at, 3)
+
+    def diff(self, path: str = None) -> str:
+        """Unified diff of staged changes (one file, or all of them)"""
+        parts = []
+        for entry in self.entries:
+            if entry["refactored"] in (None, entry["original"]) or (path and entry["path"] != path):
+                continue
+            parts.append("".join(difflib.unified_diff(
+                entry["original"].splitlines(keepends=True),
+                entry["refactored"].splitlines(keepends=True),
+                fromfile=f"a/{entry['path']}",
+                tofile=f"b/{entry['path']}"
+            )))
+        return "\n".join(parts)
+
+    def apply(self) -> dict:
+        """
+        Write every staged change
+
+        Files edited since they were staged are skipped. If a write fails,
+        the files already written by this call are restored, so the sweep
+        applies completely or not at all.
+
+        Returns:
+            summary() after applying
+        """
+        if self.applied:
+            return self.summary()
+
+        written = []
+        try:
+            for entry in self.entries:
+                if entry["status"] != "changed":
+                    continue
+                if self.file_handler.read_file(entry["path"]) != entry["original"]:
+                    entry["status"] = "conflict"
+                    entry["error"] = "File changed since the refactor was staged"
+                    continue
+                self.file_handler.modify_file(entry["path"], entry["refactored"])
+                written.append(entry)
+        except Exception as e:
+            for entry in written:
+                try:
+                    self.file_handler.modify_file(entry["path"], entry["original"])
+                except Exception:
+                    pass
+            raise IOError(f"Refactor not applied, restored {len(written)} file(s): {e}")
+
+        for entry in written:
+            entry["status"] = "applied"
+        self.applied = True
+        return self.summary()
+
+    def summary(self) -> dict:
+        """Counts, per-file timings and errors, and the combined diff"""
+        counts = {}
+        for entry in self.entries:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+
+        files = []
+        for entry in self.entries:
+            added = removed = 0
+            if entry["original"] is not None and entry["refactored"] is not None:
+                diff = list(difflib.unified_diff(
+                    entry["original"].splitlines(), entry["refactored"].splitlines(), lineterm="", n=0
+                ))
+                # Skip the ---/+++ file headers
+                for line in diff[2:]:
+                    if line.startswith("+"):
+                        added += 1
+                    elif line.startswith("-"):
+                        removed += 1
+            files.append({
+                "path": entry["path"],
+                "status": entry["status"],
+                "elapsed": entry["elapsed"],
+                "error": entry["error"],
+                "lines_added": added,
+                "lines_removed": removed,
+            })
+
+        return {
+            "rules": self.rules,
+            "files": len(self.entries),
+            "counts": counts,
+            "failed": [f for f in files if f["status"] in ("failed", "conflict")],
+            "applied": self.applied,
+            "wall_time": self.wall_time,
+            "model_time": round(sum(entry["elapsed"] for entry in self.entries), 3),
+            "results": files,
+            "diff": self.diff(),
+        }
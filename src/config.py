@@ -3,17 +3,119 @@
 import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Try to load from .env if it exists (for development)
+# Try to load from .env if it exists (for development); dotenv is only
+# imported when there is a file to parse
 env_path = Path(__file__).parent.parent / ".env"
 if env_path.exists():
+    from dotenv import load_dotenv
     load_dotenv(dotenv_path=env_path)
 
 # Try to get token from environment (for development/raw Python)
 REPLICATE_API_TOKEN = os.getenv("REPLICATE_API_TOKEN")
 MODEL = os.getenv("MODEL", "anthropic/claude-4.5-sonnet")
 
+# Replicate API endpoint (override to run against src/mock_replicate.py or a proxy)
+DEFAULT_REPLICATE_API_BASE = "https://api.replicate.com/v1"
+REPLICATE_API_BASE = os.getenv("BLINK_REPLICATE_API_BASE", DEFAULT_REPLICATE_API_BASE).rstrip("/")
+
+# Model version resolution (see src/model_versions.py)
+# PREDICTION_ENDPOINT: "version" resolves MODEL to its latest version and posts to
+# /predictions; "model" posts to /models/{owner}/{name}/predictions instead
+PREDICTION_ENDPOINT = os.getenv("BLINK_PREDICTION_ENDPOINT", "version")
+MODEL_VERSION = os.getenv("BLINK_MODEL_VERSION", "")  # pin a version id, skipping resolution
+MODEL_VERSION_TTL = int(os.getenv("BLINK_MODEL_VERSION_TTL", str(24 * 3600)))
+MODEL_VERSION_CACHE = Path(os.getenv("BLINK_MODEL_VERSION_CACHE", str(Path.home() / ".blink" / "model_versions.json")))
+
+# Shared HTTP connection pool (see src/http_transport.py)
+HTTP_POOL_CONNECTIONS = int(os.getenv("BLINK_HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("BLINK_HTTP_POOL_MAXSIZE", "16"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("BLINK_HTTP_PER_HOST_LIMIT", "16"))
+HTTP_PRECONNECT = os.getenv("BLINK_HTTP_PRECONNECT", "1") != "0"
+
+# Client-side rate limits (Replicate allows 600 creates/min, 3000 other requests/min)
+RATE_LIMIT_CREATE_PER_SEC = float(os.getenv("BLINK_RATE_LIMIT_CREATE_PER_SEC", "10"))
+RATE_LIMIT_CREATE_BURST = float(os.getenv("BLINK_RATE_LIMIT_CREATE_BURST", "20"))
+RATE_LIMIT_POLL_PER_SEC = float(os.getenv("BLINK_RATE_LIMIT_POLL_PER_SEC", "50"))
+RATE_LIMIT_POLL_BURST = float(os.getenv("BLINK_RATE_LIMIT_POLL_BURST", "100"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("BLINK_RATE_LIMIT_MAX_RETRIES", "5"))
+
+# Prediction completion waiting (see src/wait_strategy.py)
+WAIT_STRATEGY = os.getenv("BLINK_WAIT_STRATEGY", "sync")
+PREDICTION_MAX_WAIT = int(os.getenv("BLINK_PREDICTION_MAX_WAIT", "300"))
+
+# Default sampling temperature (0 makes outputs deterministic and cacheable)
+TEMPERATURE = float(os.getenv("BLINK_TEMPERATURE", "0.7"))
+
+# Opt-in response cache under <workspace>/.agent_history/response_cache
+RESPONSE_CACHE = os.getenv("BLINK_RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_MAX_MB = int(os.getenv("BLINK_RESPONSE_CACHE_MAX_MB", "100"))
+RESPONSE_CACHE_TTL = int(os.getenv("BLINK_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Hedged requests: duplicate a deterministic prediction that is slower than
+# HEDGE_PERCENTILE of recent ones, keep the first result, cancel the rest
+HEDGE_ENABLED = os.getenv("BLINK_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("BLINK_HEDGE_PERCENTILE", "95"))
+HEDGE_MAX_EXTRA = int(os.getenv("BLINK_HEDGE_MAX_EXTRA", "1"))
+
+# Prompt budgeting (see src/token_estimator.py)
+# PROMPT_OVERFLOW: "reject" raises before sending, "trim" cuts the prompt to fit
+PROMPT_OVERFLOW = os.getenv("BLINK_PROMPT_OVERFLOW", "reject")
+MIN_OUTPUT_TOKENS = int(os.getenv("BLINK_MIN_OUTPUT_TOKENS", "512"))
+PROMPT_SAFETY_MARGIN = int(os.getenv("BLINK_PROMPT_SAFETY_MARGIN", "1024"))
+# Tokens of reference-file context per prompt (0 = whatever the model's window allows)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("BLINK_CONTEXT_TOKEN_BUDGET", "0"))
+
+# Relevance-ranked context selection (see src/context_retrieval.py). When the
+# referenced files don't fit, they are chunked and the chunks most relevant to
+# the instruction are packed into the budget instead of trimming every file
+CONTEXT_RETRIEVAL = os.getenv("BLINK_CONTEXT_RETRIEVAL", "1") == "1"
+CONTEXT_RETRIEVAL_TOKENS = int(os.getenv("BLINK_CONTEXT_RETRIEVAL_TOKENS", "24000"))  # used when CONTEXT_TOKEN_BUDGET is 0
+CONTEXT_CHUNK_LINES = int(os.getenv("BLINK_CONTEXT_CHUNK_LINES", "60"))
+CONTEXT_INCLUDE_WORKSPACE = os.getenv("BLINK_CONTEXT_INCLUDE_WORKSPACE", "0") == "1"
+# Workspace snippets put in the first MCP tool-loop prompt (0 = none)
+MCP_SEED_CONTEXT_TOKENS = int(os.getenv("BLINK_MCP_SEED_CONTEXT_TOKENS", "4000"))
+
+# Automatic continuation of outputs cut off at max_tokens
+MAX_CONTINUATION_TOKENS = int(os.getenv("BLINK_MAX_CONTINUATION_TOKENS", "32000"))
+MAX_CONTINUATIONS = int(os.getenv("BLINK_MAX_CONTINUATIONS", "4"))
+
+# How code edits are requested: "patch" asks for search/replace blocks and falls
+# back to a full rewrite if they don't apply; "rewrite" always re-emits the file
+EDIT_MODE = os.getenv("BLINK_EDIT_MODE", "patch")
+
+# Default number of predictions in flight for batch calls
+BATCH_CONCURRENCY = int(os.getenv("BLINK_BATCH_CONCURRENCY", "4"))
+
+# MCP tool-use loop budgets (see src/tool_loop.py)
+MCP_MAX_TURNS = int(os.getenv("BLINK_MCP_MAX_TURNS", "8"))
+MCP_MAX_TOKENS = int(os.getenv("BLINK_MCP_MAX_TOKENS", "400000"))  # prompt + output tokens across turns
+MCP_MAX_SECONDS = float(os.getenv("BLINK_MCP_MAX_SECONDS", "300"))
+MCP_TOOL_CONCURRENCY = int(os.getenv("BLINK_MCP_TOOL_CONCURRENCY", "8"))
+MCP_TOOL_RESULT_TOKENS = int(os.getenv("BLINK_MCP_TOOL_RESULT_TOKENS", "8000"))
+
+# Resident daemon (see src/daemon.py): Unix socket path, or a localhost TCP
+# port where Unix sockets are unavailable (Windows)
+DAEMON_SOCKET = Path(os.getenv("BLINK_DAEMON_SOCKET", str(Path.home() / ".blink" / "blink.sock")))
+DAEMON_PORT = int(os.getenv("BLINK_DAEMON_PORT", "8765"))
+# Token clients must send. The TCP port is open to every local user, so there
+# one is generated (and written to <socket>.token, owner-only) when unset
+DAEMON_TOKEN = os.getenv("BLINK_DAEMON_TOKEN", "")
+
+# HTTP service (see src/service.py)
+SERVICE_HOST = os.getenv("BLINK_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("BLINK_SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("BLINK_SERVICE_WORKERS", "8"))  # requests running at once
+SERVICE_MAX_QUEUE = int(os.getenv("BLINK_SERVICE_MAX_QUEUE", "64"))  # waiting requests before 503
+SERVICE_PER_CLIENT = int(os.getenv("BLINK_SERVICE_PER_CLIENT", "4"))  # queued + running per client before 429
+SERVICE_REQUEST_TIMEOUT = float(os.getenv("BLINK_SERVICE_REQUEST_TIMEOUT", "600"))
+SERVICE_MAX_BODY_BYTES = int(os.getenv("BLINK_SERVICE_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+# Bearer token clients must send; required when listening beyond localhost
+SERVICE_TOKEN = os.getenv("BLINK_SERVICE_TOKEN", "")
+
+# Time allowed from launch to the first "blink>" prompt (checked by main.py --startup-time)
+STARTUP_BUDGET_MS = int(os.getenv("BLINK_STARTUP_BUDGET_MS", "150"))
+
 # If no token in .env or env vars, we'll prompt at startup (for EXE)
 # This is handled by token_manager.py when the app starts
 if not REPLICATE_API_TOKEN:
@@ -25,7 +127,5 @@ if not REPLICATE_API_TOKEN:
 PROJECT_ROOT = Path(__file__).parent.parent
 SRC_DIR = PROJECT_ROOT / "src"
 WORKSPACE_ROOT = PROJECT_ROOT / "workspace"
-
-# Ensure workspace directory exists
-WORKSPACE_ROOT.mkdir(exist_ok=True)
+# Created by FileHandler when an agent first uses it, not at import
 
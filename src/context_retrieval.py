@@ -0,0 +1,280 @@
+"""Relevance-ranked selection of code context within a token budget (local BM25)"""
+
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.token_estimator import estimate_tokens
+
+
+# File types indexed when searching the wider workspace
+INDEXED_SUFFIXES = {
+    ".py", ".ts", ".tsx", ".js", ".jsx", ".java", ".cpp", ".c", ".h", ".cs", ".go", ".rs",
+    ".php", ".rb", ".sql", ".html", ".css", ".json", ".yaml", ".yml", ".md", ".txt", ".toml",
+}
+SKIPPED_DIRS = {".git", ".agent_history", "__pycache__", "node_modules", "venv", ".venv", "dist", "build"}
+MAX_INDEXED_FILE_BYTES = 512 * 1024
+
+_WORDS = re.compile(r"[A-Za-z][A-Za-z0-9]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_STOP_WORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "are", "was", "use",
+    "add", "make", "create", "new", "code", "file", "like", "its", "not", "but", "you",
+    "self", "def", "return", "import", "const", "let", "var", "function", "class", "public",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase search terms
+
+    Identifiers are kept whole and also split on camelCase/snake_case, so
+    "TemperatureSensor" matches both "temperature sensor" and "temperaturesensor".
+    """
+    terms = []
+    for word in _WORDS.findall(text):
+        lower = word.lower()
+        parts = [part.lower() for part in _CAMEL.findall(word)]
+        for term in ([lower] if len(parts) <= 1 else [lower] + parts):
+            if len(term) > 2 and term not in _STOP_WORDS:
+                terms.append(term)
+    return terms
+
+
+def chunk_text(path: str, text: str, max_lines: int = 60, overlap: int = 10) -> list[dict]:
+    """
+    Split a file into overlapping line windows, preferring to break at blank lines
+
+    Returns:
+        [{"path", "start", "end", "text"}] with 1-based inclusive line numbers
+    """
+    lines = text.splitlines(keepends=True)
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = min(len(lines), start + max_lines)
+        if end < len(lines):
+            # Break at the last blank line in the back half of the window
+            for cut in range(end, start + max_lines // 2, -1):
+                if not lines[cut - 1].strip():
+                    end = cut
+                    break
+        chunks.append({"path": path, "start": start + 1, "end": end, "text": "".join(lines[start:end])})
+        if end >= len(lines):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a list of chunks"""
+
+    def __init__(self, chunks: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._terms = [Counter(tokenize(f"{chunk['path']} {chunk['text']}")) for chunk in chunks]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = (sum(self._lengths) / len(chunks)) if chunks else 0.0
+        document_frequency = Counter()
+        for terms in self._terms:
+            document_frequency.update(terms.keys())
+        total = len(chunks)
+        self._idf = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        """BM25 score of every chunk for `query`"""
+        query_terms = set(tokenize(query))
+        results = []
+        for terms, length in zip(self._terms, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+            for term in query_terms:
+                frequency = terms.get(term)
+                if frequency:
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            results.append(score)
+        return results
+
+
+class ContextRetriever:
+    """
+    Picks the code most relevant to an instruction, within a token budget
+
+    Referenced files that fit the budget are used whole. Otherwise all
+    candidate files are chunked and ranked with BM25 against the
+    instruction; the best chunks are packed until the budget is spent, with
+    each explicitly referenced file guaranteed its best chunk. Workspace
+    chunks are cached per file and reused until the file changes.
+    """
+
+    def __init__(self, workspace_root: Path, chunk_lines: int = 60):
+        """
+        Args:
+            workspace_root: Directory searched when the wider workspace is included
+            chunk_lines: Maximum lines per chunk
+        """
+        self.workspace_root = Path(workspace_root)
+        self.chunk_lines = chunk_lines
+        # path -> (mtime, size, chunks)
+        self._workspace_chunks: dict[str, tuple[float, int, list[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def select(
+        self,
+        query: str,
+        files: dict[str, str],
+        budget: int,
+        include_workspace: bool = False,
+    ) -> list[dict]:
+        """
+        Choose context for `query`
+
+        Args:
+            query: Instruction the context is for
+            files: Referenced files, path -> content
+            budget: Token budget for all selected text
+            include_workspace: Also rank chunks from other workspace files
+
+        Returns:
+            Chunks {"path", "start", "end", "text"} grouped by file in line order;
+            a whole file is one chunk spanning all its lines
+        """
+        if budget <= 0:
+            return []
+
+        sizes = {path: estimate_tokens(content) for path, content in files.items()}
+        if not include_workspace and sum(sizes.values()) <= budget:
+            return [
+                {"path": path, "start": 1, "end": content.count("\n") + 1, "text": content}
+                for path, content in files.items()
+            ]
+
+        chunks = []
+        for path, content in files.items():
+            chunks.extend(chunk_text(path, content, self.chunk_lines))
+        if include_workspace:
+            chunks.extend(self._workspace(exclude=set(files)))
+        if not chunks:
+            return []
+
+        scores = BM25Index(chunks).scores(query)
+        ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], chunks[i]["path"], chunks[i]["start"]))
+
+        # Every referenced file gets its best chunk first, then the rest by score
+        order = []
+        seen_files = set()
+        for i in ranked:
+            path = chunks[i]["path"]
+            if path in files and path not in seen_files:
+                seen_files.add(path)
+                order.append(i)
+        first = set(order)
+        order.extend(i for i in ranked if i not in first and (scores[i] > 0 or chunks[i]["path"] in files))
+
+        selected = []
+        remaining = budget
+        for i in order:
+            cost = estimate_tokens(chunks[i]["text"])
+            if cost <= remaining:
+                selected.append(chunks[i])
+                remaining -= cost
+        return _merge(selected)
+
+    def warm(self) -> int:
+        """Chunk the whole workspace ahead of the first query; returns the chunk count"""
+        return len(self._workspace(exclude=set()))
+
+    def _workspace(self, exclude: set[str]) -> list[dict]:
+        """Chunks of every indexable workspace file not in `exclude`"""
+        chunks = []
+        seen = set()
+        for file_path in self._iter_workspace_files():
+            path = str(file_path.relative_to(self.workspace_root))
+            seen.add(path)
+            if path in exclude or str(file_path) in exclude:
+                continue
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            with self._lock:
+                cached = self._workspace_chunks.get(path)
+            if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                chunks.extend(cached[2])
+                continue
+            try:
+                content = file_path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            file_chunks = chunk_text(path, content, self.chunk_lines)
+            with self._lock:
+                self._workspace_chunks[path] = (stat.st_mtime, stat.st_size, file_chunks)
+            chunks.extend(file_chunks)
+
+        with self._lock:
+            for path in set(self._workspace_chunks) - seen:
+                del self._workspace_chunks[path]
+        return chunks
+
+    def _iter_workspace_files(self):
+        """Indexable files under the workspace, skipping vendored and hidden directories"""
+        stack = [self.workspace_root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = sorted(directory.iterdir())
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name not in SKIPPED_DIRS and not entry.name.startswith("."):
+                        stack.append(entry)
+                elif entry.suffix.lower() in INDEXED_SUFFIXES:
+                    try:
+                        if entry.stat().st_size <= MAX_INDEXED_FILE_BYTES:
+                            yield entry
+                    except OSError:
+                        continue
+
+
+def format_context(chunks: list[dict], language_for: Optional[Callable[[str], str]] = None) -> str:
+    """
+    Render selected chunks for a prompt
+
+    Args:
+        chunks: Output of ContextRetriever.select
+        language_for: Optional function mapping a file suffix to a language name
+    """
+    sections = []
+    for chunk in chunks:
+        header = f"FILE: {chunk['path']} (lines {chunk['start']}-{chunk['end']})"
+        if language_for:
+            header += f"\nLANGUAGE: {language_for(Path(chunk['path']).suffix)}"
+        sections.append(f"{header}\n{'-' * 80}\n{chunk['text'].rstrip()}\n{'-' * 80}")
+    return "\n\n".join(sections)
+
+
+def _merge(chunks: list[dict]) -> list[dict]:
+    """Group chunks by file in line order, joining ones that overlap or touch"""
+    merged = []
+    for chunk in sorted(chunks, key=lambda c: (c["path"], c["start"])):
+        last = merged[-1] if merged else None
+        if last and last["path"] == chunk["path"] and chunk["start"] <= last["end"] + 1:
+            if chunk["end"] > last["end"]:
+                # Append only the lines past the end of the previous chunk
+                lines = chunk["text"].splitlines(keepends=True)
+                tail = lines[last["end"] - chunk["start"] + 1:]
+                if tail and not last["text"].endswith("\n"):
+                    last["text"] += "\n"
+                last["text"] += "".join(tail)
+                last["end"] = chunk["end"]
+            continue
+        merged.append(dict(chunk))
+    return merged
@@ -1,6 +1,8 @@
 """Conversation memory and history management"""
 
+import atexit
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List, Any
@@ -9,45 +11,87 @@ from typing import Optional, Dict, List, Any
 class ConversationMemory:
     """Manages conversation history and context for the AI agent"""
 
-    def __init__(self, workspace_root: Path):
+    def __init__(self, workspace_root: Path, history_dir: Optional[Path] = None):
         """
         Initialize conversation memory
         
+        The session file is not read until the history is first needed.
+        Messages and context recorded before then are buffered and merged in
+        when it is loaded (at the latest on exit), so cheap commands never pay
+        for parsing a long session.
+        
         Args:
             workspace_root: Root directory for storing conversation history
+            history_dir: Where the session files live (default: <workspace>/.agent_history);
+                separate directories give independent conversations
         """
         self.workspace_root = Path(workspace_root)
-        self.history_dir = self.workspace_root / ".agent_history"
-        self.history_dir.mkdir(exist_ok=True)
+        self.history_dir = Path(history_dir) if history_dir else self.workspace_root / ".agent_history"
         
         self.current_session_file = self.history_dir / "current_session.json"
         self.all_history_file = self.history_dir / "all_history.json"
         
-        self.conversation_history: List[Dict[str, Any]] = []
-        self.context_variables: Dict[str, Any] = {}
-        
-        self.load_or_create_session()
+        self._history: List[Dict[str, Any]] = []
+        self._context: Dict[str, Any] = {}
+        self._loaded = False
+        self._pending = False
+        self._lock = threading.RLock()
+
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return self._history
+
+    @conversation_history.setter
+    def conversation_history(self, history: List[Dict[str, Any]]):
+        self._ensure_loaded()
+        self._history = history
+
+    @property
+    def context_variables(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        return self._context
+
+    @context_variables.setter
+    def context_variables(self, context: Dict[str, Any]):
+        self._ensure_loaded()
+        self._context = context
+
+    def _ensure_loaded(self):
+        """Load the session file, keeping anything recorded before it was read"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            buffered_history, buffered_context = self._history, self._context
+            self.load_or_create_session()
+            self._history.extend(buffered_history)
+            self._context.update(buffered_context)
+            self._loaded = True
 
     def load_or_create_session(self):
         """Load existing session or create a new one"""
+        self._history = []
+        self._context = {}
         if self.current_session_file.exists():
             try:
                 with open(self.current_session_file, "r") as f:
                     content = f.read().strip()
                     if content:
                         data = json.loads(content)
-                        self.conversation_history = data.get("history", [])
-                        self.context_variables = data.get("context", {})
-                    else:
-                        self.conversation_history = []
-                        self.context_variables = {}
+                        self._history = data.get("history", [])
+                        self._context = data.get("context", {})
             except Exception as e:
                 print(f"Warning: Could not load session: {e}")
-                self.conversation_history = []
-                self.context_variables = {}
-        else:
-            self.conversation_history = []
-            self.context_variables = {}
+                self._history = []
+                self._context = {}
+        self._loaded = True
+
+    def flush(self):
+        """Write buffered messages to the session file"""
+        if self._pending:
+            self.save_session()
 
     def add_message(self, role: str, content: str, command: Optional[str] = None, metadata: Optional[Dict] = None):
         """
@@ -66,13 +110,23 @@ class ConversationMemory:
             "command": command,
             "metadata": metadata or {}
         }
-        self.conversation_history.append(message)
-        self.save_session()
+        with self._lock:
+            self._history.append(message)
+            self._save_or_buffer()
 
     def add_context(self, key: str, value: Any):
         """Add context variable (file paths, previous results, etc.)"""
-        self.context_variables[key] = value
-        self.save_session()
+        with self._lock:
+            self._context[key] = value
+            self._save_or_buffer()
+
+    def _save_or_buffer(self):
+        """Save now if the session is loaded, otherwise buffer until it is"""
+        if self._loaded:
+            self.save_session()
+        elif not self._pending:
+            self._pending = True
+            atexit.register(self.flush)
 
     def get_context(self, key: str) -> Optional[Any]:
         """Get context variable"""
@@ -107,14 +161,20 @@ class ConversationMemory:
 
     def save_session(self):
         """Save current session to file"""
-        data = {
-            "session_start": datetime.now().isoformat(),
-            "history": self.conversation_history,
-            "context": self.context_variables
-        }
-        
-        with open(self.current_session_file, "w") as f:
-            json.dump(data, f, indent=2)
+        with self._lock:
+            data = {
+                "session_start": datetime.now().isoformat(),
+                "history": self.conversation_history,
+                "context": self.context_variables
+            }
+            
+            self.history_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.current_session_file, "w") as f:
+                json.dump(data, f, indent=2)
+            if self._pending:
+                # Nothing left to flush; don't keep this memory alive until exit
+                self._pending = False
+                atexit.unregister(self.flush)
 
     def save_to_all_history(self):
         """Archive current session to all history"""
@@ -133,6 +193,7 @@ class ConversationMemory:
             }
             all_history.append(session_data)
             
+            self.history_dir.mkdir(parents=True, exist_ok=True)
             with open(self.all_history_file, "w") as f:
                 json.dump(all_history, f, indent=2)
         except Exception as e:
@@ -0,0 +1,509 @@
+"""Resident Blink daemon on a local socket, and the thin client that talks to it
+
+The daemon keeps agents (API client, connection pool, response cache,
+conversation memory, workspace index) warm between invocations. Clients
+send one JSON request per line and receive JSON lines back:
+
+    -> {"id": 1, "method": "generate", "params": {"instruction": "...", "files": ["a.ts"], "stream": true}}
+    <- {"id": 1, "chunk": "export class "}
+    <- {"id": 1, "chunk": "PhSensor {"}
+    <- {"id": 1, "result": "...", "elapsed": 4.2}
+
+or {"id": 1, "error": "..."} on failure. A connection may send any number
+of requests; each is answered before the next is read.
+
+The Unix socket is owner-only. Where the daemon falls back to localhost
+TCP, which any local user can reach, every request must carry the daemon
+token as "token"; a request without it gets an error and the connection
+is closed. File paths in requests must stay inside the workspace.
+
+This module only imports the agent inside the daemon, so the client stays
+cheap to start.
+"""
+
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+METHODS = ("ping", "generate", "chat", "analyze", "edit", "plan", "mcp", "metrics", "shutdown")
+
+
+class _ClientGone(Exception):
+    """The client disconnected while a response was streaming"""
+
+
+def _has_unix_sockets() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+class BlinkDaemon:
+    """Serves agent requests over a Unix socket (localhost TCP where unavailable)"""
+
+    def __init__(
+        self,
+        socket_path: Optional[Path] = None,
+        port: Optional[int] = None,
+        workspace_root: Optional[Path] = None,
+        token: Optional[str] = None,
+    ):
+        """
+        Args:
+            socket_path: Unix socket to listen on (default: DAEMON_SOCKET)
+            port: TCP port used instead when Unix sockets are unavailable (default: DAEMON_PORT)
+            workspace_root: Workspace used when a request does not name one
+            token: Token clients must send (default: DAEMON_TOKEN; generated
+                on the TCP fallback when empty)
+        """
+        from src.config import DAEMON_PORT, DAEMON_SOCKET, DAEMON_TOKEN, WORKSPACE_ROOT
+
+        self.socket_path = Path(socket_path or DAEMON_SOCKET)
+        self.port = port if port is not None else DAEMON_PORT
+        self.token = DAEMON_TOKEN if token is None else token
+        self.token_path = _token_path(self.socket_path)
+        self.workspace_root = Path(workspace_root or WORKSPACE_ROOT).resolve()
+        self.started_at = time.time()
+        self.requests = 0
+        self._agents: dict[Path, Any] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def agent(self, workspace_root: Optional[str] = None):
+        """Warm agent for a workspace, created on first request"""
+        root = Path(workspace_root).resolve() if workspace_root else self.workspace_root
+        with self._lock:
+            if root not in self._agents:
+                from src.enhanced_agent import EnhancedCodeAgent
+                self._agents[root] = EnhancedCodeAgent(root)
+            return self._agents[root]
+
+    def warm(self):
+        """Pay the cold-start costs up front: token, connection, model version, history, index"""
+        agent = self.agent()
+        agent.api_client
+        agent.memory.conversation_history
+        agent.context_retriever.warm()
+
+    def serve_forever(self, warm: bool = True):
+        """Bind the socket and serve until shutdown()"""
+        unix = _has_unix_sockets()
+        wrote_token = False
+        if unix:
+            self._claim_socket_path()
+            # Owner-only from bind onwards; a chmod afterwards leaves a window open
+            umask = os.umask(0o077)
+            try:
+                server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), _make_handler(self))
+            finally:
+                os.umask(umask)
+            address = str(self.socket_path)
+        else:
+            if not self.token:
+                self.token = secrets.token_urlsafe(32)
+                self._write_token()
+                wrote_token = True
+            server = socketserver.ThreadingTCPServer(("127.0.0.1", self.port), _make_handler(self))
+            address = f"127.0.0.1:{self.port}"
+        server.daemon_threads = True
+        self._server = server
+
+        if warm:
+            self.warm()
+        print(f"[BLINK] Daemon listening on {address} (pid {os.getpid()})", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            for path, owned in ((self.socket_path, unix), (self.token_path, wrote_token)):
+                if owned:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+    def shutdown(self):
+        """Stop serve_forever() from another thread"""
+        if self._server:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def authorized(self, token: Any) -> bool:
+        """Whether a request's token matches the daemon's (always true without one)"""
+        if not self.token:
+            return True
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def _write_token(self):
+        """Save the generated token where same-user clients find it, readable by the owner only"""
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        # A leftover file keeps its old mode, so always create a fresh one
+        try:
+            self.token_path.unlink()
+        except FileNotFoundError:
+            pass
+        fd = os.open(self.token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token)
+
+    def _claim_socket_path(self):
+        """Remove a stale socket file, refusing to start if a daemon still answers on it"""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.socket_path.exists():
+            return
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(str(self.socket_path))
+        except OSError:
+            self.socket_path.unlink()
+            return
+        raise RuntimeError(f"A Blink daemon is already running on {self.socket_path}")
+
+    def dispatch(self, method: str, params: dict, send_chunk: Callable[[str], None]) -> Any:
+        """
+        Run one request
+
+        Args:
+            method: One of METHODS
+            params: Method parameters
+            send_chunk: Called with partial output for streaming requests
+
+        Returns:
+            The method result (JSON-serializable)
+
+        Raises:
+            ValueError: For unknown methods or missing parameters
+        """
+        with self._lock:
+            self.requests += 1
+
+        if method == "ping":
+            return {
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started_at, 1),
+                "requests": self.requests,
+                "workspaces": [str(root) for root in self._agents],
+            }
+        if method == "metrics":
+            from src.metrics import get_metrics_registry
+            return get_metrics_registry().to_dict()
+        if method == "shutdown":
+            self.shutdown()
+            return "shutting down"
+
+        agent = self.agent(params.get("workspace"))
+
+        from src.file_handler import confine_path
+        if params.get("output"):
+            confine_path(agent.workspace_root, params["output"])
+
+        if method in ("generate", "chat"):
+            instruction = _require(params, "instruction")
+            files = [confine_path(agent.workspace_root, path) for path in params.get("files") or []]
+            if params.get("stream"):
+                parts = []
+                for chunk in agent.generate_code_with_full_context_stream(instruction, files):
+                    parts.append(chunk)
+                    send_chunk(chunk)
+                result = "".join(parts)
+            else:
+                result = agent.generate_code_with_full_context(instruction, files)
+            agent.memory.add_message("user", f"{method}:: {instruction[:100]}", method)
+            agent.memory.add_message("assistant", f"Generated {len(result)} characters", method)
+            return self._save(agent, params, result)
+
+        if method in ("analyze", "edit"):
+            instruction = _require(params, "instruction")
+            path = params.get("file")
+            if path is not None:
+                confine_path(agent.workspace_root, path)
+            code = params.get("code")
+            if code is None:
+                code = agent.read_file(_require(params, "file"))
+                if code is None:
+                    raise ValueError(f"File not found: {path}")
+            if method == "analyze":
+                result = agent.analyze_code(code, instruction)
+            else:
+                result = agent.edit_code(code, instruction, path)
+                if params.get("write") and path:
+                    agent.modify_file(path, result)
+            return self._save(agent, params, result)
+
+        if method == "plan":
+            return agent.plan_tasks(_require(params, "objective"))
+
+        if method == "mcp":
+            from src.mcp_server import PATH_ARGS
+            args = params.get("args") or {}
+            if not isinstance(args, dict):
+                raise ValueError("args must be an object")
+            for name in PATH_ARGS:
+                if name in args:
+                    confine_path(agent.workspace_root, args[name])
+            return json.loads(agent.call_mcp_tool(_require(params, "tool"), args))
+
+        raise ValueError(f"Unknown method {method!r}; expected one of {', '.join(METHODS)}")
+
+    @staticmethod
+    def _save(agent, params: dict, result: str) -> Any:
+        """Save the result to params["output"] if given"""
+        if not params.get("output"):
+            return result
+        from src.robust_file_handler import RobustFileHandler
+        saved = RobustFileHandler(agent.workspace_root).save_file(params["output"], result)
+        if not saved.get("success"):
+            raise IOError(f"Could not save {params['output']}: {saved.get('error')}")
+        return {"output_path": saved["path"], "chars": len(result), "content": result}
+
+
+def _token_path(socket_path: Path) -> Path:
+    """Where a daemon using TCP keeps its generated token"""
+    return socket_path.with_name(socket_path.name + ".token")
+
+
+def _require(params: dict, name: str) -> Any:
+    if params.get(name) in (None, ""):
+        raise ValueError(f"Missing parameter {name!r}")
+    return params[name]
+
+
+def _make_handler(daemon: BlinkDaemon):
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                except (json.JSONDecodeError, AttributeError) as e:
+                    if not self._send({"id": None, "error": f"Invalid request: {e}"}):
+                        return
+                    continue
+
+                if not daemon.authorized(request.get("token")):
+                    self._send({"id": request_id, "error": "Unauthorized: missing or wrong daemon token"})
+                    return
+
+                start = time.time()
+
+                def send_chunk(chunk: str):
+                    if not self._send({"id": request_id, "chunk": chunk}):
+                        # Client went away: stop generating for it
+                        raise _ClientGone()
+
+                try:
+                    result = daemon.dispatch(request.get("method", ""), request.get("params") or {}, send_chunk)
+                    reply = {"id": request_id, "result": result, "elapsed": round(time.time() - start, 3)}
+                except _ClientGone:
+                    return
+                except Exception as e:
+                    reply = {"id": request_id, "error": str(e), "elapsed": round(time.time() - start, 3)}
+                if not self._send(reply):
+                    return
+
+        def _send(self, message: dict) -> bool:
+            try:
+                self.wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                return True
+            except OSError:
+                return False
+
+    return _Handler
+
+
+class DaemonClient:
+    """Thin client for a running BlinkDaemon"""
+
+    def __init__(
+        self,
+        socket_path: Optional[Path] = None,
+        port: Optional[int] = None,
+        timeout: Optional[float] = None,
+        token: Optional[str] = None,
+    ):
+        """
+        Args:
+            socket_path: Daemon's Unix socket (default: DAEMON_SOCKET)
+            port: Daemon's TCP port where Unix sockets are unavailable (default: DAEMON_PORT)
+            timeout: Socket timeout in seconds
+            token: Daemon token (default: DAEMON_TOKEN, else the one a TCP daemon saved)
+        """
+        from src.config import DAEMON_PORT, DAEMON_SOCKET, DAEMON_TOKEN
+
+        self.socket_path = Path(socket_path or DAEMON_SOCKET)
+        self.port = port if port is not None else DAEMON_PORT
+        self.timeout = timeout
+        self.token = token if token is not None else DAEMON_TOKEN
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._next_id = 0
+
+    def connect(self) -> "DaemonClient":
+        """
+        Open the connection
+
+        Raises:
+            ConnectionError: If no daemon is listening
+        """
+        try:
+            if _has_unix_sockets():
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.socket_path))
+            else:
+                sock = socket.create_connection(("127.0.0.1", self.port), timeout=self.timeout)
+        except OSError as e:
+            raise ConnectionError(f"Blink daemon is not running (start it with: python main.py daemon): {e}")
+        if not self.token:
+            try:
+                self.token = _token_path(self.socket_path).read_text().strip()
+            except OSError:
+                pass
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        return self
+
+    def close(self):
+        if self._sock:
+            self._reader.close()
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> "DaemonClient":
+        return self.connect()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def request(self, method: str, params: Optional[dict] = None, on_chunk: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        Send a request and wait for its result
+
+        Args:
+            method: Daemon method (see METHODS)
+            params: Method parameters
+            on_chunk: Called with each streamed chunk
+
+        Returns:
+            The result
+
+        Raises:
+            RuntimeError: If the daemon reports an error
+            ConnectionError: If the connection drops
+        """
+        if self._sock is None:
+            self.connect()
+        self._next_id += 1
+        request_id = self._next_id
+        message = {"id": request_id, "method": method, "params": params or {}}
+        if self.token:
+            message["token"] = self.token
+        self._sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+        for line in self._reader:
+            reply = json.loads(line)
+            if reply.get("id") != request_id:
+                continue
+            if "chunk" in reply:
+                if on_chunk:
+                    on_chunk(reply["chunk"])
+                continue
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            return reply.get("result")
+        raise ConnectionError("Blink daemon closed the connection")
+
+
+def serve_main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py daemon`"""
+    parser = argparse.ArgumentParser(prog="main.py daemon", description="Run the resident Blink daemon")
+    parser.add_argument("--socket", type=Path, help="Unix socket path (default: BLINK_DAEMON_SOCKET)")
+    parser.add_argument("--port", type=int, help="TCP port where Unix sockets are unavailable")
+    parser.add_argument("--workspace", type=Path, help="Default workspace")
+    parser.add_argument("--no-warm", action="store_true", help="Skip warming the agent at startup")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    parser.add_argument("--status", action="store_true", help="Show whether the daemon is running")
+    args = parser.parse_args(argv)
+
+    if args.stop or args.status:
+        try:
+            with DaemonClient(args.socket, args.port, timeout=5) as client:
+                info = client.request("ping")
+                if args.stop:
+                    client.request("shutdown")
+                    print(f"[OK] Stopped daemon (pid {info['pid']})")
+                else:
+                    print(json.dumps(info, indent=2))
+            return 0
+        except ConnectionError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+
+    daemon = BlinkDaemon(args.socket, args.port, args.workspace)
+    try:
+        daemon.serve_forever(warm=not args.no_warm)
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def client_main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py client <method> ...`"""
+    parser = argparse.ArgumentParser(prog="main.py client", description="Send a request to the Blink daemon")
+    parser.add_argument("method", choices=METHODS)
+    parser.add_argument("text", nargs="?", default="", help="Instruction, objective or MCP tool name")
+    parser.add_argument("-f", "--files", nargs="*", default=[], help="Reference files (generate/chat) or the file to analyze/edit")
+    parser.add_argument("-o", "--output", help="Save the result to this workspace path")
+    parser.add_argument("--write", action="store_true", help="edit: write the result back to the file")
+    parser.add_argument("--args", default="{}", help="mcp: tool arguments as JSON")
+    parser.add_argument("--workspace", help="Workspace the daemon should use")
+    parser.add_argument("--socket", type=Path, help="Unix socket path (default: BLINK_DAEMON_SOCKET)")
+    parser.add_argument("--port", type=int, help="TCP port where Unix sockets are unavailable")
+    args = parser.parse_args(argv)
+
+    params: dict = {"workspace": args.workspace} if args.workspace else {}
+    if args.method in ("generate", "chat"):
+        params.update({"instruction": args.text, "files": args.files, "stream": not args.output, "output": args.output})
+    elif args.method in ("analyze", "edit"):
+        params.update({"instruction": args.text, "file": args.files[0] if args.files else None, "output": args.output, "write": args.write})
+    elif args.method == "plan":
+        params["objective"] = args.text
+    elif args.method == "mcp":
+        params.update({"tool": args.text, "args": json.loads(args.args)})
+
+    streamed = []
+
+    def on_chunk(chunk: str):
+        streamed.append(chunk)
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+
+    try:
+        with DaemonClient(args.socket, args.port) as client:
+            result = client.request(args.method, params, on_chunk)
+    except (ConnectionError, RuntimeError) as e:
+        print(f"\n[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if streamed:
+        print()
+    elif isinstance(result, str):
+        print(result)
+    elif isinstance(result, dict) and "output_path" in result:
+        print(f"[OK] Saved {result['chars']} characters to {result['output_path']}")
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
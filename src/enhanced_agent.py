@@ -1,11 +1,26 @@
 """Enhanced AI Agent with MCP Server integration"""
 
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+from src.batch import BatchJob
+from src.batch_refactor import StagedRefactor, resolve_targets
+from src.patching import PatchError, apply_response
+from src.config import BATCH_CONCURRENCY
+from src.context_retrieval import ContextRetriever, format_context
 from src.file_handler import FileHandler
-from src.replicate_api import ReplicateClient
+from src.response_cache import ResponseCache
+from src.token_estimator import estimate_tokens, trim_to_tokens
 from src.conversation_memory import ConversationMemory
 from src.mcp_server import BlinkMCPServer
+from src.plan_executor import PlanExecutor, normalize_step
+from src.tool_loop import MCPToolLoop
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime: requests and asyncio dominate startup time
+    from src.async_replicate_api import AsyncReplicateClient
+    from src.replicate_api import ReplicateClient
 
 
 class EnhancedCodeAgent:
@@ -23,12 +38,81 @@ class EnhancedCodeAgent:
             workspace_root = WORKSPACE_ROOT
         
         self.file_handler = FileHandler(workspace_root)
-        self.api_client = ReplicateClient()
         self.workspace_root = workspace_root
-        self.memory = ConversationMemory(workspace_root)
         
-        # Initialize MCP Server for Claude to use
-        self.mcp_server = BlinkMCPServer(workspace_root)
+        # Built on first use so file commands never wait on the network,
+        # the token prompt or history loading
+        self._api_client: Optional["ReplicateClient"] = None
+        self._async_client: Optional["AsyncReplicateClient"] = None
+        self._memory: Optional[ConversationMemory] = None
+        self._mcp_server: Optional[BlinkMCPServer] = None
+        self._context_retriever: Optional[ContextRetriever] = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def api_client(self) -> "ReplicateClient":
+        """Replicate client, created on first use (may prompt for the API token)"""
+        if self._api_client is None:
+            with self._init_lock:
+                if self._api_client is None:
+                    from src.config import REPLICATE_API_BASE
+                    from src.http_transport import preconnect
+                    from src.replicate_api import ReplicateClient
+                    
+                    # Warm the shared connection pool while the token prompt runs
+                    preconnect(REPLICATE_API_BASE)
+                    client = ReplicateClient(
+                        transport=self.transport,
+                        cache=self._build_response_cache(self.workspace_root)
+                    )
+                    # Resolve the model version off the request path
+                    client.warm_model_version()
+                    self._api_client = client
+        return self._api_client
+
+    @api_client.setter
+    def api_client(self, client: "ReplicateClient"):
+        self._api_client = client
+        self._async_client = None
+
+    @property
+    def transport(self):
+        """Shared HTTP connection pool used by the API client"""
+        from src.http_transport import get_transport
+        return get_transport()
+
+    @property
+    def memory(self) -> ConversationMemory:
+        """Conversation memory, created on first use"""
+        if self._memory is None:
+            with self._init_lock:
+                if self._memory is None:
+                    self._memory = ConversationMemory(self.workspace_root)
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory: ConversationMemory):
+        self._memory = memory
+
+    @property
+    def mcp_server(self) -> BlinkMCPServer:
+        """MCP server for the model's tool calls, sharing this agent's FileHandler"""
+        if self._mcp_server is None:
+            with self._init_lock:
+                if self._mcp_server is None:
+                    self._mcp_server = BlinkMCPServer(self.workspace_root, file_handler=self.file_handler)
+        return self._mcp_server
+
+    def _build_response_cache(self, workspace_root: Path) -> Optional[ResponseCache]:
+        """Create the response cache if enabled in config"""
+        from src.config import RESPONSE_CACHE, RESPONSE_CACHE_MAX_MB, RESPONSE_CACHE_TTL
+        if not RESPONSE_CACHE:
+            return None
+        return ResponseCache(
+            Path(workspace_root) / ".agent_history" / "response_cache",
+            max_bytes=RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+            ttl=RESPONSE_CACHE_TTL
+        )
 
     def read_file(self, file_path: str) -> Optional[str]:
         """Read a file from the workspace"""
@@ -62,34 +146,68 @@ class EnhancedCodeAgent:
         Returns:
             Generated code
         """
+        return self.api_client.generate_code(self._build_full_context_prompt(instruction, file_paths))
+
+    def generate_code_with_full_context_stream(self, instruction: str, file_paths: list[str] = None) -> Iterator[str]:
+        """Streaming variant of generate_code_with_full_context"""
+        return self.api_client.generate_code_stream(self._build_full_context_prompt(instruction, file_paths))
+
+    def _build_full_context_prompt(self, instruction: str, file_paths: list[str] = None) -> str:
+        """Pre-read the referenced files and build the full-context prompt"""
         import re
         
         # If no paths provided, try to extract from instruction
         if not file_paths:
             file_paths = re.findall(r'"([^"]+)"', instruction)
         
+        # Read every referenced file first so the token budget can be shared out
+        files = []
+        for path in file_paths or []:
+            try:
+                content = self.read_file(path)
+                if content:
+                    files.append((path, content, None))
+            except Exception as e:
+                files.append((path, None, e))
+        contents = {path: content for path, content, error in files if content}
+        
         # Build comprehensive context
         context_section = ""
         if file_paths:
             context_section = "\n\nREFERENCE CODE FILES:\n"
             context_section += "=" * 80 + "\n"
             
-            for path in file_paths:
-                try:
-                    content = self.read_file(path)
-                    if content:
-                        # Get file language
-                        from pathlib import Path as PathLib
-                        ext = PathLib(path).suffix
-                        lang = self._get_language(ext)
-                        
-                        context_section += f"\nFILE: {path}\n"
-                        context_section += f"LANGUAGE: {lang}\n"
-                        context_section += "-" * 80 + "\n"
-                        context_section += content
-                        context_section += "\n" + "-" * 80 + "\n"
-                except Exception as e:
-                    context_section += f"\n[ERROR reading {path}: {e}]\n"
+            for path, content, error in files:
+                if error is not None:
+                    context_section += f"\n[ERROR reading {path}: {error}]\n"
+            
+            from src.config import CONTEXT_RETRIEVAL, CONTEXT_RETRIEVAL_TOKENS, CONTEXT_INCLUDE_WORKSPACE
+            if CONTEXT_RETRIEVAL:
+                # Whole files when they fit, otherwise the most relevant chunks
+                chunks = self.context_retriever.select(
+                    instruction,
+                    contents,
+                    self._context_budget(instruction, CONTEXT_RETRIEVAL_TOKENS),
+                    include_workspace=CONTEXT_INCLUDE_WORKSPACE
+                )
+                for chunk in chunks:
+                    lang = self._get_language(Path(chunk["path"]).suffix)
+                    whole = chunk["path"] in contents and chunk["text"] == contents[chunk["path"]]
+                    lines = "" if whole else f" (lines {chunk['start']}-{chunk['end']})"
+                    context_section += f"\nFILE: {chunk['path']}{lines}\n"
+                    context_section += f"LANGUAGE: {lang}\n"
+                    context_section += "-" * 80 + "\n"
+                    context_section += chunk["text"].rstrip("\n")
+                    context_section += "\n" + "-" * 80 + "\n"
+            else:
+                budgets = self._allocate_context_budget(instruction, contents)
+                for path, content in contents.items():
+                    lang = self._get_language(Path(path).suffix)
+                    context_section += f"\nFILE: {path}\n"
+                    context_section += f"LANGUAGE: {lang}\n"
+                    context_section += "-" * 80 + "\n"
+                    context_section += trim_to_tokens(content, budgets[path])
+                    context_section += "\n" + "-" * 80 + "\n"
         
         # Build the complete prompt
         full_prompt = f"""TASK: {instruction}
@@ -107,8 +225,56 @@ REQUIREMENTS:
 
 Generate the code now:"""
         
-        return self.api_client.generate_code(full_prompt)
+        return full_prompt
     
+    def _allocate_context_budget(self, instruction: str, contents: dict[str, str]) -> dict[str, int]:
+        """
+        Split the prompt's token budget fairly between reference files
+        
+        Small files keep their full size; whatever they leave unused is
+        shared among the larger ones, which get trimmed to fit.
+        
+        Returns:
+            Token allowance per path
+        """
+        budget = self._context_budget(instruction)
+        
+        sizes = {path: estimate_tokens(content) for path, content in contents.items()}
+        allowances = {}
+        remaining = budget
+        for count, path in enumerate(sorted(sizes, key=sizes.get)):
+            share = remaining // (len(sizes) - count)
+            allowances[path] = min(sizes[path], share)
+            remaining -= allowances[path]
+        return allowances
+
+    def _context_budget(self, instruction: str, limit: Optional[int] = None) -> int:
+        """
+        Tokens available for reference context in a prompt for `instruction`
+        
+        Args:
+            instruction: The instruction the context accompanies
+            limit: Cap applied when CONTEXT_TOKEN_BUDGET is not set
+        """
+        from src.config import CONTEXT_TOKEN_BUDGET
+        
+        budget = CONTEXT_TOKEN_BUDGET
+        if budget <= 0:
+            report = self.api_client.prompt_budget(instruction)
+            # Leave room for the prompt scaffolding and a full-length answer
+            budget = report["context_window"] - report["max_output"] - report["prompt_tokens"] - 2000
+            if limit:
+                budget = min(budget, limit)
+        return max(budget, 0)
+
+    @property
+    def context_retriever(self) -> ContextRetriever:
+        """Chunk index used to pick relevant context (created on first use)"""
+        if self._context_retriever is None:
+            from src.config import CONTEXT_CHUNK_LINES
+            self._context_retriever = ContextRetriever(self.workspace_root, CONTEXT_CHUNK_LINES)
+        return self._context_retriever
+
     def _get_language(self, extension: str) -> str:
         """Detect language from extension"""
         lang_map = {
@@ -130,6 +296,22 @@ Generate the code now:"""
         Generate code using MCP server for intelligent file access
         Claude can autonomously call MCP tools to understand context
         """
+        return self.run_mcp_tool_loop(specification)["output"]
+
+    def run_mcp_tool_loop(self, specification: str, **budgets) -> dict:
+        """
+        Run the multi-turn MCP tool loop for a specification
+        
+        Tool calls the model makes are executed (concurrently within a turn)
+        and their results fed back until it answers without calling tools.
+        
+        Args:
+            specification: What to generate
+            **budgets: Overrides for MCPToolLoop (max_turns, max_tokens, max_seconds, ...)
+            
+        Returns:
+            Loop result with the final output, turns, tool calls, tokens and elapsed time
+        """
         # Get available MCP tools
         tools = self.mcp_server.get_tools_definition()
         
@@ -151,33 +333,94 @@ When the user asks you to create code based on files:
 ALWAYS preserve the original programming language. If you're adapting TypeScript code, output TypeScript, not Python.
 """
         
+        # Start the model off with the workspace code most relevant to the task
+        from src.config import MCP_SEED_CONTEXT_TOKENS
+        seed_context = ""
+        if MCP_SEED_CONTEXT_TOKENS > 0:
+            chunks = self.context_retriever.select(
+                specification, {}, MCP_SEED_CONTEXT_TOKENS, include_workspace=True
+            )
+            if chunks:
+                seed_context = (
+                    "\n\nPossibly relevant workspace code (excerpts; use read_file for more):\n"
+                    + format_context(chunks, self._get_language)
+                    + "\n"
+                )
+        
         # Create a special format that Claude can understand for MCP tool calls
         mcp_instruction = f"""{specification}
+{seed_context}
 
 Available MCP tools you can use:
 {json.dumps(tools, indent=2)}
 
-When you need to examine files, respond with:
+When you need to examine files, respond with one block per call (several
+blocks in one response run in parallel):
 [MCP_TOOL_CALL: tool_name]
 {{"path": "...", ...}}
 [/MCP_TOOL_CALL]
 
-Then provide the answer based on tool results."""
+Results come back as [MCP_TOOL_RESULT: tool_name] blocks. Once you have what
+you need, reply with the final code and no tool calls."""
         
-        return self.api_client.generate_code(system_prompt + "\n\n" + mcp_instruction)
+        loop = MCPToolLoop(self.api_client, self.mcp_server, **budgets)
+        return loop.run(mcp_instruction, system_prompt=system_prompt)
 
     def generate_code(self, specification: str) -> str:
         """Generate code based on specification (fallback to regular mode)"""
         return self.api_client.generate_code(specification)
 
+    def generate_code_stream(self, specification: str) -> Iterator[str]:
+        """Stream generated code chunks as they arrive"""
+        return self.api_client.generate_code_stream(specification)
+
     def analyze_code(self, code: str, instruction: str) -> str:
         """Analyze and modify code"""
         return self.api_client.analyze_code(code, instruction)
 
+    def edit_code(self, code: str, instruction: str, path: Optional[str] = None) -> str:
+        """
+        Modify code by asking for search/replace edits instead of the whole file
+        
+        Falls back to a full rewrite (analyze_code) when the model's edits
+        don't apply, or always when EDIT_MODE is "rewrite".
+        
+        Args:
+            code: Current code
+            instruction: What to change
+            path: File name shown to the model, if any
+            
+        Returns:
+            The modified code
+        """
+        from src.config import EDIT_MODE
+        if EDIT_MODE == "patch":
+            try:
+                return apply_response(code, self.api_client.edit_code(code, instruction, path))
+            except PatchError:
+                pass
+        return self.analyze_code(code, instruction)
+
+    def analyze_code_stream(self, code: str, instruction: str) -> Iterator[str]:
+        """Stream analysis output chunks as they arrive"""
+        return self.api_client.analyze_code_stream(code, instruction)
+
+    def generate_code_many(self, specifications: list[str], concurrency: int = BATCH_CONCURRENCY) -> BatchJob:
+        """Generate code for many specifications concurrently"""
+        return self.api_client.generate_code_many(specifications, concurrency)
+
+    def analyze_code_many(self, requests: list[tuple[str, str]], concurrency: int = BATCH_CONCURRENCY) -> BatchJob:
+        """Analyze many (code, instruction) pairs concurrently"""
+        return self.api_client.analyze_code_many(requests, concurrency)
+
     def plan_tasks(self, objective: str) -> list[str]:
         """Create a plan for an objective"""
         return self.api_client.plan_tasks(objective)
 
+    def plan_tasks_stream(self, objective: str) -> Iterator[dict]:
+        """Create a dependency-annotated plan, yielding steps as the model writes them"""
+        return self.api_client.plan_tasks_stream(objective)
+
     def refactor_code(self, file_path: str, refactoring_rules: str) -> str:
         """
         Refactor code in a file based on rules
@@ -193,10 +436,44 @@ Then provide the answer based on tool results."""
         if not code:
             raise FileNotFoundError(f"File {file_path} not found")
         
-        refactored = self.analyze_code(code, refactoring_rules)
+        refactored = self.edit_code(code, refactoring_rules, file_path)
         self.modify_file(file_path, refactored)
         return refactored
 
+    def stage_refactor(
+        self,
+        targets: Union[str, list[str]],
+        refactoring_rules: str,
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> StagedRefactor:
+        """
+        Refactor many workspace files concurrently without writing anything yet
+        
+        Args:
+            targets: Glob (e.g. "src/**/*.py") or list of paths/globs in the workspace
+            refactoring_rules: Rules applied to every file
+            concurrency: Maximum files being refactored at once
+            
+        Returns:
+            StagedRefactor to review (summary(), diff()) and apply()
+        """
+        paths = resolve_targets(self.file_handler.workspace_root, targets)
+        return StagedRefactor(self.file_handler, self.edit_code, paths, refactoring_rules, concurrency)
+
+    def refactor_many(
+        self,
+        targets: Union[str, list[str]],
+        refactoring_rules: str,
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> dict:
+        """
+        Refactor many workspace files concurrently and apply the results together
+        
+        Returns:
+            Summary with per-file status, timings, failures and the combined diff
+        """
+        return self.stage_refactor(targets, refactoring_rules, concurrency).apply()
+
     def create_from_template(self, file_path: str, template_spec: str) -> str:
         """
         Create a file from a template specification
@@ -211,29 +488,93 @@ Then provide the answer based on tool results."""
         content = self.generate_code(template_spec)
         return self.create_file(file_path, content)
 
-    def execute_plan(self, objective: str) -> dict:
+    def execute_plan(self, objective: str, concurrency: int = BATCH_CONCURRENCY) -> dict:
         """
         Execute a full plan for an objective
         
+        The plan is requested with dependencies between steps and run as a
+        DAG: independent steps generate concurrently (starting while the plan
+        is still streaming), and dependent steps receive their predecessors'
+        outputs. A failed step only skips the steps that depend on it.
+        
         Args:
             objective: The objective to achieve
+            concurrency: Maximum steps generating at once
             
         Returns:
-            Dictionary with results
+            Dictionary with the plan, per-step results (status, output,
+            error, start offset and elapsed seconds) and total elapsed time
         """
-        plan = self.plan_tasks(objective)
-        results = []
+        executor = PlanExecutor(self._run_plan_step, concurrency)
+        steps = []
         
-        for step in plan:
-            result = self.generate_code(step)
-            results.append({"step": step, "result": result})
+        try:
+            for index, element in enumerate(self.plan_tasks_stream(objective)):
+                step = normalize_step(element, index)
+                steps.append(step)
+                executor.add(step)
+            results = executor.results()
+        except BaseException:
+            executor.cancel()
+            raise
         
         return {
             "objective": objective,
-            "plan": plan,
-            "results": results
+            "plan": [step["task"] for step in steps],
+            "steps": steps,
+            "results": results,
+            "succeeded": sum(1 for result in results if result["success"]),
+            "failed": sum(1 for result in results if not result["success"]),
+            "elapsed": round(time.time() - executor.started_at, 3)
         }
 
+    def _run_plan_step(self, step: dict, inputs: dict) -> str:
+        """Generate code for one plan step, given the outputs of the steps it depends on"""
+        if not inputs:
+            return self.generate_code(step["task"])
+        
+        outputs = {f"step {dep_id}": output or "" for dep_id, output in inputs.items()}
+        budgets = self._allocate_context_budget(step["task"], outputs)
+        context = "\n\n".join(
+            f"--- OUTPUT OF {name.upper()} ---\n{trim_to_tokens(output, budgets[name])}"
+            for name, output in outputs.items()
+        )
+        return self.generate_code(
+            f"{step['task']}\n\nThis step builds on the results of earlier steps:\n\n{context}"
+        )
+
+    # Async API - lets one event loop drive many predictions and tool calls
+    @property
+    def async_client(self) -> "AsyncReplicateClient":
+        """Async client sharing this agent's token, transport and wait strategy"""
+        if self._async_client is None:
+            from src.async_replicate_api import AsyncReplicateClient
+            self._async_client = AsyncReplicateClient(client=self.api_client)
+        return self._async_client
+
+    async def generate_code_async(self, specification: str) -> str:
+        """Generate code based on specification"""
+        return await self.async_client.generate_code(specification)
+
+    async def analyze_code_async(self, code: str, instruction: str) -> str:
+        """Analyze and modify code"""
+        return await self.async_client.analyze_code(code, instruction)
+
+    async def plan_tasks_async(self, objective: str) -> list[str]:
+        """Create a plan for an objective"""
+        return await self.async_client.plan_tasks(objective)
+
+    async def generate_code_with_full_context_async(self, instruction: str, file_paths: list[str] = None) -> str:
+        """Async variant of generate_code_with_full_context"""
+        import asyncio
+        prompt = await asyncio.to_thread(self._build_full_context_prompt, instruction, file_paths)
+        return await self.async_client.generate_code(prompt)
+
+    async def call_mcp_tool_async(self, tool_name: str, tool_args: dict) -> str:
+        """Call an MCP tool without blocking the event loop"""
+        import asyncio
+        return await asyncio.to_thread(self.mcp_server.handle_tool_call, tool_name, tool_args)
+
     # MCP Server integration
     def call_mcp_tool(self, tool_name: str, tool_args: dict) -> str:
         """Call an MCP tool directly"""
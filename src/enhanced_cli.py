@@ -1,5 +1,6 @@
 """Enhanced command-line interface for the AI Agent with Copilot-like behavior"""
 
+import difflib
 import sys
 from pathlib import Path
 from src.agent import CodeAgent
@@ -30,12 +31,12 @@ class EnhancedCLI:
 
 read::              <file>
 create::            <file>
-modify::            <file>
+modify::            <file> <instruction>
 list::              [directory]
 generate::          <specification>
 analyze::           <file> <task>
 plan::              <objective>
-refactor::          <file> <rules>
+refactor::          <file|glob> <rules>
 memory::            [summary|clear|export|history]
 compare::           <file1> <file2>
 extend::            <file> <with_file> <description>
@@ -220,13 +221,18 @@ extend:: temperature-sensor.ts pH-sensor.ts about pH water monitoring
                 print(f"❌ File not found: {file_path}\n")
                 return
             
-            result = self.agent.analyze_code(code, task)
+            # Only the changed regions are generated; the preview is a diff
+            result = self.agent.edit_code(code, task, file_path)
             
             # Record in memory
             self.agent.memory.add_message("user", f"Analyze {file_path}: {task}", "analyze")
             
+            if result == code:
+                print("No changes proposed.\n")
+                return
+            
             # Ask for confirmation
-            if self.confirm_action("Accept improvements?", result):
+            if self.confirm_action("Accept improvements?", _unified_diff(file_path, code, result)):
                 if input("\n💾 Overwrite original file? (y/n): ").strip().lower() in ["y", "yes"]:
                     self.agent.modify_file(file_path, result)
                     print(f"✅ File updated: {file_path}\n")
@@ -244,6 +250,75 @@ extend:: temperature-sensor.ts pH-sensor.ts about pH water monitoring
         except Exception as e:
             print(f"❌ Error: {e}\n")
 
+    def handle_modify_command(self, file_path: str, instruction: str):
+        """Handle modify command - patch a file in place after confirming the diff"""
+        print(f"\n✏️  Modifying: {file_path}")
+        print(f"Change: {instruction}\n")
+        print("⏳ Preparing edits...\n")
+        
+        try:
+            code = self.agent.read_file(file_path)
+            if code is None:
+                print(f"❌ File not found: {file_path}\n")
+                return
+            
+            result = self.agent.edit_code(code, instruction, file_path)
+            self.agent.memory.add_message("user", f"Modify {file_path}: {instruction}", "modify")
+            
+            if result == code:
+                print("No changes proposed.\n")
+                return
+            
+            if self.confirm_action(f"Apply changes to {file_path}?", _unified_diff(file_path, code, result)):
+                self.agent.modify_file(file_path, result)
+                print(f"✅ File updated: {file_path}\n")
+                self.agent.memory.add_context("last_modified_file", file_path)
+                self.agent.memory.add_message("assistant", f"File updated: {file_path}", "modify")
+            else:
+                print("Modification rejected.\n")
+                
+        except Exception as e:
+            print(f"❌ Error: {e}\n")
+
+    def handle_refactor_command(self, target: str, rules: str):
+        """Handle refactor command - one file or a glob, refactored concurrently then applied together"""
+        print(f"\n🛠️  Refactoring: {target}")
+        print(f"Rules: {rules}\n")
+        print("⏳ Refactoring files...\n")
+        
+        try:
+            staged = self.agent.stage_refactor(target, rules)
+            summary = staged.summary()
+            if not summary["files"]:
+                print(f"❌ No files match: {target}\n")
+                return
+            
+            self.agent.memory.add_message("user", f"Refactor {target}: {rules}", "refactor")
+            
+            print(f"📊 {summary['files']} file(s) in {summary['wall_time']}s "
+                  f"({summary['model_time']}s of model time)")
+            for item in summary["results"]:
+                detail = item["error"] or f"+{item['lines_added']} -{item['lines_removed']}"
+                print(f"  {item['status']:<10} {item['path']}  ({item['elapsed']}s, {detail})")
+            
+            changed = summary["counts"].get("changed", 0)
+            if not changed:
+                print("\nNothing to change.\n")
+                return
+            
+            if self.confirm_action(f"Apply changes to {changed} file(s)?", summary["diff"]):
+                result = staged.apply()
+                applied = result["counts"].get("applied", 0)
+                print(f"✅ Applied changes to {applied} file(s)\n")
+                for item in result["failed"]:
+                    print(f"  ⚠️  {item['path']}: {item['error']}")
+                self.agent.memory.add_message("assistant", f"Refactored {applied} file(s) matching {target}", "refactor")
+            else:
+                print("Refactor rejected.\n")
+                
+        except Exception as e:
+            print(f"❌ Error: {e}\n")
+
     def handle_plan_command(self, objective: str):
         """Handle plan command with confirmation"""
         print(f"\n📋 Planning: {objective}\n")
@@ -450,6 +525,13 @@ Keep the same structure and patterns as the original but adapt it for the new co
                         continue
                     self.handle_plan_command(args)
                 
+                elif command == "refactor":
+                    parts = args.split(maxsplit=1)
+                    if len(parts) < 2:
+                        print("❌ Usage: refactor:: <file|glob> <rules>\n")
+                        continue
+                    self.handle_refactor_command(parts[0], parts[1])
+                
                 elif command == "memory":
                     action = args if args else "summary"
                     self.handle_memory_command(action)
@@ -471,10 +553,9 @@ Keep the same structure and patterns as the original but adapt it for the new co
                 elif command == "modify":
                     parts = args.split(maxsplit=1)
                     if len(parts) < 2:
-                        print("❌ Usage: modify:: <file> <new_content>\n")
+                        print("❌ Usage: modify:: <file> <instruction>\n")
                         continue
-                    # This would need interactive input like create
-                    print("⚠️  Use 'generate::' and 'analyze::' instead for modifications.\n")
+                    self.handle_modify_command(parts[0], parts[1])
                 
                 else:
                     print(f"❌ Unknown command: {command}\n")
@@ -488,6 +569,16 @@ Keep the same structure and patterns as the original but adapt it for the new co
                 print(f"❌ Error: {e}\n")
 
 
+def _unified_diff(file_path: str, old: str, new: str) -> str:
+    """Diff shown when confirming a change to an existing file"""
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True),
+        new.splitlines(keepends=True),
+        fromfile=f"a/{file_path}",
+        tofile=f"b/{file_path}"
+    ))
+
+
 def main():
     """Entry point for enhanced CLI"""
     cli = EnhancedCLI()
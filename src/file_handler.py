@@ -2,7 +2,32 @@
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+
+def confine_path(workspace_root: Path, path: Any) -> str:
+    """
+    Check that a path from a remote request stays inside the workspace
+
+    Args:
+        workspace_root: Workspace the path must resolve into
+        path: Requested path
+
+    Returns:
+        The path, unchanged
+
+    Raises:
+        ValueError: If the path is not a string
+        PermissionError: For absolute paths or ".." escapes outside the workspace
+    """
+    if not isinstance(path, str):
+        raise ValueError(f"Invalid path: {path!r}")
+    root = Path(workspace_root).resolve()
+    # Same quote stripping as FileHandler; an absolute path replaces root
+    resolved = (root / path.strip('"\'')).resolve()
+    if resolved != root and root not in resolved.parents:
+        raise PermissionError(f"Path is outside the workspace: {path}")
+    return path
 
 
 class FileHandler:
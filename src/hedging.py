@@ -0,0 +1,80 @@
+"""Latency tracking used to decide when to hedge a slow prediction"""
+
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile
+
+    Args:
+        values: Samples (need not be sorted)
+        pct: Percentile in (0, 100]
+
+    Returns:
+        The sample at that rank
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyTracker:
+    """
+    Rolling record of how long predictions take to start and to finish
+
+    A prediction becomes a hedging candidate once it has been waiting longer
+    than the configured percentile of recent predictions - either still
+    queued past the usual start time, or still running past the usual
+    completion time.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 10):
+        """
+        Args:
+            window: Number of recent samples kept per distribution
+            min_samples: Samples required before hedging is allowed
+        """
+        self.min_samples = min_samples
+        self._start = deque(maxlen=window)
+        self._total = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_start(self, seconds: float):
+        """Record time from creation until the prediction left the queue"""
+        with self._lock:
+            self._start.append(seconds)
+
+    def record_total(self, seconds: float):
+        """Record time from creation until the prediction finished"""
+        with self._lock:
+            self._total.append(seconds)
+
+    def threshold(self, kind: str, pct: float) -> Optional[float]:
+        """
+        Latency at `pct` for "start" or "total", or None without enough samples
+        """
+        with self._lock:
+            samples = list(self._start if kind == "start" else self._total)
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, pct)
+
+    def should_hedge(self, status: str, elapsed: float, pct: float) -> bool:
+        """
+        Whether a prediction with `status` after `elapsed` seconds is an outlier
+
+        Args:
+            status: Current prediction status
+            elapsed: Seconds since it was created
+            pct: Percentile of recent latencies to compare against
+        """
+        if status == "starting":
+            start_limit = self.threshold("start", pct)
+            if start_limit is not None and elapsed > start_limit:
+                return True
+        total_limit = self.threshold("total", pct)
+        return total_limit is not None and elapsed > total_limit
@@ -0,0 +1,144 @@
+"""Pooled keep-alive HTTP transport shared by every Replicate caller"""
+
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import (
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_PER_HOST_LIMIT,
+    HTTP_PRECONNECT,
+)
+
+
+class HTTPTransport:
+    """Connection manager wrapping a pooled requests.Session"""
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT,
+    ):
+        """
+        Initialize the transport
+
+        Args:
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum keep-alive connections held per host
+            per_host_limit: Maximum concurrent requests in flight per host
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.per_host_limit = per_host_limit
+
+        self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+
+        # pool_block keeps the pool bounded instead of opening throwaway connections
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request over a pooled connection
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            The response
+        """
+        with self._host_slot(url):
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request"""
+        return self.request("POST", url, **kwargs)
+
+    def preconnect(self, url: str, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Open a connection to the host of `url` ahead of the first real request
+
+        The TCP+TLS handshake then overlaps with startup work (token prompt,
+        history loading) and the warm connection goes back into the pool.
+
+        Args:
+            url: Any URL on the target host
+            background: Run the handshake in a daemon thread
+
+        Returns:
+            The background thread, or None when run inline
+        """
+        parts = urlsplit(url)
+        root = f"{parts.scheme}://{parts.netloc}/"
+
+        def _connect():
+            try:
+                self.request("HEAD", root, timeout=5).close()
+            except requests.RequestException:
+                pass
+
+        if not background:
+            _connect()
+            return None
+
+        thread = threading.Thread(target=_connect, name="blink-preconnect", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        """Hold one of the per-host request slots for the duration of a call"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+        with slot:
+            yield
+
+
+# Global transport instance
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Get or create the shared transport instance"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HTTPTransport()
+    return _transport
+
+
+def preconnect(url: str) -> Optional[threading.Thread]:
+    """Pre-connect the shared transport to `url` unless disabled in config"""
+    if not HTTP_PRECONNECT:
+        return None
+    return get_transport().preconnect(url)
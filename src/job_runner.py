@@ -0,0 +1,291 @@
+"""Headless batch runner: execute generate/analyze/refactor/chat jobs from a JSONL file"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.batch import BatchJob
+
+
+JOB_TYPES = ("generate", "analyze", "refactor", "chat")
+
+
+def job_id(job: dict) -> str:
+    """The job's "id", or a stable hash of its spec when it has none"""
+    if job.get("id") is not None:
+        return str(job["id"])
+    spec = json.dumps(job, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12]
+
+
+def load_jobs(jobs_path: Path) -> list[dict]:
+    """
+    Read a jobs file, one JSON object per line
+
+    Blank lines and lines starting with # are ignored. A line that is not
+    a valid job becomes {"id": "line-N", "invalid": "<reason>"} so it is
+    reported instead of silently dropped.
+
+    Returns:
+        Jobs in file order, each with an "id"
+    """
+    jobs = []
+    seen = set()
+    with open(jobs_path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                jobs.append({"id": f"line-{number}", "invalid": f"Invalid JSON: {e}"})
+                continue
+            if not isinstance(job, dict):
+                jobs.append({"id": f"line-{number}", "invalid": "Job must be a JSON object"})
+                continue
+
+            job["id"] = job_id(job)
+            if job["id"] in seen:
+                job["invalid"] = f"Duplicate job id {job['id']} (line {number})"
+                job["id"] = f"line-{number}"
+            elif job.get("type", "generate") not in JOB_TYPES:
+                job["invalid"] = f"Unknown job type {job.get('type')!r}; expected one of {', '.join(JOB_TYPES)}"
+            elif not (job.get("instruction") or job.get("prompt")):
+                job["invalid"] = "Job needs an \"instruction\""
+            seen.add(job["id"])
+            jobs.append(job)
+    return jobs
+
+
+def completed_ids(results_path: Path) -> set[str]:
+    """Ids of jobs that already succeeded in a previous run's results file"""
+    done = set()
+    if not results_path.exists():
+        return done
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write leaves a partial last line
+                continue
+            if isinstance(result, dict) and result.get("status") == "succeeded":
+                done.add(str(result.get("id")))
+    return done
+
+
+class JobRunner:
+    """
+    Runs jobs concurrently and streams one result line per job
+
+    Job format (one JSON object per line of the jobs file):
+
+        {"id": "svc", "type": "generate", "instruction": "Create a pH sensor service",
+         "files": ["temp-sensor.ts"], "output": "ph-sensor.ts"}
+
+    - generate / chat: instruction plus the listed files as reference context
+    - analyze: instruction applied to the first listed file (or inline "code")
+    - refactor: instruction applied to every listed file or glob; files are
+      changed in place only with "apply": true, otherwise the diff is returned
+
+    "output" (optional) is a workspace path the job's text is saved to.
+    Results are appended to the results file as each job finishes:
+
+        {"id": "svc", "type": "generate", "status": "succeeded", "error": null,
+         "output_path": ".../ph-sensor.ts", "chars": 1832, "elapsed": 7.41,
+         "finished": "2025-01-01T12:00:00"}
+
+    Jobs that already succeeded in the results file are skipped, so an
+    interrupted run can be restarted with the same command.
+    """
+
+    def __init__(self, agent, workers: int = 4, save_file=None):
+        """
+        Args:
+            agent: EnhancedCodeAgent that runs the jobs
+            workers: Maximum jobs running at once
+            save_file: Called as save_file(path, content) -> {"success", "path", "error"};
+                defaults to a RobustFileHandler on the agent's workspace
+        """
+        self.agent = agent
+        self.workers = max(1, workers)
+        if save_file is None:
+            from src.robust_file_handler import RobustFileHandler
+            save_file = RobustFileHandler(agent.workspace_root).save_file
+        self.save_file = save_file
+        self._write_lock = threading.Lock()
+
+    def run(self, jobs: list[dict], results_path: Path, resume: bool = True, progress=None) -> dict:
+        """
+        Run jobs and append their results to `results_path`
+
+        Args:
+            jobs: Output of load_jobs
+            results_path: JSONL file results are appended to
+            resume: Skip jobs already recorded as succeeded in `results_path`
+            progress: Optional callable receiving each result dict as it is written
+
+        Returns:
+            {"total", "skipped", "succeeded", "failed", "elapsed"}
+        """
+        start = time.time()
+        done = completed_ids(results_path) if resume else set()
+        pending = [job for job in jobs if job["id"] not in done]
+        counts = {"succeeded": 0, "failed": 0}
+
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(results_path, "a", encoding="utf-8") as out:
+            if pending:
+                batch = BatchJob(self.run_job, pending, self.workers)
+                try:
+                    for outcome in batch.as_completed():
+                        job = pending[outcome["index"]]
+                        result = self._result_line(job, outcome)
+                        counts[result["status"]] += 1
+                        with self._write_lock:
+                            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                            out.flush()
+                        if progress:
+                            progress(result)
+                except KeyboardInterrupt:
+                    batch.cancel()
+                    raise
+
+        return {
+            "total": len(jobs),
+            "skipped": len(jobs) - len(pending),
+            "succeeded": counts["succeeded"],
+            "failed": counts["failed"],
+            "elapsed": round(time.time() - start, 3),
+        }
+
+    def run_job(self, job: dict) -> dict:
+        """
+        Run one job
+
+        Returns:
+            {"text": job output, "output_path": saved path or None, "details": extra fields}
+
+        Raises:
+            ValueError: For invalid jobs or missing input files
+        """
+        if job.get("invalid"):
+            raise ValueError(job["invalid"])
+
+        job_type = job.get("type", "generate")
+        instruction = job.get("instruction") or job.get("prompt")
+        files = job.get("files") or []
+        if isinstance(files, str):
+            files = [files]
+        details = {}
+
+        if job_type in ("generate", "chat"):
+            text = self.agent.generate_code_with_full_context(instruction, files)
+        elif job_type == "analyze":
+            code = job.get("code")
+            if code is None:
+                if not files:
+                    raise ValueError("analyze job needs \"files\" or \"code\"")
+                code = self.agent.read_file(files[0])
+                if code is None:
+                    raise ValueError(f"File not found: {files[0]}")
+            text = self.agent.analyze_code(code, instruction)
+        else:
+            if not files:
+                raise ValueError("refactor job needs \"files\"")
+            staged = self.agent.stage_refactor(files, instruction, concurrency=int(job.get("concurrency", 1)))
+            if job.get("apply"):
+                summary = staged.apply()
+            else:
+                summary = staged.summary()
+            if summary["failed"]:
+                failed = summary["failed"][0]
+                raise ValueError(f"{len(summary['failed'])} file(s) failed, first {failed['path']}: {failed['error']}")
+            details = {"counts": summary["counts"], "applied": summary["applied"]}
+            if job.get("output") and len(staged.entries) == 1 and not job.get("apply"):
+                # One file: save the refactored text rather than the diff
+                text = staged.entries[0]["refactored"]
+            else:
+                text = summary["diff"]
+
+        output_path = None
+        if job.get("output"):
+            saved = self.save_file(job["output"], text)
+            if not saved.get("success"):
+                raise IOError(f"Could not save {job['output']}: {saved.get('error')}")
+            output_path = saved.get("path")
+        return {"text": text, "output_path": output_path, "details": details}
+
+    @staticmethod
+    def _result_line(job: dict, outcome: dict) -> dict:
+        """Result record for one finished job"""
+        result = {
+            "id": job["id"],
+            "type": job.get("type", "generate"),
+            "status": "succeeded" if outcome["success"] else "failed",
+            "error": outcome["error"],
+            "output_path": None,
+            "chars": 0,
+            "elapsed": outcome["elapsed"],
+            "finished": datetime.now().isoformat(timespec="seconds"),
+        }
+        if outcome["success"]:
+            output = outcome["output"]
+            result["output_path"] = output["output_path"]
+            result["chars"] = len(output["text"] or "")
+            result.update(output["details"])
+            if not output["output_path"]:
+                # Nowhere else to find the text
+                result["output"] = output["text"]
+        return result
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py run jobs.jsonl`"""
+    from src.config import BATCH_CONCURRENCY
+
+    parser = argparse.ArgumentParser(prog="main.py run", description="Run Blink jobs from a JSONL file without prompts")
+    parser.add_argument("jobs", type=Path, help="Jobs file, one JSON object per line")
+    parser.add_argument("-o", "--output", type=Path, help="Results file (default: <jobs>.results.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_CONCURRENCY, help="Jobs running at once")
+    parser.add_argument("--workspace", type=Path, help="Workspace directory (default: the configured workspace)")
+    parser.add_argument("--no-resume", action="store_true", help="Rerun jobs that already succeeded")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    if not args.jobs.exists():
+        print(f"[ERROR] Jobs file not found: {args.jobs}", file=sys.stderr)
+        return 2
+
+    from src.config import REPLICATE_API_TOKEN
+    if not REPLICATE_API_TOKEN:
+        # The token prompt would block a headless run
+        print("[ERROR] REPLICATE_API_TOKEN must be set for headless runs", file=sys.stderr)
+        return 2
+
+    results_path = args.output or args.jobs.with_suffix(".results.jsonl")
+    jobs = load_jobs(args.jobs)
+
+    from src.enhanced_agent import EnhancedCodeAgent
+    runner = JobRunner(EnhancedCodeAgent(args.workspace), workers=args.workers)
+
+    def progress(result: dict):
+        if not args.quiet:
+            tag = "[OK]" if result["status"] == "succeeded" else "[FAILED]"
+            detail = result["output_path"] or result["error"] or f"{result['chars']} chars"
+            print(f"{tag} {result['id']} ({result['type']}, {result['elapsed']:.1f}s) {detail}", file=sys.stderr)
+
+    summary = runner.run(jobs, results_path, resume=not args.no_resume, progress=progress)
+    print(
+        f"[DONE] {summary['succeeded']} succeeded, {summary['failed']} failed, "
+        f"{summary['skipped']} skipped of {summary['total']} in {summary['elapsed']:.1f}s -> {results_path}",
+        file=sys.stderr
+    )
+    return 1 if summary["failed"] else 0
@@ -0,0 +1,112 @@
+"""Incremental parsing of a JSON array that arrives in chunks"""
+
+import json
+from typing import Any, Iterable, Iterator
+
+
+class JSONArrayStreamParser:
+    """
+    Yields the elements of a top-level JSON array as soon as each one is complete
+
+    Text before the opening bracket (prose, a ```json fence) and after the
+    closing bracket is ignored. Only string, bracket and brace boundaries are
+    tracked while scanning; each finished element is decoded with json.loads.
+
+        parser = JSONArrayStreamParser()
+        for chunk in chunks:
+            for element in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0              # next character to scan
+        self._element_start = None  # buffer offset where the current element began
+        self._depth = 0            # 0 before the array, 1 directly inside it
+        self._in_string = False
+        self._escaped = False
+        self.started = False
+        self.finished = False
+
+    def feed(self, chunk: str) -> list[Any]:
+        """
+        Add text and return the elements completed by it
+
+        Raises:
+            json.JSONDecodeError: If a completed element is not valid JSON
+        """
+        if self.finished:
+            return []
+        self._buffer += chunk
+        elements = []
+
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+            self._pos += 1
+
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+                    self._element_start = self._pos
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(elements)
+                    self.finished = True
+                    break
+            elif char == "," and self._depth == 1:
+                self._emit(elements)
+                self._element_start = self._pos
+
+        # Drop text that has been fully consumed
+        if self._element_start is not None and self._element_start > 0:
+            self._buffer = self._buffer[self._element_start:]
+            self._pos -= self._element_start
+            self._element_start = 0
+        elif not self.started:
+            self._buffer = ""
+            self._pos = 0
+        return elements
+
+    def _emit(self, elements: list):
+        """Decode the text between the element start and the current delimiter"""
+        text = self._buffer[self._element_start:self._pos - 1].strip()
+        if text:
+            elements.append(json.loads(text))
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Yield array elements from a stream of text chunks
+
+    Args:
+        chunks: Pieces of text containing a JSON array
+
+    Yields:
+        Each element, as soon as it is complete
+
+    Raises:
+        ValueError: If the stream ends before the array is closed
+    """
+    parser = JSONArrayStreamParser()
+    # Keep consuming after the array closes so a streaming source runs to completion
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    if not parser.finished:
+        raise ValueError("JSON array was not closed" if parser.started else "No JSON array found")
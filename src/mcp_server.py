@@ -10,16 +10,26 @@ from typing import Any, Optional
 from src.file_handler import FileHandler
 
 
+# Tool arguments that name files or directories
+PATH_ARGS = ("path", "directory")
+
+
 class BlinkMCPServer:
     """MCP Server that provides tools for Claude to interact with the file system"""
 
-    def __init__(self, workspace_root: Optional[Path] = None):
-        """Initialize MCP server"""
+    def __init__(self, workspace_root: Optional[Path] = None, file_handler: Optional[FileHandler] = None):
+        """
+        Initialize MCP server
+        
+        Args:
+            workspace_root: Root directory for the workspace
+            file_handler: FileHandler to share (e.g. the agent's); one is created if omitted
+        """
         if workspace_root is None:
             from src.config import WORKSPACE_ROOT
             workspace_root = WORKSPACE_ROOT
         
-        self.file_handler = FileHandler(workspace_root)
+        self.file_handler = file_handler or FileHandler(workspace_root)
         self.workspace_root = workspace_root
 
     def read_file(self, path: str) -> dict:
@@ -205,23 +215,26 @@ class BlinkMCPServer:
         return json.dumps(data, indent=2)
 
     # MCP Protocol Methods
+    def tool_handlers(self) -> dict:
+        """Tool name -> callable taking the tool's argument dict and returning a result dict"""
+        return {
+            "read_file": lambda args: self.read_file(args.get("path", "")),
+            "list_directory": lambda args: self.list_directory(args.get("path", ".")),
+            "search_files": lambda args: self.search_files_by_pattern(
+                args.get("pattern", ""),
+                args.get("directory", ".")
+            ),
+            "get_file_info": lambda args: self.get_file_info(args.get("path", "")),
+            "get_project_structure": lambda args: self.get_project_structure(args.get("max_depth", 3)),
+        }
+
     def handle_tool_call(self, tool_name: str, tool_args: dict) -> str:
         """Handle tool calls from Claude via MCP protocol"""
-        if tool_name == "read_file":
-            result = self.read_file(tool_args.get("path", ""))
-        elif tool_name == "list_directory":
-            result = self.list_directory(tool_args.get("path", "."))
-        elif tool_name == "search_files":
-            result = self.search_files_by_pattern(
-                tool_args.get("pattern", ""),
-                tool_args.get("directory", ".")
-            )
-        elif tool_name == "get_file_info":
-            result = self.get_file_info(tool_args.get("path", ""))
-        elif tool_name == "get_project_structure":
-            result = self.get_project_structure(tool_args.get("max_depth", 3))
-        else:
+        handler = self.tool_handlers().get(tool_name)
+        if handler is None:
             result = {"success": False, "error": f"Unknown tool: {tool_name}"}
+        else:
+            result = handler(tool_args or {})
         
         return self.format_for_claude(result)
 
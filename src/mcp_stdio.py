@@ -0,0 +1,272 @@
+"""MCP transport for BlinkMCPServer: JSON-RPC 2.0 over stdio or a local socket
+
+Messages are newline-delimited JSON-RPC objects. Supported methods:
+
+    initialize                  -> protocol version, capabilities, server info
+    notifications/initialized   (notification, no reply)
+    ping                        -> {}
+    tools/list                  -> {"tools": [{"name", "description", "inputSchema"}]}
+    tools/call                  -> {"content": [{"type": "text", "text": ...}], "isError": bool}
+    notifications/cancelled     cancels the in-flight request {"requestId": id}
+
+Every request runs as its own asyncio task and tool work runs on a thread
+pool, so a slow get_project_structure never holds up a quick read_file;
+replies are written as each request finishes, matched by id. A cancelled
+request gets no reply.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from src.mcp_server import BlinkMCPServer
+
+
+PROTOCOL_VERSION = "2024-11-05"
+SERVER_INFO = {"name": "blink", "version": "1.0.0"}
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class JSONRPCError(Exception):
+    """Error returned to the client as a JSON-RPC error object"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class MCPSession:
+    """
+    One client connection: reads requests, runs them concurrently, writes replies
+
+    Transport-neutral: give it a coroutine that returns the next line (b""
+    at end of input) and one that writes a line.
+    """
+
+    def __init__(
+        self,
+        server: BlinkMCPServer,
+        pool: ThreadPoolExecutor,
+        read_line: Callable[[], Awaitable[bytes]],
+        write_line: Callable[[bytes], Awaitable[None]],
+    ):
+        """
+        Args:
+            server: Tool implementation
+            pool: Threads that run the (blocking) tool calls
+            read_line: Returns the next raw message line, b"" at end of input
+            write_line: Writes one raw message line
+        """
+        self.server = server
+        self.pool = pool
+        self.read_line = read_line
+        self.write_line = write_line
+        self.initialized = False
+        self._handlers = server.tool_handlers()
+        self._tasks: dict[Any, asyncio.Task] = {}
+        self._write_lock = asyncio.Lock()
+
+    async def run(self):
+        """Serve until the input ends, then let in-flight requests finish"""
+        while True:
+            line = await self.read_line()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                await self._send_error(None, PARSE_ERROR, f"Parse error: {e}")
+                continue
+            # JSON-RPC batches are handled as independent messages
+            for item in message if isinstance(message, list) else [message]:
+                await self._dispatch(item)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _dispatch(self, message: Any):
+        """Start handling one message; requests run in the background"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            request_id = message.get("id") if isinstance(message, dict) else None
+            await self._send_error(request_id, INVALID_REQUEST, "Invalid JSON-RPC request")
+            return
+
+        method = message["method"]
+        params = message.get("params") or {}
+        if "id" not in message:
+            self._notification(method, params)
+            return
+
+        request_id = message["id"]
+        # JSON-RPC ids are strings, numbers or null; anything else can't key _tasks
+        if isinstance(request_id, bool) or not isinstance(request_id, (str, int, float, type(None))):
+            await self._send_error(None, INVALID_REQUEST, "Request id must be a string, number or null")
+            return
+        if request_id in self._tasks:
+            await self._send_error(request_id, INVALID_REQUEST, f"Request id {request_id!r} is already in use")
+            return
+        task = asyncio.ensure_future(self._request(request_id, method, params))
+        self._tasks[request_id] = task
+        # Also covers tasks cancelled before they started running
+        task.add_done_callback(lambda done: self._tasks.pop(request_id, None) if self._tasks.get(request_id) is done else None)
+
+    def _notification(self, method: str, params: dict):
+        if method == "notifications/initialized":
+            self.initialized = True
+        elif method == "notifications/cancelled":
+            task = self._tasks.get(params.get("requestId"))
+            if task:
+                task.cancel()
+        # Unknown notifications are ignored, as JSON-RPC requires
+
+    async def _request(self, request_id: Any, method: str, params: dict):
+        """Run one request and send its reply"""
+        try:
+            result = await self._call(method, params)
+        except asyncio.CancelledError:
+            # Cancelled by the client: no reply
+            return
+        except JSONRPCError as e:
+            await self._send_error(request_id, e.code, e.message)
+        except Exception as e:
+            await self._send_error(request_id, INTERNAL_ERROR, str(e))
+        else:
+            await self._send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    async def _call(self, method: str, params: dict) -> Any:
+        if not isinstance(params, dict):
+            raise JSONRPCError(INVALID_PARAMS, "params must be an object")
+
+        if method == "initialize":
+            return {
+                "protocolVersion": params.get("protocolVersion") or PROTOCOL_VERSION,
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": SERVER_INFO,
+            }
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": [
+                {"name": tool["name"], "description": tool["description"], "inputSchema": tool["input_schema"]}
+                for tool in self.server.get_tools_definition()
+            ]}
+        if method == "tools/call":
+            name = params.get("name")
+            handler = self._handlers.get(name)
+            if handler is None:
+                raise JSONRPCError(INVALID_PARAMS, f"Unknown tool: {name}")
+            arguments = params.get("arguments") or {}
+            if not isinstance(arguments, dict):
+                raise JSONRPCError(INVALID_PARAMS, "arguments must be an object")
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, handler, arguments)
+            return {
+                "content": [{"type": "text", "text": self.server.format_for_claude(result)}],
+                "isError": not result.get("success", True),
+            }
+        raise JSONRPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    async def _send_error(self, request_id: Any, code: int, message: str):
+        await self._send({"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}})
+
+    async def _send(self, message: dict):
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        async with self._write_lock:
+            await self.write_line(data)
+
+
+async def serve_stdio(server: BlinkMCPServer, workers: int):
+    """Serve one client on stdin/stdout"""
+    loop = asyncio.get_running_loop()
+    # A dedicated reader thread works with pipes and consoles on every platform
+    reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blink-mcp-stdin")
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+
+    async def read_line() -> bytes:
+        return await loop.run_in_executor(reader, stdin.readline)
+
+    async def write_line(data: bytes):
+        stdout.write(data)
+        stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blink-mcp-tool") as pool:
+        await MCPSession(server, pool, read_line, write_line).run()
+    reader.shutdown(wait=False)
+
+
+async def serve_socket(server: BlinkMCPServer, workers: int, socket_path: Optional[Path] = None, port: Optional[int] = None):
+    """Serve any number of clients on a Unix socket or a localhost TCP port"""
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blink-mcp-tool")
+
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def write_line(data: bytes):
+            writer.write(data)
+            await writer.drain()
+
+        try:
+            await MCPSession(server, pool, reader.readline, write_line).run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    if socket_path:
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            socket_path.unlink()
+        listener = await asyncio.start_unix_server(on_connect, path=str(socket_path), limit=16 * 1024 * 1024)
+        socket_path.chmod(0o600)
+        address = str(socket_path)
+    else:
+        listener = await asyncio.start_server(on_connect, "127.0.0.1", port, limit=16 * 1024 * 1024)
+        address = f"127.0.0.1:{listener.sockets[0].getsockname()[1]}"
+
+    print(f"[BLINK] MCP server listening on {address}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pool.shutdown(wait=False)
+        if socket_path and socket_path.exists():
+            socket_path.unlink()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py mcp`"""
+    from src.config import MCP_TOOL_CONCURRENCY
+
+    parser = argparse.ArgumentParser(prog="main.py mcp", description="Run the Blink MCP server (stdio by default)")
+    parser.add_argument("--workspace", type=Path, help="Workspace the tools operate on")
+    parser.add_argument("--workers", type=int, default=MCP_TOOL_CONCURRENCY, help="Tool calls running at once")
+    parser.add_argument("--socket", type=Path, help="Listen on this Unix socket instead of stdio")
+    parser.add_argument("--port", type=int, help="Listen on this localhost TCP port instead of stdio")
+    args = parser.parse_args(argv)
+
+    server = BlinkMCPServer(args.workspace)
+    workers = max(1, args.workers)
+    try:
+        if args.socket or args.port is not None:
+            asyncio.run(serve_socket(server, workers, args.socket, args.port))
+        else:
+            asyncio.run(serve_stdio(server, workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""In-process metrics registry for Replicate client latency and traffic"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+
+# Seconds; wide enough for both polling intervals and multi-minute runs
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters and histograms with JSON and Prometheus dumps"""
+
+    def __init__(self, recent_size: int = 100):
+        """
+        Args:
+            recent_size: Number of per-prediction records kept for inspection
+        """
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, Histogram] = {}
+        self._help: dict[str, str] = {}
+        self.recent = deque(maxlen=recent_size)
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, help_text: str = "", **labels):
+        """Increase a counter (optionally labelled)"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    def observe(self, name: str, value: float, help_text: str = "", buckets: tuple = DEFAULT_BUCKETS):
+        """Record a histogram observation"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    def record_prediction(self, stats: dict):
+        """Fold one finished prediction's stats into the registry"""
+        status = stats.get("status", "unknown")
+        self.inc("blink_predictions_total", help_text="Predictions finished, by status", status=status)
+        self.inc("blink_prediction_polls_total", stats.get("poll_count", 0), "Poll requests sent")
+        self.inc("blink_http_retries_total", stats.get("retries", 0), "Requests retried by the scheduler")
+        self.inc("blink_bytes_sent_total", stats.get("bytes_sent", 0), "Request body bytes sent")
+        self.inc("blink_bytes_received_total", stats.get("bytes_received", 0), "Response body bytes received")
+
+        for field, metric, help_text in (
+            ("create_seconds", "blink_prediction_create_seconds", "Time for the create call"),
+            ("queue_seconds", "blink_prediction_queue_seconds", "Queue wait, created to started"),
+            ("run_seconds", "blink_prediction_run_seconds", "Run time, started to completed"),
+            ("total_seconds", "blink_prediction_total_seconds", "Client wall time, create to finish"),
+            ("predict_time", "blink_prediction_predict_time_seconds", "Replicate-reported predict_time"),
+        ):
+            if stats.get(field) is not None:
+                self.observe(metric, stats[field], help_text)
+
+        self.observe("blink_prediction_polls", stats.get("poll_count", 0), "Polls per prediction", COUNT_BUCKETS)
+        for field in ("input_token_count", "output_token_count"):
+            if stats.get(field) is not None:
+                self.inc(f"blink_{field.replace('_count', 's')}_total", stats[field], "Tokens reported by Replicate")
+
+        with self._lock:
+            self.recent.append(stats)
+
+    def to_dict(self) -> dict:
+        """Snapshot of every metric plus the recent per-prediction records"""
+        with self._lock:
+            counters = {
+                name: {_label_text(key) or "total": value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            histograms = {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+            recent = list(self.recent)
+        return {"counters": counters, "histograms": histograms, "recent_predictions": recent}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Dump the registry as JSON"""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Dump the registry in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    labels = _label_text(key)
+                    lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+            for name, histogram in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum {histogram.sum}")
+                lines.append(f"{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded data"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.recent.clear()
+
+
+class PredictionRecorder:
+    """
+    Accumulates timing and traffic for each prediction a client is waiting on
+
+    Calls for one prediction may come from different helper methods (and,
+    with asyncio, interleave with other predictions), so stats are kept per
+    prediction id until the prediction finishes.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def created(self, prediction_id: str, seconds: float, bytes_sent: int, bytes_received: int, retries: int):
+        """Record the create call"""
+        with self._lock:
+            self._pending[prediction_id] = {
+                "id": prediction_id,
+                "started": time.time() - seconds,
+                "create_seconds": round(seconds, 6),
+                "poll_count": 0,
+                "bytes_sent": bytes_sent,
+                "bytes_received": bytes_received,
+                "retries": retries,
+            }
+
+    def request(self, prediction_id: str, bytes_sent: int, bytes_received: int, retries: int, poll: bool = True):
+        """Record a follow-up request (poll, stream read or cancel)"""
+        with self._lock:
+            stats = self._pending.get(prediction_id)
+            if stats is None:
+                return
+            if poll:
+                stats["poll_count"] += 1
+            stats["bytes_sent"] += bytes_sent
+            stats["bytes_received"] += bytes_received
+            stats["retries"] += retries
+
+    def finished(self, prediction: dict) -> Optional[dict]:
+        """
+        Close out a prediction and publish its stats
+
+        Args:
+            prediction: Final prediction object (timestamps and metrics are read from it)
+
+        Returns:
+            The prediction's stats, or None if it was never recorded
+        """
+        with self._lock:
+            stats = self._pending.pop(prediction.get("id"), None)
+        if stats is None:
+            return None
+
+        started = stats.pop("started")
+        replicate_metrics = prediction.get("metrics") or {}
+        stats.update({
+            "status": prediction.get("status"),
+            "queue_seconds": timestamp_delta(prediction, "created_at", "started_at"),
+            "run_seconds": timestamp_delta(prediction, "started_at", "completed_at"),
+            "total_seconds": round(time.time() - started, 6),
+            "predict_time": replicate_metrics.get("predict_time"),
+            "input_token_count": replicate_metrics.get("input_token_count"),
+            "output_token_count": replicate_metrics.get("output_token_count"),
+        })
+        self.registry.record_prediction(stats)
+        return stats
+
+    def discard(self, prediction_id: str):
+        """Forget a prediction without publishing it"""
+        with self._lock:
+            self._pending.pop(prediction_id, None)
+
+
+# Global registry instance
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    return _registry
+
+
+def _label_text(key: tuple) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in key)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an API timestamp like 2024-01-01T12:00:00.123456789Z"""
+    if not value:
+        return None
+    # Trim sub-microsecond digits and normalise the UTC suffix for fromisoformat
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def timestamp_delta(prediction: dict, start_field: str, end_field: str) -> Optional[float]:
+    """Seconds between two timestamps on a prediction, if both are present"""
+    start = parse_timestamp(prediction.get(start_field))
+    end = parse_timestamp(prediction.get(end_field))
+    if start is None or end is None:
+        return None
+    return max(0.0, (end - start).total_seconds())
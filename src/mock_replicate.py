@@ -0,0 +1,380 @@
+"""
+Local mock of the Replicate predictions API for offline load and latency testing
+
+Implements the parts of the API Blink uses - prediction create/get/cancel
+(version and model-scoped), server-sent-events streaming, `Prefer: wait`,
+/account and /models/{owner}/{name} - with configurable queue delay, run
+time, output size, failure and 429 injection. Standard library only.
+
+Run it and point Blink at it:
+
+    python -m src.mock_replicate --port 8787 --run-time 2
+    BLINK_REPLICATE_API_BASE=http://127.0.0.1:8787/v1 REPLICATE_API_TOKEN=mock python main.py
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+
+MOCK_VERSION = "mock0000000000000000000000000000000000000000000000000000000000000"
+
+
+class MockPrediction:
+    """One prediction whose status follows from its timings"""
+
+    def __init__(self, prediction_id: str, payload: dict, queue_delay: float, run_time: float,
+                 output_tokens: int, fail: bool):
+        self.id = prediction_id
+        self.payload = payload
+        self.created = time.time()
+        self.started = self.created + queue_delay
+        self.completed = self.started + run_time
+        self.output_tokens = output_tokens
+        self.fail = fail
+        self.canceled_at: Optional[float] = None
+
+    def status(self, now: Optional[float] = None) -> str:
+        now = now or time.time()
+        if self.canceled_at is not None:
+            return "canceled"
+        if now < self.started:
+            return "starting"
+        if now < self.completed:
+            return "processing"
+        return "failed" if self.fail else "succeeded"
+
+    def tokens(self, now: Optional[float] = None) -> list[str]:
+        """Output tokens produced so far"""
+        now = now or time.time()
+        if self.canceled_at is not None:
+            now = min(now, self.canceled_at)
+        if now < self.started or self.fail:
+            return []
+        run = self.completed - self.started
+        done = 1.0 if run <= 0 else min(1.0, (now - self.started) / run)
+        return [f"token{i} " for i in range(int(self.output_tokens * done))]
+
+    def to_dict(self, base_url: str) -> dict:
+        now = time.time()
+        status = self.status(now)
+        finished_at = self.canceled_at if status == "canceled" else (
+            self.completed if status in ("succeeded", "failed") else None
+        )
+        prompt = self.payload.get("input", {}).get("prompt", "")
+        data = {
+            "id": self.id,
+            "model": self.payload.get("model", "mock/model"),
+            "version": self.payload.get("version", MOCK_VERSION),
+            "input": self.payload.get("input", {}),
+            "status": status,
+            "output": self.tokens(now) or None,
+            "error": "Injected failure" if status == "failed" else None,
+            "logs": "",
+            "created_at": _iso(self.created),
+            "started_at": _iso(self.started) if now >= self.started else None,
+            "completed_at": _iso(finished_at) if finished_at else None,
+            "urls": {
+                "get": f"{base_url}/predictions/{self.id}",
+                "cancel": f"{base_url}/predictions/{self.id}/cancel",
+                "stream": f"{base_url}/stream/{self.id}",
+            },
+            "metrics": {},
+        }
+        if status == "succeeded":
+            data["metrics"] = {
+                "predict_time": round(self.completed - self.started, 6),
+                "input_token_count": max(1, len(prompt) // 4),
+                "output_token_count": self.output_tokens,
+            }
+        return data
+
+
+class MockReplicateServer:
+    """Threaded HTTP server emulating the Replicate API"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        queue_delay: float = 0.0,
+        run_time: float = 1.0,
+        output_tokens: int = 200,
+        failure_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            queue_delay: Seconds each prediction stays "starting"
+            run_time: Seconds each prediction stays "processing"
+            output_tokens: Output size; `max_tokens` in the input caps it
+            failure_rate: Fraction of predictions that end "failed"
+            rate_limit_rate: Fraction of creates answered 429
+            server_error_rate: Fraction of any request answered 503
+            retry_after: Retry-After seconds sent with 429s
+            seed: Seed for the injection RNG (reproducible runs)
+        """
+        self.queue_delay = queue_delay
+        self.run_time = run_time
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.retry_after = retry_after
+
+        self.predictions: dict[str, MockPrediction] = {}
+        self.counters = {"requests": 0, "created": 0, "throttled": 0, "server_errors": 0, "canceled": 0}
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """API root to use as BLINK_REPLICATE_API_BASE"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockReplicateServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="mock-replicate")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockReplicateServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def create(self, payload: dict, model: Optional[str]) -> MockPrediction:
+        """Register a new prediction"""
+        with self._lock:
+            prediction_id = f"mock{next(self._ids):08d}"
+            fail = self._random.random() < self.failure_rate
+            self.counters["created"] += 1
+        if model:
+            payload = {**payload, "model": model}
+        max_tokens = payload.get("input", {}).get("max_tokens") or self.output_tokens
+        prediction = MockPrediction(
+            prediction_id, payload, self.queue_delay, self.run_time,
+            min(self.output_tokens, max_tokens), fail
+        )
+        with self._lock:
+            self.predictions[prediction_id] = prediction
+        return prediction
+
+    def inject(self, kind: str) -> bool:
+        """Roll the dice for an injected error ("throttle" or "server_error")"""
+        rate = self.rate_limit_rate if kind == "throttle" else self.server_error_rate
+        with self._lock:
+            hit = rate > 0 and self._random.random() < rate
+            if hit:
+                self.counters["throttled" if kind == "throttle" else "server_errors"] += 1
+        return hit
+
+
+def _make_handler(server: MockReplicateServer):
+    """Request handler class bound to `server`"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def _dispatch(self, method: str):
+            with server._lock:
+                server.counters["requests"] += 1
+            body = self._read_body()
+            path = urlparse(self.path).path.rstrip("/")
+
+            if not self.headers.get("Authorization"):
+                return self._send_json(401, {"detail": "Authentication credentials were not provided."})
+            if server.inject("server_error"):
+                return self._send_json(503, {"detail": "Injected server error"})
+
+            if method == "GET" and path == "/v1/account":
+                return self._send_json(200, {"type": "user", "username": "mock", "name": "Mock User"})
+
+            match = re.fullmatch(r"/v1/models/([^/]+)/([^/]+)", path)
+            if method == "GET" and match:
+                return self._send_json(200, {
+                    "owner": match.group(1),
+                    "name": match.group(2),
+                    "latest_version": {"id": MOCK_VERSION, "created_at": _iso(time.time())},
+                })
+
+            match = re.fullmatch(r"/v1(?:/models/([^/]+/[^/]+))?/predictions", path)
+            if method == "POST" and match:
+                return self._create(body, match.group(1))
+
+            match = re.fullmatch(r"/v1/predictions/([^/]+)(/cancel)?", path)
+            if match:
+                prediction = server.predictions.get(match.group(1))
+                if prediction is None:
+                    return self._send_json(404, {"detail": "Not found."})
+                if match.group(2) and method == "POST":
+                    if prediction.status() in ("starting", "processing"):
+                        prediction.canceled_at = time.time()
+                        with server._lock:
+                            server.counters["canceled"] += 1
+                    return self._send_json(200, prediction.to_dict(server.url))
+                if method == "GET":
+                    return self._send_json(200, prediction.to_dict(server.url))
+
+            match = re.fullmatch(r"/v1/stream/([^/]+)", path)
+            if method == "GET" and match and match.group(1) in server.predictions:
+                return self._stream(server.predictions[match.group(1)])
+
+            self._send_json(404, {"detail": "Not found."})
+
+        def _create(self, body: bytes, model: Optional[str]):
+            if server.inject("throttle"):
+                return self._send_json(
+                    429,
+                    {"detail": "Request was throttled."},
+                    {"Retry-After": str(server.retry_after)}
+                )
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                return self._send_json(400, {"detail": "Invalid JSON"})
+
+            prediction = server.create(payload, model)
+
+            # Prefer: wait=N holds the response until the prediction finishes (or N seconds pass)
+            match = re.search(r"wait=(\d+)", self.headers.get("Prefer", ""))
+            if match:
+                deadline = prediction.created + int(match.group(1))
+                while prediction.status() in ("starting", "processing") and time.time() < deadline:
+                    time.sleep(min(0.05, max(0.0, deadline - time.time())))
+            self._send_json(201, prediction.to_dict(server.url))
+
+        def _stream(self, prediction: MockPrediction):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            try:
+                sent = 0
+                while True:
+                    status = prediction.status()
+                    tokens = prediction.tokens()
+                    for token in tokens[sent:]:
+                        self._write_chunk(f"event: output\ndata: {token}\n\n")
+                    sent = len(tokens)
+
+                    if status == "failed":
+                        self._write_chunk('event: error\ndata: {"detail": "Injected failure"}\n\n')
+                        break
+                    if status in ("succeeded", "canceled"):
+                        data = '{"reason": "canceled"}' if status == "canceled" else "{}"
+                        self._write_chunk(f"event: done\ndata: {data}\n\n")
+                        break
+                    time.sleep(0.05)
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _write_chunk(self, text: str):
+            data = text.encode("utf-8")
+            self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+            self.wfile.flush()
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send_json(self, status: int, data: dict, headers: Optional[dict] = None):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def _iso(timestamp: float) -> str:
+    """Format a time.time() value like the API does"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def main():
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description="Mock Replicate API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--queue-delay", type=float, default=0.0, help="seconds spent 'starting'")
+    parser.add_argument("--run-time", type=float, default=1.0, help="seconds spent 'processing'")
+    parser.add_argument("--output-tokens", type=int, default=200, help="output size in tokens")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of predictions that fail")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of creates answered 429")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds for 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockReplicateServer(
+        host=args.host,
+        port=args.port,
+        queue_delay=args.queue_delay,
+        run_time=args.run_time,
+        output_tokens=args.output_tokens,
+        failure_rate=args.failure_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    print(f"[OK] Mock Replicate API listening on {server.url}")
+    print(f"[INFO] Use it with: BLINK_REPLICATE_API_BASE={server.url} REPLICATE_API_TOKEN=mock")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[EXIT] {server.counters}")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
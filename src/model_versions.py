@@ -0,0 +1,207 @@
+"""Resolution and caching of Replicate model versions"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.config import DEFAULT_REPLICATE_API_BASE, MODEL_VERSION_CACHE, MODEL_VERSION_TTL
+
+
+# Known-good versions used when the real models API cannot be reached
+FALLBACK_VERSIONS = {
+    "anthropic/claude-4.5-sonnet": "459655107e29a683cb6deb73a9640cf9aeae39ea7c87803a2ae81c311f6ef44f",
+}
+
+# Seconds to wait before retrying a model whose lookup failed
+RETRY_FAILED_AFTER = 60
+
+
+class ModelVersionResolver:
+    """
+    Maps model names ("owner/name") to their latest version id
+
+    Lookups are served from memory, then from a JSON file on disk. An entry
+    older than `ttl` is still returned straight away while a background
+    thread refreshes it, so only the very first lookup for a model waits on
+    the models API.
+
+    Entries are kept per API base URL, so versions resolved against a mock
+    server or proxy are never sent to the real API (and vice versa).
+    """
+
+    def __init__(self, cache_path: Optional[Path] = MODEL_VERSION_CACHE, ttl: float = MODEL_VERSION_TTL):
+        """
+        Args:
+            cache_path: JSON file persisting resolved versions (None keeps them in memory only)
+            ttl: Seconds before a resolved version is refreshed
+        """
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl = ttl
+        # (base_url, model) -> {"version": str, "resolved_at": float}
+        self._entries: Optional[dict[tuple[str, str], dict]] = None
+        self._refreshing: set[tuple[str, str]] = set()
+        self._failed_at: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def resolve(
+        self,
+        model: str,
+        fetch: Callable[[str], Optional[str]],
+        base_url: str = DEFAULT_REPLICATE_API_BASE,
+    ) -> Optional[str]:
+        """
+        Get the version id for `model`
+
+        Args:
+            model: Model identifier, e.g. "anthropic/claude-4.5-sonnet"
+            fetch: Looks up the latest version via the API (returns None or raises on failure)
+            base_url: API root the version is resolved against and will be sent to
+
+        Returns:
+            The version id, or None if it cannot be resolved and has no fallback
+        """
+        key = _key(base_url, model)
+        with self._lock:
+            entry = self._load().get(key)
+            failed_at = self._failed_at.get(key)
+
+        if entry is None:
+            if failed_at is not None and time.time() - failed_at < RETRY_FAILED_AFTER:
+                return _fallback(key)
+            version = self.refresh(model, fetch, base_url)
+            return version or _fallback(key)
+
+        if time.time() - entry["resolved_at"] > self.ttl:
+            self.refresh_in_background(model, fetch, base_url)
+        return entry["version"]
+
+    def refresh(
+        self,
+        model: str,
+        fetch: Callable[[str], Optional[str]],
+        base_url: str = DEFAULT_REPLICATE_API_BASE,
+    ) -> Optional[str]:
+        """Fetch the latest version now and store it; returns None on failure"""
+        try:
+            version = fetch(model)
+        except Exception:
+            version = None
+        if version:
+            self.set(model, version, base_url)
+        else:
+            with self._lock:
+                self._failed_at[_key(base_url, model)] = time.time()
+        return version
+
+    def refresh_in_background(
+        self,
+        model: str,
+        fetch: Callable[[str], Optional[str]],
+        base_url: str = DEFAULT_REPLICATE_API_BASE,
+    ):
+        """Start a refresh thread for `model` unless one is already running"""
+        key = _key(base_url, model)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(model, fetch, base_url)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True, name="blink-model-version").start()
+
+    def prefetch(
+        self,
+        model: str,
+        fetch: Callable[[str], Optional[str]],
+        base_url: str = DEFAULT_REPLICATE_API_BASE,
+    ):
+        """Warm the cache without blocking (no-op when a fresh entry exists)"""
+        with self._lock:
+            entry = self._load().get(_key(base_url, model))
+        if entry is None or time.time() - entry["resolved_at"] > self.ttl:
+            self.refresh_in_background(model, fetch, base_url)
+
+    def set(self, model: str, version: str, base_url: str = DEFAULT_REPLICATE_API_BASE):
+        """Record `version` as the current version of `model` on `base_url`"""
+        key = _key(base_url, model)
+        with self._lock:
+            self._load()[key] = {"version": version, "resolved_at": time.time()}
+            self._failed_at.pop(key, None)
+            self._save()
+
+    def invalidate(self, model: Optional[str] = None, base_url: Optional[str] = None):
+        """Forget one model's version (on one base URL, or on all of them), or everything"""
+        with self._lock:
+            entries = self._load()
+            for key in list(entries):
+                if (model is None or key[1] == model) and (base_url is None or key[0] == base_url.rstrip("/")):
+                    del entries[key]
+            self._save()
+
+    def _load(self) -> dict[tuple[str, str], dict]:
+        """Load the disk cache on first use (caller holds the lock)"""
+        if self._entries is None:
+            self._entries = {}
+            if self.cache_path and self.cache_path.exists():
+                try:
+                    data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                    # {base_url: {model: entry}}; older files keyed by model
+                    # alone can't say which API they came from and are dropped
+                    self._entries = {
+                        (base_url, model): entry
+                        for base_url, models in data.items() if "://" in base_url
+                        for model, entry in models.items()
+                        if isinstance(entry, dict) and entry.get("version")
+                    }
+                except (OSError, json.JSONDecodeError, AttributeError):
+                    pass
+        return self._entries
+
+    def _save(self):
+        """Write the cache atomically (caller holds the lock)"""
+        if not self.cache_path:
+            return
+        data: dict[str, dict[str, dict]] = {}
+        for (base_url, model), entry in self._entries.items():
+            data.setdefault(base_url, {})[model] = entry
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            tmp_path.replace(self.cache_path)
+        except OSError:
+            pass
+
+
+def _key(base_url: str, model: str) -> tuple[str, str]:
+    return base_url.rstrip("/"), model
+
+
+def _fallback(key: tuple[str, str]) -> Optional[str]:
+    """Known-good version for a model, only when talking to the real API"""
+    base_url, model = key
+    if base_url != DEFAULT_REPLICATE_API_BASE:
+        return None
+    return FALLBACK_VERSIONS.get(model)
+
+
+# Global resolver instance
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_model_resolver() -> ModelVersionResolver:
+    """Get or create the shared model version resolver"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ModelVersionResolver()
+    return _resolver
@@ -0,0 +1,189 @@
+"""Parse model-written edits (search/replace blocks or unified diffs) and apply them to code"""
+
+import difflib
+import re
+
+
+NO_CHANGES = "NO_CHANGES"
+
+_EDIT_BLOCK = re.compile(
+    r"^<{5,9} ?SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} ?REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE
+)
+_HUNK_HEADER = re.compile(r"^@@ .* @@")
+
+
+class PatchError(ValueError):
+    """Raised when model edits cannot be located in the code"""
+
+
+def parse_edits(response: str) -> list[tuple[str, str]]:
+    """
+    Extract (search, replace) pairs from a model response
+
+    Accepts SEARCH/REPLACE blocks:
+
+        <<<<<<< SEARCH
+        old lines
+        =======
+        new lines
+        >>>>>>> REPLACE
+
+    or, failing that, unified diff hunks (each hunk becomes one pair).
+
+    Returns:
+        Edits in order; empty if the response contains neither format
+    """
+    edits = [(search, replace) for search, replace in _EDIT_BLOCK.findall(response)]
+    if edits:
+        return edits
+    return _parse_unified_diff(response)
+
+
+def _parse_unified_diff(response: str) -> list[tuple[str, str]]:
+    """Turn unified diff hunks into (context+removed, context+added) pairs"""
+    edits = []
+    old = new = None
+    for line in response.splitlines(keepends=True):
+        if _HUNK_HEADER.match(line):
+            if old is not None and (old or new):
+                edits.append(("".join(old), "".join(new)))
+            old, new = [], []
+        elif old is None or line.startswith(("---", "+++", "\\")):
+            continue
+        elif line.startswith("```"):
+            if old or new:
+                edits.append(("".join(old), "".join(new)))
+            old = new = None
+        elif line.startswith("-"):
+            old.append(line[1:])
+        elif line.startswith("+"):
+            new.append(line[1:])
+        else:
+            # Context; models often drop the leading space on blank lines
+            text = line[1:] if line.startswith(" ") else line
+            old.append(text)
+            new.append(text)
+    if old is not None and (old or new):
+        edits.append(("".join(old), "".join(new)))
+    return edits
+
+
+def apply_edits(code: str, edits: list[tuple[str, str]], threshold: float = 0.85) -> str:
+    """
+    Apply (search, replace) edits in order
+
+    Each search text is located exactly first, then ignoring whitespace
+    differences, then by the most similar block of the same length (at
+    least `threshold` similar). Replacements are re-indented when the match
+    sits at a different indentation than the search text.
+
+    A search text must match exactly one place; an empty one is only
+    accepted for an empty (new) file.
+
+    Raises:
+        PatchError: If an edit cannot be located, matches more than one
+            place, or has an empty search text on a non-empty file
+    """
+    for number, (search, replace) in enumerate(edits, 1):
+        code = _apply_one(code, search, replace, threshold, number)
+    return code
+
+
+def apply_response(code: str, response: str) -> str:
+    """
+    Apply the edits in a model response to `code`
+
+    Raises:
+        PatchError: If the response has no usable edits or one does not apply
+    """
+    edits = parse_edits(response)
+    if not edits:
+        if response.strip() == NO_CHANGES:
+            return code
+        raise PatchError("Response contains no edits")
+    return apply_edits(code, edits)
+
+
+def _apply_one(code: str, search: str, replace: str, threshold: float, number: int) -> str:
+    if not search.strip():
+        # Nothing to anchor on: only meaningful when writing a new file
+        if code.strip():
+            raise PatchError(f"Edit {number}: empty search text")
+        return replace
+
+    matches = code.count(search)
+    if matches > 1:
+        raise PatchError(f"Edit {number}: search text matches {matches} places")
+    if matches:
+        return code.replace(search, replace, 1)
+
+    lines = code.splitlines(keepends=True)
+    search_lines = search.strip("\n").splitlines()
+    size = len(search_lines)
+    if size > len(lines):
+        raise PatchError(f"Edit {number}: search text is longer than the file")
+
+    # Same lines, different whitespace
+    target = [_normalize(line) for line in search_lines]
+    normalized = [_normalize(line) for line in lines]
+    starts = [start for start in range(len(lines) - size + 1) if normalized[start:start + size] == target]
+    if len(starts) > 1:
+        raise PatchError(f"Edit {number}: search text matches {len(starts)} places")
+    if starts:
+        return _splice(lines, starts[0], size, search_lines, replace)
+
+    # Closest block of the same length
+    target_text = "\n".join(target)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target_text)
+    best_start, best_ratio, tied = None, 0.0, False
+    for start in range(len(lines) - size + 1):
+        matcher.set_seq1("\n".join(normalized[start:start + size]))
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio:
+            best_start, best_ratio, tied = start, ratio, False
+        elif ratio == best_ratio:
+            tied = True
+    if best_start is not None and best_ratio >= threshold:
+        if tied:
+            raise PatchError(f"Edit {number}: search text is equally close to several places")
+        return _splice(lines, best_start, size, search_lines, replace)
+
+    raise PatchError(f"Edit {number}: search text not found")
+
+
+def _splice(lines: list[str], start: int, size: int, search_lines: list[str], replace: str) -> str:
+    """Swap lines[start:start+size] for `replace`, adjusting its indentation to the match"""
+    matched = lines[start:start + size]
+    replace_lines = replace.splitlines(keepends=True)
+
+    found_indent = _indent(matched)
+    search_indent = _indent(search_lines)
+    if found_indent != search_indent:
+        if found_indent.startswith(search_indent):
+            extra = found_indent[len(search_indent):]
+            replace_lines = [extra + line if line.strip() else line for line in replace_lines]
+        elif search_indent.startswith(found_indent):
+            cut = len(search_indent) - len(found_indent)
+            replace_lines = [
+                line[cut:] if line[:cut].strip() == "" else line for line in replace_lines
+            ]
+
+    if replace_lines and matched[-1].endswith("\n") and not replace_lines[-1].endswith("\n"):
+        replace_lines[-1] += "\n"
+    return "".join(lines[:start] + replace_lines + lines[start + size:])
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _indent(lines: list[str]) -> str:
+    """Leading whitespace of the first non-blank line"""
+    for line in lines:
+        if line.strip():
+            return line[:len(line) - len(line.lstrip())]
+    return ""
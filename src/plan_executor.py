@@ -0,0 +1,198 @@
+"""Dependency-aware concurrent execution of plan steps"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+from src.prediction_tracker import get_prediction_tracker
+
+
+StepId = Union[int, str]
+
+
+def normalize_step(element: Any, index: int) -> dict:
+    """
+    Turn one planner element into {"id", "task", "depends_on"}
+
+    Plain strings become independent steps numbered by position; objects may
+    name their id and the ids they depend on.
+
+    Args:
+        element: A string or an object like {"id": 2, "task": "...", "depends_on": [1]}
+        index: Position of the element in the plan
+
+    Returns:
+        Normalized step dict
+    """
+    if not isinstance(element, dict):
+        return {"id": index + 1, "task": str(element), "depends_on": []}
+
+    step_id = _step_id(element.get("id", index + 1))
+    task = element.get("task") or element.get("description") or element.get("step") or str(element)
+    depends_on = element.get("depends_on") or element.get("dependencies") or []
+    if not isinstance(depends_on, list):
+        depends_on = [depends_on]
+
+    deps = []
+    for dep in depends_on:
+        dep = _step_id(dep)
+        if dep != step_id and dep not in deps:
+            deps.append(dep)
+    return {"id": step_id, "task": str(task), "depends_on": deps}
+
+
+class PlanExecutor:
+    """
+    Runs plan steps as a DAG on a bounded worker pool
+
+    Steps can be added while the plan is still streaming in. A step starts
+    once every step it depends on has succeeded, and receives their outputs.
+    If a dependency fails, its dependents are skipped; independent steps keep
+    running. Dependencies on ids the plan never defines are ignored once the
+    plan is closed, and steps caught in a dependency cycle fail.
+
+    Each step produces a result dict:
+
+        {"id": 2, "step": "...", "depends_on": [1], "status": "succeeded",
+         "success": True, "result": "...", "error": None,
+         "started": 0.41, "elapsed": 3.2}
+
+    where "started" is seconds after the executor was created.
+    """
+
+    def __init__(self, run_step: Callable[[dict, dict], str], concurrency: int = 4):
+        """
+        Args:
+            run_step: Called as run_step(step, {dependency_id: output}); returns the step output
+            concurrency: Maximum steps running at once
+        """
+        self.run_step = run_step
+        self.concurrency = max(1, concurrency)
+        self.started_at = time.time()
+
+        self._steps: dict[StepId, dict] = {}
+        self._pending: list[StepId] = []
+        self._running: set[StepId] = set()
+        self._results: dict[StepId, dict] = {}
+        self._futures = []
+        # Predictions made by the steps are tagged with this plan's job id
+        self._jobs = get_prediction_tracker().new_job("plan")
+        self.job_id = self._jobs[-1]
+        self._closed = False
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="blink-plan")
+
+    def add(self, step: dict):
+        """Add a normalized step; it starts as soon as its dependencies allow"""
+        with self._cond:
+            if step["id"] in self._steps:
+                # Duplicate ids would make dependencies ambiguous
+                step = {**step, "id": f"{step['id']}#{len(self._steps) + 1}"}
+            self._steps[step["id"]] = step
+            self._pending.append(step["id"])
+            self._schedule()
+
+    def close(self):
+        """Signal that the plan is complete"""
+        with self._cond:
+            self._closed = True
+            self._schedule()
+
+    def results(self) -> list[dict]:
+        """Close the plan, wait for every step and return results in plan order"""
+        self.close()
+        try:
+            with self._cond:
+                while len(self._results) < len(self._steps):
+                    self._cond.wait()
+                results = [self._results[step_id] for step_id in self._steps]
+        except (KeyboardInterrupt, SystemExit):
+            # Cancel before the interpreter joins the workers on the way out
+            self.cancel()
+            raise
+        self._executor.shutdown(wait=True)
+        return results
+
+    def cancel(self) -> int:
+        """
+        Stop the plan: drop steps not yet started and cancel predictions in flight
+
+        Returns:
+            Number of in-flight predictions cancelled
+        """
+        with self._cond:
+            self._closed = True
+            for step_id in list(self._pending):
+                self._pending.remove(step_id)
+                self._finish(step_id, "skipped", error="cancelled")
+            for future in self._futures:
+                future.cancel()
+        self._executor.shutdown(wait=False)
+        return get_prediction_tracker().cancel_all(self.job_id)
+
+    def _schedule(self):
+        """Start or skip every pending step whose dependencies are settled (lock held)"""
+        progress = True
+        while progress:
+            progress = False
+            for step_id in list(self._pending):
+                step = self._steps[step_id]
+                deps = [dep for dep in step["depends_on"] if dep in self._steps or not self._closed]
+
+                failed = [dep for dep in deps if dep in self._results and not self._results[dep]["success"]]
+                if failed:
+                    self._pending.remove(step_id)
+                    self._finish(step_id, "skipped", error=f"dependency {failed[0]} did not succeed")
+                    progress = True
+                elif all(dep in self._results for dep in deps):
+                    self._pending.remove(step_id)
+                    self._running.add(step_id)
+                    inputs = {dep: self._results[dep]["result"] for dep in deps}
+                    self._futures.append(self._executor.submit(self._run, step, inputs))
+
+        if self._closed and self._pending and not self._running:
+            # Nothing left to wait for, so the remaining steps depend on each other
+            for step_id in list(self._pending):
+                self._pending.remove(step_id)
+                self._finish(step_id, "failed", error="dependency cycle")
+
+    def _run(self, step: dict, inputs: dict):
+        """Run one step on a worker and record its outcome"""
+        start = time.time()
+        try:
+            with get_prediction_tracker().job_scope(self._jobs):
+                output = self.run_step(step, inputs)
+            status, error = "succeeded", None
+        except Exception as e:
+            output, status, error = None, "failed", str(e)
+
+        with self._cond:
+            self._running.discard(step["id"])
+            self._finish(step["id"], status, output, error, start)
+            self._schedule()
+
+    def _finish(self, step_id: StepId, status: str, output: str = None, error: str = None, start: float = None):
+        """Record a step result and wake waiters (lock held)"""
+        step = self._steps[step_id]
+        now = time.time()
+        self._results[step_id] = {
+            "id": step_id,
+            "step": step["task"],
+            "depends_on": step["depends_on"],
+            "status": status,
+            "success": status == "succeeded",
+            "result": output,
+            "error": error,
+            "started": round((start or now) - self.started_at, 3),
+            "elapsed": round(now - start, 3) if start else 0.0,
+        }
+        self._cond.notify_all()
+
+
+def _step_id(value: Any) -> StepId:
+    """Step ids compare as ints when they look like numbers ("2" == 2)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return str(value)
@@ -0,0 +1,138 @@
+"""Tracks in-flight predictions so they can be cancelled instead of abandoned"""
+
+import atexit
+import itertools
+import signal
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+
+# Jobs (batches, plans) the current thread or task is working for, outermost first
+_current_jobs: ContextVar[tuple[str, ...]] = ContextVar("blink_prediction_jobs", default=())
+_job_ids = itertools.count(1)
+
+
+class PredictionTracker:
+    """
+    Registry of predictions that have been created but not yet finished
+
+    Each entry remembers how to cancel the prediction and which jobs it was
+    created for (see job_scope()), so a batch can cancel just its own calls.
+    Job ids are never reused within a process.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, tuple[Callable[[str], bool], tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, prediction_id: str, cancel: Callable[[str], bool]):
+        """
+        Record an in-flight prediction, tagged with the current job scope
+
+        Args:
+            prediction_id: Replicate prediction id
+            cancel: Function that cancels the prediction by id
+        """
+        with self._lock:
+            self._in_flight[prediction_id] = (cancel, _current_jobs.get())
+
+    def discard(self, prediction_id: str):
+        """Forget a prediction once it has finished or been cancelled"""
+        with self._lock:
+            self._in_flight.pop(prediction_id, None)
+
+    def in_flight(self, job: Optional[str] = None) -> list[str]:
+        """Ids of predictions currently in flight (only `job`'s, if given)"""
+        with self._lock:
+            return [
+                prediction_id for prediction_id, (_, jobs) in self._in_flight.items()
+                if job is None or job in jobs
+            ]
+
+    def cancel_all(self, job: Optional[str] = None) -> int:
+        """
+        Cancel in-flight predictions
+
+        Args:
+            job: Only cancel predictions created inside this job's scope
+                (nested jobs included)
+
+        Returns:
+            Number of cancel requests that succeeded
+        """
+        with self._lock:
+            targets = [
+                (prediction_id, cancel)
+                for prediction_id, (cancel, jobs) in self._in_flight.items()
+                if job is None or job in jobs
+            ]
+
+        cancelled = 0
+        for prediction_id, cancel in targets:
+            if cancel(prediction_id):
+                cancelled += 1
+            self.discard(prediction_id)
+        return cancelled
+
+    @staticmethod
+    def new_job(prefix: str = "job") -> tuple[str, ...]:
+        """
+        Create a job id nested in the caller's current jobs
+
+        Returns:
+            The scope to pass to job_scope() on worker threads; its last
+            element is the new job's id
+        """
+        return _current_jobs.get() + (f"{prefix}-{next(_job_ids)}",)
+
+    @staticmethod
+    @contextmanager
+    def job_scope(jobs: tuple[str, ...]) -> Iterator[None]:
+        """Tag predictions created inside the block with `jobs`"""
+        token = _current_jobs.set(jobs)
+        try:
+            yield
+        finally:
+            _current_jobs.reset(token)
+
+
+# Global tracker instance
+_tracker = PredictionTracker()
+
+
+def get_prediction_tracker() -> PredictionTracker:
+    """Get the process-wide prediction tracker"""
+    return _tracker
+
+
+def cancel_all_predictions() -> int:
+    """Cancel every prediction still in flight in this process"""
+    return _tracker.cancel_all()
+
+
+def install_signal_handlers():
+    """
+    Turn SIGTERM into SystemExit in the main thread
+
+    The exit then unwinds like Ctrl-C does, so batches and plans waiting on
+    their workers cancel their predictions before the interpreter joins the
+    worker threads (which happens before atexit handlers run). A handler
+    someone else installed is left alone.
+    """
+    if threading.current_thread() is not threading.main_thread() or not hasattr(signal, "SIGTERM"):
+        return
+    if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+        return
+
+    def terminate(signum, frame):
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, terminate)
+
+
+# Predictions left running at exit would keep billing and eat concurrency quota.
+# This covers daemon threads and single calls; executor workers are joined
+# before atexit, so BatchJob and PlanExecutor cancel their own on interrupt.
+atexit.register(cancel_all_predictions)
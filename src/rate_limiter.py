@@ -0,0 +1,200 @@
+"""Client-side rate limiting and retry scheduling for Replicate API calls"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+from src.config import (
+    RATE_LIMIT_CREATE_PER_SEC,
+    RATE_LIMIT_CREATE_BURST,
+    RATE_LIMIT_POLL_PER_SEC,
+    RATE_LIMIT_POLL_BURST,
+    RATE_LIMIT_MAX_RETRIES,
+)
+from src.http_transport import HTTPTransport, get_transport
+
+
+RETRYABLE_SERVER_ERRORS = (500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out waiting times instead of sleeping"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take `tokens` from the bucket
+
+        Returns:
+            Seconds the caller must wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds` (used when the server says Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RequestScheduler:
+    """
+    Sends API requests through per-purpose rate budgets with retries
+
+    Prediction creation and polling draw from separate token buckets so a
+    burst of polls never starves new predictions (and vice versa). 429
+    responses honour Retry-After; idempotent requests also retry on 5xx
+    and connection errors with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[HTTPTransport] = None,
+        create_rate: float = RATE_LIMIT_CREATE_PER_SEC,
+        create_burst: float = RATE_LIMIT_CREATE_BURST,
+        poll_rate: float = RATE_LIMIT_POLL_PER_SEC,
+        poll_burst: float = RATE_LIMIT_POLL_BURST,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        """
+        Args:
+            transport: HTTP transport (defaults to the shared pool)
+            create_rate: Prediction creations per second
+            create_burst: Burst size for prediction creation
+            poll_rate: Polls (and other reads) per second
+            poll_burst: Burst size for polling
+            max_retries: Retries per request before giving up
+            backoff_base: First backoff delay in seconds
+            backoff_max: Upper bound on a single backoff delay
+        """
+        self.transport = transport or get_transport()
+        self.buckets = {
+            "create": TokenBucket(create_rate, create_burst),
+            "poll": TokenBucket(poll_rate, poll_burst),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Bumped from every thread sharing the scheduler
+        self.throttled = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        budget: str,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request within a rate budget, retrying throttled and transient failures
+
+        Args:
+            budget: "create" or "poll"
+            method: HTTP method
+            url: Absolute URL
+            idempotent: Whether 5xx/connection failures may be retried
+                (defaults to True for GET/HEAD only)
+            **kwargs: Passed to the transport
+
+        Returns:
+            The final response; its `retries` attribute holds the retry count
+        """
+        bucket = self.buckets[budget]
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD")
+
+        attempt = 0
+        while True:
+            time.sleep(bucket.reserve())
+
+            try:
+                response = self.transport.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # A connect failure never reached the server, so it is always safe to retry
+                safe = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not safe or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                status = response.status_code
+                if status == 429:
+                    with self._lock:
+                        self.throttled += 1
+                if attempt >= self.max_retries or not (
+                    status == 429 or (idempotent and status in RETRYABLE_SERVER_ERRORS)
+                ):
+                    response.retries = attempt
+                    return response
+
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                if status == 429:
+                    bucket.pause(delay)
+                response.close()
+
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if present"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Global scheduler instance - Replicate's limits apply per account, not per client
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """Get or create the shared request scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+    return _scheduler
@@ -1,22 +1,83 @@
 """Replicate API wrapper for AI model interactions"""
 
 import json
-import requests
-from typing import Optional
-from src.config import MODEL
+import time
+from typing import Generator, Iterator, Optional
+from src.config import (
+    MODEL,
+    REPLICATE_API_BASE,
+    WAIT_STRATEGY,
+    PREDICTION_MAX_WAIT,
+    BATCH_CONCURRENCY,
+    PREDICTION_ENDPOINT,
+    MODEL_VERSION,
+    TEMPERATURE,
+    HEDGE_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MAX_EXTRA,
+    PROMPT_OVERFLOW,
+    MIN_OUTPUT_TOKENS,
+    PROMPT_SAFETY_MARGIN,
+    MAX_CONTINUATION_TOKENS,
+    MAX_CONTINUATIONS,
+)
+from src.batch import BatchJob
+from src.hedging import LatencyTracker
+from src.json_stream import JSONArrayStreamParser, iter_json_array
+from src.http_transport import HTTPTransport, get_transport
+from src.metrics import PredictionRecorder, get_metrics_registry, timestamp_delta
+from src.patching import NO_CHANGES
+from src.model_versions import ModelVersionResolver, get_model_resolver
+from src.prediction_tracker import get_prediction_tracker
+from src.rate_limiter import RequestScheduler, get_request_scheduler
+from src.response_cache import ResponseCache
+from src.token_estimator import estimate_tokens, model_limits, trim_to_tokens
 from src.token_manager import get_api_token
+from src.wait_strategy import WaitStrategy, get_wait_strategy
+
+
+TERMINAL_STATUSES = ("succeeded", "failed", "canceled")
+
+
+class PromptTooLargeError(ValueError):
+    """Raised before dispatch when a prompt cannot fit the model's context window"""
 
 
 class ReplicateClient:
     """Client for interacting with Replicate API"""
 
-    def __init__(self, api_token: str = None, model: str = MODEL):
+    def __init__(
+        self,
+        api_token: str = None,
+        model: str = MODEL,
+        transport: Optional[HTTPTransport] = None,
+        wait_strategy: Optional[WaitStrategy] = None,
+        cache: Optional[ResponseCache] = None,
+        temperature: float = TEMPERATURE,
+        scheduler: Optional[RequestScheduler] = None,
+        hedge: bool = HEDGE_ENABLED,
+        model_version: Optional[str] = MODEL_VERSION or None,
+        prediction_endpoint: str = PREDICTION_ENDPOINT,
+        resolver: Optional[ModelVersionResolver] = None,
+        base_url: str = REPLICATE_API_BASE,
+    ):
         """
         Initialize Replicate client
         
         Args:
             api_token: Replicate API token (will prompt if not provided)
             model: Model identifier (e.g., "anthropic/claude-3.5-sonnet")
+            transport: HTTP transport to use (defaults to the shared pool)
+            wait_strategy: How to wait for completion (defaults to config WAIT_STRATEGY)
+            cache: Response cache consulted for deterministic (temperature 0) calls
+            temperature: Default sampling temperature for calls that don't pass one
+            scheduler: Rate limiter/retry scheduler (defaults to the shared one)
+            hedge: Hedge slow deterministic predictions by default
+            model_version: Pin a version id instead of resolving the model's latest
+            prediction_endpoint: "version" (resolve a version, POST /predictions) or
+                "model" (POST /models/{owner}/{name}/predictions)
+            resolver: Model version cache (defaults to the shared one)
+            base_url: API root, e.g. a local mock server's http://127.0.0.1:8787/v1
         """
         # Get token from parameter or prompt user
         if api_token is None:
@@ -24,7 +85,25 @@ class ReplicateClient:
         
         self.api_token = api_token
         self.model = model
-        self.base_url = "https://api.replicate.com/v1"
+        self.version = model_version
+        self.prediction_endpoint = prediction_endpoint
+        self.resolver = resolver or get_model_resolver()
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport or get_transport()
+        self.wait_strategy = wait_strategy or get_wait_strategy(WAIT_STRATEGY)
+        self.cache = cache
+        self.temperature = temperature
+        self.tracker = get_prediction_tracker()
+        if scheduler is None:
+            # Rate limits are per account, so clients on the shared pool share one budget
+            shared = self.transport is get_transport()
+            scheduler = get_request_scheduler() if shared else RequestScheduler(self.transport)
+        self.scheduler = scheduler
+        self.hedge = hedge
+        self.hedge_percentile = HEDGE_PERCENTILE
+        self.latency = LatencyTracker()
+        self.recorder = PredictionRecorder(get_metrics_registry())
+        self.last_prediction_stats: Optional[dict] = None
         self.headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
@@ -34,8 +113,13 @@ class ReplicateClient:
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        use_cache: bool = True,
+        hedge: Optional[bool] = None,
+        max_hedges: int = HEDGE_MAX_EXTRA,
+        continue_truncated: bool = True,
+        max_total_tokens: int = MAX_CONTINUATION_TOKENS,
     ) -> str:
         """
         Generate text using the Replicate API
@@ -43,79 +127,622 @@ class ReplicateClient:
         Args:
             prompt: User prompt
             system_prompt: System prompt for the model
-            max_tokens: Maximum tokens in response
-            temperature: Temperature for sampling (0-1)
+            max_tokens: Maximum tokens in response (None picks it from the
+                context window left after the prompt; larger values are clamped)
+            temperature: Temperature for sampling (0-1, defaults to the client's)
+            use_cache: Set False to bypass cached responses (the fresh result is still stored)
+            hedge: Launch duplicates of a slow deterministic prediction (defaults to the client's)
+            max_hedges: Maximum duplicate predictions this call may pay for
+            continue_truncated: Resume outputs that stopped at max_tokens
+            max_total_tokens: Output token cap across the original and its continuations
             
         Returns:
             Generated text
         """
+        try:
+            payload = self._build_payload(prompt, system_prompt, max_tokens, temperature)
+            
+            cache_key = self._cache_key(payload)
+            if cache_key and use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            if hedge is None:
+                hedge = self.hedge
+            # Only identical-output requests can be raced against each other
+            if hedge and max_hedges > 0 and payload["input"]["temperature"] == 0:
+                prediction = self._run_hedged(payload, max_hedges)
+            else:
+                prediction = self._run_prediction(payload)
+            output = self._extract_output(prediction)
+            
+            if continue_truncated and self._is_truncated(prediction, output, payload["input"]["max_tokens"]):
+                output = self._continue_output(payload, output, max_total_tokens)
+            
+            if cache_key:
+                self.cache.put(cache_key, output)
+            return output
+                
+        except PromptTooLargeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error calling Replicate API: {e}")
+
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        use_cache: bool = True,
+        continue_truncated: bool = True,
+        max_total_tokens: int = MAX_CONTINUATION_TOKENS,
+    ) -> Iterator[str]:
+        """
+        Generate text, yielding output chunks as the model produces them
+        
+        Consumes the prediction's server-sent-events stream URL. Models that
+        do not offer a stream fall back to polling and yield the full output once.
+        An output cut off at max_tokens is continued like in generate(), and
+        the continuations are streamed too.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt for the model
+            max_tokens: Maximum tokens in response (None picks it from the
+                context window left after the prompt; larger values are clamped)
+            temperature: Temperature for sampling (0-1, defaults to the client's)
+            use_cache: Set False to bypass cached responses (the fresh result is still stored)
+            continue_truncated: Resume outputs that stopped at max_tokens
+            max_total_tokens: Output token cap across the original and its continuations
+            
+        Yields:
+            Text chunks in order
+        """
+        try:
+            payload = self._build_payload(prompt, system_prompt, max_tokens, temperature, stream=True)
+            
+            cache_key = self._cache_key(payload)
+            if cache_key and use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+            
+            created_at = time.time()
+            prediction = self._create_prediction(payload)
+        except PromptTooLargeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error calling Replicate API: {e}")
+        
+        prediction, output = yield from self._stream_prediction(prediction, created_at)
+        
+        if continue_truncated and self._is_truncated(prediction, output, payload["input"]["max_tokens"]):
+            output = yield from self._continue_output_stream(payload, output, max_total_tokens)
+        
+        if cache_key:
+            self.cache.put(cache_key, output)
+
+    def _stream_prediction(self, prediction: dict, created_at: float) -> Generator[str, None, tuple[dict, str]]:
+        """
+        Yield a created prediction's output chunks as they arrive
+        
+        Returns:
+            The finished prediction and its full output
+        """
+        stream_url = prediction.get("urls", {}).get("stream")
+        if not stream_url:
+            prediction = self._await_prediction(prediction, created_at)
+            output = self._extract_output(prediction)
+            yield output
+            return prediction, output
+        
+        # Closing the generator early (or Ctrl-C) cancels the prediction
+        self.tracker.add(prediction["id"], self.cancel_prediction)
+        finished = False
+        response = self.scheduler.request(
+            "poll",
+            "GET",
+            stream_url,
+            headers={
+                "Authorization": self.headers["Authorization"],
+                "Accept": "text/event-stream",
+                "Cache-Control": "no-store",
+            },
+            stream=True,
+            timeout=(10, PREDICTION_MAX_WAIT)
+        )
+        
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"Error opening stream: {response.status_code}")
+            
+            chunks = []
+            for event, data in _iter_sse_events(response):
+                self.recorder.request(prediction["id"], 0, len(data.encode("utf-8")), 0, poll=False)
+                if event == "output":
+                    chunks.append(data)
+                    yield data
+                elif event == "error":
+                    raise RuntimeError(f"Prediction failed: {data}")
+                elif event == "done":
+                    finished = True
+                    if "canceled" in data:
+                        self._record_stats({"id": prediction["id"], "status": "canceled"})
+                        raise RuntimeError("Prediction was canceled")
+                    break
+        finally:
+            response.close()
+            if not finished:
+                self.cancel_prediction(prediction["id"])
+            self.tracker.discard(prediction["id"])
+        
+        self.wait_strategy.observe(time.time() - created_at)
+        # The stream carries no metrics; fetch them for the stats and the truncation check
+        try:
+            prediction = self._get_prediction(prediction["id"])
+        except Exception:
+            prediction = {"id": prediction["id"], "status": "succeeded"}
+        self._record_stats(prediction)
+        return prediction, "".join(chunks)
+
+    def _continue_output_stream(self, payload: dict, output: str, max_total_tokens: int) -> Generator[str, None, str]:
+        """
+        Streaming variant of _continue_output: yields only the text each continuation adds
+        
+        Returns:
+            The stitched output
+        """
+        for _ in range(MAX_CONTINUATIONS):
+            next_payload = self._continuation_payload(payload, output, max_total_tokens, stream=True)
+            if next_payload is None:
+                break
+            
+            created_at = time.time()
+            prediction = self._create_prediction(next_payload)
+            stream = self._stream_prediction(prediction, created_at)
+            prediction, piece, output = yield from _stitch_stream(output, stream)
+            
+            if not self._is_truncated(prediction, piece, next_payload["input"]["max_tokens"]):
+                break
+        
+        return output
+
+    def _build_payload(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        stream: bool = False,
+    ) -> dict:
+        """Build the create-prediction request body, enforcing the token budget"""
+        if temperature is None:
+            temperature = self.temperature
+        
+        budget = self.prompt_budget(prompt, system_prompt)
+        if not budget["fits"]:
+            if PROMPT_OVERFLOW != "trim":
+                raise PromptTooLargeError(
+                    f"Prompt is ~{budget['prompt_tokens']} tokens; {self.model} has a "
+                    f"{budget['context_window']}-token context window"
+                )
+            system_tokens = estimate_tokens(system_prompt or "")
+            prompt = trim_to_tokens(
+                prompt,
+                budget["context_window"] - system_tokens - MIN_OUTPUT_TOKENS - PROMPT_SAFETY_MARGIN
+            )
+            budget = self.prompt_budget(prompt, system_prompt)
+        
+        if max_tokens is None:
+            max_tokens = budget["available_output"]
+        max_tokens = max(1, min(max_tokens, budget["available_output"]))
+        
         # Combine system and user prompts
         full_prompt = prompt
         if system_prompt:
             full_prompt = f"{system_prompt}\n\n{prompt}"
         
-        try:
-            # Create prediction using version hash for anthropic/claude-4.5-sonnet
-            payload = {
-                "version": "459655107e29a683cb6deb73a9640cf9aeae39ea7c87803a2ae81c311f6ef44f",  # Claude 4.5 Sonnet latest
-                "input": {
-                    "prompt": full_prompt,
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                }
+        payload = {
+            "input": {
+                "prompt": full_prompt,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
             }
+        }
+        # Without a version the model-scoped endpoint runs the model's latest
+        version = self.model_version()
+        if version:
+            payload["version"] = version
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def model_version(self) -> Optional[str]:
+        """Version id to run, or None when predictions go to the model-scoped endpoint"""
+        if self.version:
+            return self.version
+        if self.prediction_endpoint == "model":
+            return None
+        return self.resolver.resolve(self.model, self._fetch_latest_version, self.base_url)
+
+    def warm_model_version(self):
+        """Resolve the model's version in the background so the first call doesn't wait on it"""
+        if not self.version and self.prediction_endpoint != "model":
+            self.resolver.prefetch(self.model, self._fetch_latest_version, self.base_url)
+
+    def _fetch_latest_version(self, model: str) -> Optional[str]:
+        """Look up a model's latest version id through the models API"""
+        response = self.scheduler.request(
+            "poll",
+            "GET",
+            f"{self.base_url}/models/{model}",
+            headers=self.headers,
+            timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        return (response.json().get("latest_version") or {}).get("id")
+
+    def _predictions_url(self, payload: dict) -> str:
+        """Create-prediction endpoint for a payload"""
+        if "version" in payload:
+            return f"{self.base_url}/predictions"
+        return f"{self.base_url}/models/{self.model}/predictions"
+
+    def prompt_budget(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        """
+        Estimate a prompt's size against the model's context window
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt for the model
             
-            response = requests.post(
-                f"{self.base_url}/predictions",
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
-            
-            if response.status_code != 201:
-                raise RuntimeError(f"API error: {response.status_code} - {response.text}")
+        Returns:
+            Dictionary with prompt_tokens, context_window, max_output,
+            available_output (the largest max_tokens worth requesting) and
+            fits (whether at least MIN_OUTPUT_TOKENS of output remain)
+        """
+        limits = model_limits(self.model)
+        prompt_tokens = estimate_tokens(prompt) + estimate_tokens(system_prompt or "")
+        remaining = limits["context_window"] - prompt_tokens - PROMPT_SAFETY_MARGIN
+        return {
+            "prompt_tokens": prompt_tokens,
+            "context_window": limits["context_window"],
+            "max_output": limits["max_output"],
+            "available_output": max(0, min(remaining, limits["max_output"])),
+            "fits": remaining >= MIN_OUTPUT_TOKENS,
+        }
+
+    def _cache_key(self, payload: dict) -> Optional[str]:
+        """Cache key for a request, or None when caching doesn't apply"""
+        if self.cache is None or payload["input"].get("temperature") != 0:
+            return None
+        cacheable = {key: value for key, value in payload.items() if key != "stream"}
+        return self.cache.make_key(self.model, cacheable)
+
+    def _create_prediction(
+        self,
+        payload: dict,
+        extra_headers: Optional[dict] = None,
+        timeout: float = 30,
+    ) -> dict:
+        """Send the create-prediction request and return the prediction"""
+        # Only 429 is retried here: a 5xx may already have created the prediction
+        started = time.time()
+        response = self.scheduler.request(
+            "create",
+            "POST",
+            self._predictions_url(payload),
+            json=payload,
+            headers={**self.headers, **(extra_headers or {})},
+            timeout=timeout
+        )
+        
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"API error: {response.status_code} - {response.text}")
+        
+        prediction = response.json()
+        self.recorder.created(
+            prediction["id"],
+            time.time() - started,
+            *_traffic(response),
+            getattr(response, "retries", 0)
+        )
+        return prediction
+
+    def _run_prediction(self, payload: dict) -> dict:
+        """Create a prediction and wait for it to finish"""
+        created_at = time.time()
+        prediction = self._create_prediction(
+            payload,
+            extra_headers=self.wait_strategy.create_headers(),
+            timeout=self.wait_strategy.create_timeout
+        )
+        
+        # With "Prefer: wait" the prediction may already be finished here
+        return self._await_prediction(prediction, created_at)
+
+    def _is_truncated(self, prediction: dict, output: str, max_tokens: int) -> bool:
+        """
+        Whether a prediction stopped because it hit max_tokens
+        
+        Uses the stop reason when the model reports one, then the output
+        token count from the prediction metrics, then a local estimate.
+        """
+        if prediction.get("status") != "succeeded" or not output:
+            return False
+        
+        metrics = prediction.get("metrics") or {}
+        stop_reason = prediction.get("stop_reason") or metrics.get("stop_reason")
+        if stop_reason:
+            return stop_reason in ("max_tokens", "length")
+        
+        output_tokens = metrics.get("output_token_count")
+        if output_tokens is not None:
+            return output_tokens >= max_tokens
+        # The estimate runs a little high, so demand a near-full budget
+        return estimate_tokens(output) >= max_tokens * 0.98
+
+    def _continue_output(self, payload: dict, output: str, max_total_tokens: int) -> str:
+        """
+        Issue continuation predictions seeded with the partial output and stitch the pieces
+        
+        Stops when a piece finishes naturally, the output token cap is
+        reached, MAX_CONTINUATIONS pieces have been added, or the growing
+        prompt no longer fits the context window.
+        """
+        for _ in range(MAX_CONTINUATIONS):
+            next_payload = self._continuation_payload(payload, output, max_total_tokens)
+            if next_payload is None:
+                break
             
-            prediction = response.json()
-            prediction_id = prediction["id"]
+            prediction = self._run_prediction(next_payload)
+            piece = self._extract_output(prediction)
+            output = _stitch(output, piece)
             
-            # Poll for completion
-            return self._wait_for_prediction(prediction_id)
-                
-        except Exception as e:
-            raise RuntimeError(f"Error calling Replicate API: {e}")
+            if not self._is_truncated(prediction, piece, next_payload["input"]["max_tokens"]):
+                break
+        
+        return output
 
+    def _continuation_payload(
+        self,
+        payload: dict,
+        output: str,
+        max_total_tokens: int,
+        stream: bool = False,
+    ) -> Optional[dict]:
+        """
+        Payload for the next continuation of `output`
+        
+        Args:
+            payload: Payload of the original (not the previous continuation) request
+            output: Stitched output so far
+            max_total_tokens: Output token cap across the original and its continuations
+            stream: Request a stream URL
+            
+        Returns:
+            The payload, or None once the cap is reached or the prompt no longer fits
+        """
+        remaining = max_total_tokens - estimate_tokens(output)
+        if remaining <= 0:
+            return None
+        
+        prompt = _continuation_prompt(payload["input"]["prompt"], output)
+        try:
+            return self._build_payload(prompt, None, remaining, payload["input"]["temperature"], stream=stream)
+        except PromptTooLargeError:
+            return None
 
-    def _wait_for_prediction(self, prediction_id: str, max_wait: int = 300) -> str:
-        """Wait for prediction to complete"""
-        import time
+    def cancel_prediction(self, prediction_id: str) -> bool:
+        """
+        Cancel a running prediction so it stops billing
         
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
-            response = requests.get(
-                f"{self.base_url}/predictions/{prediction_id}",
+        Args:
+            prediction_id: Prediction to cancel
+            
+        Returns:
+            True if the API accepted the cancel request
+        """
+        try:
+            response = self.scheduler.request(
+                "poll",
+                "POST",
+                f"{self.base_url}/predictions/{prediction_id}/cancel",
+                idempotent=True,
                 headers=self.headers,
-                timeout=10
+                timeout=5
             )
+        except Exception:
+            return False
+        
+        self.recorder.request(prediction_id, *_traffic(response), getattr(response, "retries", 0), poll=False)
+        prediction = response.json() if response.status_code == 200 else {"id": prediction_id}
+        self._record_stats({**prediction, "status": "canceled"})
+        return response.status_code == 200
+
+    def cancel_all(self) -> int:
+        """Cancel every prediction still in flight in this process"""
+        return self.tracker.cancel_all()
+
+    def _wait_for_prediction(self, prediction_id: str, max_wait: int = PREDICTION_MAX_WAIT) -> str:
+        """Wait for prediction to complete"""
+        prediction = {"id": prediction_id, "status": "starting"}
+        return self._extract_output(self._await_prediction(prediction, time.time(), max_wait))
+
+    def _await_prediction(
+        self,
+        prediction: dict,
+        created_at: float,
+        max_wait: int = PREDICTION_MAX_WAIT,
+    ) -> dict:
+        """
+        Poll a tracked prediction to completion
+        
+        A timeout, error or interrupt (KeyboardInterrupt included) while
+        waiting cancels the prediction on Replicate before propagating.
+        """
+        prediction_id = prediction["id"]
+        self.tracker.add(prediction_id, self.cancel_prediction)
+        try:
+            return self._poll_prediction(prediction, created_at, max_wait)
+        except BaseException:
+            self.cancel_prediction(prediction_id)
+            raise
+        finally:
+            self.tracker.discard(prediction_id)
+
+    def _poll_prediction(
+        self,
+        prediction: dict,
+        created_at: float,
+        max_wait: int = PREDICTION_MAX_WAIT,
+    ) -> dict:
+        """
+        Poll a prediction until it reaches a terminal status
+        
+        Args:
+            prediction: Prediction as returned by the API
+            created_at: time.time() when the create call was sent
+            max_wait: Maximum seconds to wait from creation
             
-            if response.status_code != 200:
-                raise RuntimeError(f"Error getting prediction: {response.status_code}")
-            
-            prediction = response.json()
+        Returns:
+            The finished prediction
+        """
+        poll_count = 0
+        while prediction.get("status") not in TERMINAL_STATUSES:
+            elapsed = time.time() - created_at
+            if elapsed >= max_wait:
+                raise RuntimeError("Prediction timeout")
             
-            if prediction["status"] == "succeeded":
-                output = prediction.get("output", "")
-                # Output might be a string or list
-                if isinstance(output, list):
-                    return "".join(output)
-                return str(output)
+            delay = self.wait_strategy.next_delay(poll_count, elapsed)
+            time.sleep(min(delay, max_wait - elapsed))
+            poll_count += 1
             
-            elif prediction["status"] == "failed":
-                raise RuntimeError(f"Prediction failed: {prediction.get('error', 'Unknown error')}")
+            prediction = self._get_prediction(prediction["id"])
+        
+        self.wait_strategy.observe(time.time() - created_at)
+        self._record_latency(prediction, time.time() - created_at)
+        return prediction
+
+    def _run_hedged(
+        self,
+        payload: dict,
+        max_hedges: int,
+        max_wait: int = PREDICTION_MAX_WAIT,
+    ) -> dict:
+        """
+        Run a prediction, racing duplicates against it when it is an outlier
+        
+        A duplicate is launched whenever the oldest running copy has been
+        queued or running longer than the hedge percentile of recent
+        predictions, up to `max_hedges` duplicates. The first copy to
+        succeed wins and the others are cancelled.
+        
+        Returns:
+            The winning (or, if every copy failed, the last) finished prediction
+        """
+        started = time.time()
+        running: dict[str, tuple[dict, float]] = {}
+        finished = None
+        hedges = 0
+        
+        def launch():
+            created_at = time.time()
+            prediction = self._create_prediction(payload)
+            running[prediction["id"]] = (prediction, created_at)
+            self.tracker.add(prediction["id"], self.cancel_prediction)
+        
+        launch()
+        poll_count = 0
+        try:
+            while running:
+                for prediction_id, (prediction, created_at) in list(running.items()):
+                    if prediction.get("status") not in TERMINAL_STATUSES:
+                        continue
+                    del running[prediction_id]
+                    self.tracker.discard(prediction_id)
+                    self._record_latency(prediction, time.time() - created_at)
+                    finished = prediction
+                    if prediction["status"] == "succeeded":
+                        self.wait_strategy.observe(time.time() - created_at)
+                        return prediction
+                
+                if not running:
+                    break
+                
+                elapsed = time.time() - started
+                if elapsed >= max_wait:
+                    raise RuntimeError("Prediction timeout")
+                
+                oldest, oldest_created = min(running.values(), key=lambda item: item[1])
+                if hedges < max_hedges and self.latency.should_hedge(
+                    oldest.get("status", "starting"), time.time() - oldest_created, self.hedge_percentile
+                ):
+                    launch()
+                    hedges += 1
+                    continue
+                
+                time.sleep(min(self.wait_strategy.next_delay(poll_count, elapsed), max_wait - elapsed))
+                poll_count += 1
+                for prediction_id, (_, created_at) in list(running.items()):
+                    running[prediction_id] = (self._get_prediction(prediction_id), created_at)
             
-            # Still processing, wait a bit
-            time.sleep(1)
+            return finished
+        finally:
+            # Losers (and everything, on error or interrupt) get cancelled
+            for prediction_id in running:
+                self.cancel_prediction(prediction_id)
+                self.tracker.discard(prediction_id)
+
+    def _record_latency(self, prediction: dict, elapsed: float):
+        """Feed a finished prediction into the metrics registry and the hedging tracker"""
+        self._record_stats(prediction)
+        if prediction.get("status") != "succeeded":
+            return
+        self.latency.record_total(elapsed)
+        queued = timestamp_delta(prediction, "created_at", "started_at")
+        if queued is not None:
+            self.latency.record_start(queued)
+
+    def _record_stats(self, prediction: dict):
+        """Publish a finished prediction's latency breakdown and keep it as last_prediction_stats"""
+        stats = self.recorder.finished(prediction)
+        if stats is not None:
+            self.last_prediction_stats = stats
+
+    def _get_prediction(self, prediction_id: str) -> dict:
+        """Fetch the current state of a prediction"""
+        response = self.scheduler.request(
+            "poll",
+            "GET",
+            f"{self.base_url}/predictions/{prediction_id}",
+            headers=self.headers,
+            timeout=10
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"Error getting prediction: {response.status_code}")
+        
+        self.recorder.request(prediction_id, *_traffic(response), getattr(response, "retries", 0))
+        return response.json()
+
+    def _extract_output(self, prediction: dict) -> str:
+        """Return the text output of a finished prediction"""
+        if prediction["status"] == "succeeded":
+            output = prediction.get("output", "")
+            # Output might be a string or list
+            if isinstance(output, list):
+                return "".join(output)
+            return str(output)
+        
+        if prediction["status"] == "canceled":
+            raise RuntimeError("Prediction was canceled")
         
-        raise RuntimeError("Prediction timeout")
+        raise RuntimeError(f"Prediction failed: {prediction.get('error', 'Unknown error')}")
 
     def analyze_code(self, code: str, instruction: str) -> str:
         """
@@ -128,18 +755,29 @@ class ReplicateClient:
         Returns:
             Modified or analyzed code
         """
-        prompt = f"""You are an expert code analyzer and refactorer.
-
-Instruction: {instruction}
+        return self.generate(_analyze_prompt(code, instruction))
 
-Code to analyze:
-```
-{code}
-```
-
-Provide only the modified code or analysis result, without additional explanation."""
+    def edit_code(self, code: str, instruction: str, path: Optional[str] = None) -> str:
+        """
+        Ask for the changes an instruction needs as search/replace edit blocks
+        
+        Only the changed regions are generated, so edits to large files cost
+        a fraction of the output tokens of a full rewrite. Apply the response
+        with src.patching.apply_response.
         
-        return self.generate(prompt, max_tokens=2048)
+        Args:
+            code: Current code
+            instruction: What to change
+            path: File name shown to the model, if any
+            
+        Returns:
+            The model's edit blocks (or NO_CHANGES)
+        """
+        return self.generate(_edit_prompt(code, instruction, path))
+
+    def analyze_code_stream(self, code: str, instruction: str) -> Iterator[str]:
+        """Streaming variant of analyze_code"""
+        return self.generate_stream(_analyze_prompt(code, instruction))
 
     def generate_code(self, specification: str) -> str:
         """
@@ -151,13 +789,43 @@ Provide only the modified code or analysis result, without additional explanatio
         Returns:
             Generated code
         """
-        prompt = f"""You are an expert Python developer. Generate clean, well-documented Python code based on the following specification:
+        return self.generate(_code_prompt(specification))
 
-{specification}
+    def generate_code_stream(self, specification: str) -> Iterator[str]:
+        """Streaming variant of generate_code"""
+        return self.generate_stream(_code_prompt(specification))
 
-Provide only the code, without explanations or markdown formatting."""
+    def generate_many(
+        self,
+        prompts: list[str],
+        concurrency: int = BATCH_CONCURRENCY,
+        **generate_kwargs,
+    ) -> BatchJob:
+        """
+        Run many prompts with at most `concurrency` predictions in flight
         
-        return self.generate(prompt, max_tokens=2048)
+        Args:
+            prompts: Prompts to generate for
+            concurrency: Maximum predictions in flight at once
+            **generate_kwargs: Passed to generate() for every prompt
+            
+        Returns:
+            BatchJob - iterate it for results in input order, or use
+            as_completed() to handle results as they finish
+        """
+        return BatchJob(lambda prompt: self.generate(prompt, **generate_kwargs), prompts, concurrency)
+
+    def generate_code_many(self, specifications: list[str], concurrency: int = BATCH_CONCURRENCY) -> BatchJob:
+        """Batch variant of generate_code"""
+        return BatchJob(self.generate_code, specifications, concurrency)
+
+    def analyze_code_many(
+        self,
+        requests: list[tuple[str, str]],
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> BatchJob:
+        """Batch variant of analyze_code over (code, instruction) pairs"""
+        return BatchJob(lambda request: self.analyze_code(*request), requests, concurrency)
 
     def plan_tasks(self, objective: str) -> list[str]:
         """
@@ -169,7 +837,104 @@ Provide only the code, without explanations or markdown formatting."""
         Returns:
             List of planned tasks/steps
         """
-        prompt = f"""You are a project planning expert. Create a detailed step-by-step plan for the following objective:
+        result = self.generate(_plan_prompt(objective), max_tokens=1024)
+        return _parse_plan(result)
+
+    def plan_tasks_stream(self, objective: str) -> Iterator[str]:
+        """
+        Create a dependency-annotated plan, yielding each step as soon as the model has written it
+        
+        The JSON array is parsed incrementally from the prediction stream, so
+        callers can start on step 1 while later steps are still being generated.
+        
+        Args:
+            objective: The objective to plan for
+            
+        Yields:
+            Steps in order, as {"id", "task", "depends_on"} objects (plain
+            strings if the model ignored the requested format)
+        """
+        parser = JSONArrayStreamParser()
+        text = []
+        seen = set()
+        streaming = True
+        
+        for chunk in self.generate_stream(_plan_graph_prompt(objective), max_tokens=2048):
+            text.append(chunk)
+            if not streaming:
+                continue
+            try:
+                steps = parser.feed(chunk)
+            except json.JSONDecodeError:
+                streaming = False
+                continue
+            for step in steps:
+                seen.add(_step_key(step))
+                yield step
+        
+        if not (streaming and parser.finished):
+            # Not a well-formed array: fall back to parsing the whole output,
+            # skipping steps already yielded (the fallback may split it differently)
+            for step in _parse_plan("".join(text)):
+                if isinstance(step, str) and not step.strip("[],` \t"):
+                    continue
+                key = _step_key(step)
+                if key not in seen:
+                    seen.add(key)
+                    yield step
+
+
+def _analyze_prompt(code: str, instruction: str) -> str:
+    """Prompt used by analyze_code"""
+    return f"""You are an expert code analyzer and refactorer.
+
+Instruction: {instruction}
+
+Code to analyze:
+```
+{code}
+```
+
+Provide only the modified code or analysis result, without additional explanation."""
+
+
+def _edit_prompt(code: str, instruction: str, path: Optional[str] = None) -> str:
+    """Prompt used by edit_code"""
+    name = f" ({path})" if path else ""
+    return f"""You are an expert code refactorer. Apply the instruction to the code below{name}.
+
+Instruction: {instruction}
+
+Code:
+```
+{code}
+```
+
+Reply ONLY with edit blocks in this exact format, one per change:
+
+<<<<<<< SEARCH
+exact lines copied from the code, including indentation
+=======
+the lines that replace them
+>>>>>>> REPLACE
+
+Keep each SEARCH section short but unique: the changed lines plus a line or two of
+context. Do not repeat unchanged parts of the file. If nothing needs to change,
+reply with just {NO_CHANGES}."""
+
+
+def _code_prompt(specification: str) -> str:
+    """Prompt used by generate_code"""
+    return f"""You are an expert Python developer. Generate clean, well-documented Python code based on the following specification:
+
+{specification}
+
+Provide only the code, without explanations or markdown formatting."""
+
+
+def _plan_prompt(objective: str) -> str:
+    """Prompt used by plan_tasks"""
+    return f"""You are a project planning expert. Create a detailed step-by-step plan for the following objective:
 
 {objective}
 
@@ -177,12 +942,153 @@ Return ONLY a JSON array of steps, like this format:
 ["Step 1: Description", "Step 2: Description", ...]
 
 No other text, just the JSON array."""
-        
-        result = self.generate(prompt, max_tokens=1024)
-        
+
+
+def _plan_graph_prompt(objective: str) -> str:
+    """Prompt used by plan_tasks_stream: steps with explicit dependencies"""
+    return f"""You are a project planning expert. Create a detailed step-by-step plan for the following objective:
+
+{objective}
+
+Return ONLY a JSON array of steps, like this format:
+[{{"id": 1, "task": "Description", "depends_on": []}}, {{"id": 2, "task": "Description", "depends_on": [1]}}, ...]
+
+"depends_on" lists the ids of earlier steps whose output the step needs. Leave it
+empty when a step can be done independently, so independent steps can run in parallel.
+
+No other text, just the JSON array."""
+
+
+def _parse_plan(result: str) -> list[str]:
+    """Parse the plan_tasks response into a list of steps"""
+    try:
+        # The array may be wrapped in prose or a code fence
+        return list(iter_json_array([result]))
+    except ValueError:
+        # Fallback: split by newlines if JSON parsing fails
+        return [s.strip() for s in result.split("\n") if s.strip()]
+
+
+def _step_key(step) -> str:
+    """Identity of a plan step for de-duplication: its id, else its whitespace-normalized task"""
+    if isinstance(step, str):
+        # A fallback line may still hold one JSON step, e.g. '{"id": 2, ...},'
         try:
-            # Try to parse as JSON
-            return json.loads(result)
-        except json.JSONDecodeError:
-            # Fallback: split by newlines if JSON parsing fails
-            return [s.strip() for s in result.split("\n") if s.strip()]
+            step = json.loads(step.strip().rstrip(","))
+        except ValueError:
+            pass
+    if isinstance(step, dict):
+        if step.get("id") is not None:
+            return f"id:{step['id']}"
+        step = step.get("task") or json.dumps(step, sort_keys=True)
+    return "text:" + " ".join(str(step).split())
+
+
+def _continuation_prompt(original_prompt: str, partial: str) -> str:
+    """Prompt asking the model to resume an output that hit max_tokens"""
+    return f"""{original_prompt}
+
+---
+Your previous response was cut off by the output length limit. This is what you wrote so far:
+
+<partial_response>
+{partial}
+</partial_response>
+
+Continue the response exactly where it stops, mid-line if necessary. Do not repeat any of it and do not add a preamble or explanation."""
+
+
+def _stitch(partial: str, continuation: str, max_overlap: int = 500) -> str:
+    """Join a continuation onto a partial output, dropping any repeated overlap"""
+    # Overlaps shorter than a few characters (a space, a newline) are coincidence
+    for size in range(min(max_overlap, len(partial), len(continuation)), 7, -1):
+        if partial.endswith(continuation[:size]):
+            return partial + continuation[size:]
+    return partial + continuation
+
+
+def _stitch_stream(
+    partial: str,
+    stream: Generator[str, None, tuple[dict, str]],
+    max_overlap: int = 500,
+) -> Generator[str, None, tuple[dict, str, str]]:
+    """
+    Yield a streamed continuation minus any overlap with `partial`
+
+    The first max_overlap characters are held back until the overlap is
+    known; the rest passes straight through.
+
+    Returns:
+        The stream's prediction, the raw continuation and the stitched output
+    """
+    head: Optional[list[str]] = []
+    head_size = 0
+    added = []
+    try:
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                prediction, piece = stop.value
+                break
+            if head is None:
+                added.append(chunk)
+                yield chunk
+                continue
+            head.append(chunk)
+            head_size += len(chunk)
+            if head_size >= max_overlap:
+                text = _stitch(partial, "".join(head), max_overlap)[len(partial):]
+                head = None
+                if text:
+                    added.append(text)
+                    yield text
+    finally:
+        stream.close()
+    
+    if head:
+        text = _stitch(partial, "".join(head), max_overlap)[len(partial):]
+        if text:
+            added.append(text)
+            yield text
+    return prediction, piece, partial + "".join(added)
+
+
+def _traffic(response) -> tuple[int, int]:
+    """Request and response body sizes in bytes"""
+    body = response.request.body if response.request is not None else None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return len(body or b""), len(response.content or b"")
+
+
+def _iter_sse_events(response) -> Iterator[tuple[str, str]]:
+    """
+    Parse a server-sent-events response into (event, data) pairs
+    
+    Multi-line data fields are joined with newlines, as the SSE spec requires.
+    """
+    event = "message"
+    data_lines = []
+    
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event = "message"
+            data_lines = []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+            if field == "event":
+                event = value
+            elif field == "data":
+                data_lines.append(value)
+    
+    if data_lines:
+        yield event, "\n".join(data_lines)
@@ -0,0 +1,175 @@
+"""Content-addressed on-disk cache for deterministic prediction outputs"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class ResponseCache:
+    """
+    Stores prediction outputs keyed by a hash of everything that determines them
+
+    Entries live as one JSON file each under `cache_dir`. Eviction drops
+    expired entries first, then least-recently-used ones until the cache is
+    back under its size and entry limits.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = 100 * 1024 * 1024,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Total size limit for stored entries
+            ttl: Seconds an entry stays valid (None for no expiry)
+            max_entries: Optional limit on the number of entries
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # key -> [size, created_at, last_access]; loaded from disk on first use
+        self._index: Optional[dict[str, list]] = None
+
+    @staticmethod
+    def make_key(model: str, payload: dict) -> str:
+        """
+        Build the cache key for a prediction request
+
+        Args:
+            model: Model identifier
+            payload: Create-prediction body (version hash, prompt and sampling params)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        canonical = json.dumps({"model": model, "payload": payload}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached output for `key`, or None on a miss"""
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None or self._expired(entry):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            path = self._entry_path(key)
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                data = None
+
+            # The index only approximates creation time for entries found on disk
+            if data is None or self._expired([0, data.get("created_at", 0), 0]):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            try:
+                path.touch()
+            except OSError:
+                pass
+            entry[1] = data["created_at"]
+            entry[2] = time.time()
+            self.hits += 1
+            return data["output"]
+
+    def put(self, key: str, output: str):
+        """Store an output and evict as needed"""
+        now = time.time()
+        body = json.dumps({"key": key, "created_at": now, "output": output})
+
+        with self._lock:
+            index = self._load_index()
+            path = self._entry_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(body, encoding="utf-8")
+            except OSError:
+                return
+            index[key] = [len(body.encode("utf-8")), now, now]
+            self._evict()
+
+    def clear(self):
+        """Delete every cache entry"""
+        with self._lock:
+            for key in list(self._load_index()):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current cache size"""
+        with self._lock:
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(index),
+                "bytes": sum(entry[0] for entry in index.values()),
+            }
+
+    def _load_index(self) -> dict:
+        """Scan the cache directory once and build the in-memory index"""
+        if self._index is None:
+            self._index = {}
+            if self.cache_dir.exists():
+                for path in self.cache_dir.glob("*/*.json"):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    # mtime is bumped on access, so it doubles as the LRU clock
+                    self._index[path.stem] = [stat.st_size, stat.st_mtime, stat.st_mtime]
+        return self._index
+
+    def _evict(self):
+        """Drop expired entries, then least-recently-used ones over the limits"""
+        index = self._index
+        for key in [k for k, entry in index.items() if self._expired(entry)]:
+            self._remove(key)
+            self.evictions += 1
+
+        total = sum(entry[0] for entry in index.values())
+        by_age = sorted(index, key=lambda k: index[k][2])
+        while by_age and (
+            total > self.max_bytes
+            or (self.max_entries is not None and len(index) > self.max_entries)
+        ):
+            key = by_age.pop(0)
+            total -= index[key][0]
+            self._remove(key)
+            self.evictions += 1
+
+    def _expired(self, entry: list) -> bool:
+        return self.ttl is not None and time.time() - entry[1] > self.ttl
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
@@ -0,0 +1,651 @@
+"""Multi-client HTTP/JSON service around EnhancedCodeAgent (standard library only)
+
+Endpoints (JSON bodies and responses):
+
+    GET  /healthz                   liveness
+    GET  /v1/stats                  queue depth, running work, per-client counts
+    GET  /metrics                   Prometheus metrics for Replicate calls
+    GET  /v1/mcp/tools              MCP tool definitions
+    POST /v1/generate               {"instruction", "files"?, "session"?}
+    POST /v1/analyze                {"instruction", "code" | "file", "session"?}
+    POST /v1/plan                   {"objective"}
+    POST /v1/mcp/call               {"tool", "args"}
+
+Model work goes through a bounded queue served by a fixed worker pool.
+Clients (the X-Blink-Client header, else the remote address) are served
+round-robin so one busy client cannot starve the others. A client over
+its cap gets 429; when the queue is full everyone gets 503 with
+Retry-After. Requests naming a "session" get their own ConversationMemory
+under .agent_history/service/<client>/<session>; no state is shared
+between clients or with the interactive CLI's history.
+
+When BLINK_SERVICE_TOKEN is set every endpoint but /healthz requires
+"Authorization: Bearer <token>"; without one the service only listens on
+localhost. File paths in requests must stay inside the workspace (403).
+"""
+
+import argparse
+import hmac
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+
+class Saturated(Exception):
+    """The request queue is full (HTTP 503)"""
+
+
+class ClientLimitExceeded(Exception):
+    """The client already has its maximum number of requests queued or running (HTTP 429)"""
+
+
+class FairQueue:
+    """
+    Bounded work queue with per-client caps and round-robin dispatch
+
+    Each client has its own FIFO; workers take from the clients in turn, so
+    a client that submits 50 requests waits behind itself, not in front of
+    everyone else.
+    """
+
+    def __init__(self, max_queued: int, per_client: int):
+        """
+        Args:
+            max_queued: Requests waiting (not yet running) across all clients
+            per_client: Requests one client may have queued plus running
+        """
+        self.max_queued = max(1, max_queued)
+        self.per_client = max(1, per_client)
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._active: dict[str, int] = {}
+        self._queued = 0
+        self._running = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def submit(self, client: str, func: Callable[[], Any]) -> Future:
+        """
+        Queue `func` for `client`
+
+        Raises:
+            ClientLimitExceeded: If the client is at its cap
+            Saturated: If the queue is full
+        """
+        future = Future()
+        with self._cond:
+            if self._active.get(client, 0) >= self.per_client:
+                raise ClientLimitExceeded(f"Client {client} already has {self.per_client} requests in progress")
+            if self._queued >= self.max_queued:
+                raise Saturated("Request queue is full")
+            self._queues.setdefault(client, deque()).append((func, future, time.time()))
+            self._active[client] = self._active.get(client, 0) + 1
+            self._queued += 1
+            self._cond.notify()
+        return future
+
+    def take(self) -> Optional[tuple]:
+        """Block for the next (client, func, future, queued_at); None once closed"""
+        with self._cond:
+            while not self._closed:
+                for client in list(self._queues):
+                    queue = self._queues[client]
+                    if not queue:
+                        del self._queues[client]
+                        continue
+                    func, future, queued_at = queue.popleft()
+                    # Round-robin: this client goes to the back of the line
+                    self._queues.move_to_end(client)
+                    self._queued -= 1
+                    self._running += 1
+                    return client, func, future, queued_at
+                self._cond.wait()
+            return None
+
+    def finished(self, client: str):
+        """Release a slot taken by take()"""
+        with self._cond:
+            self._running -= 1
+            self._active[client] -= 1
+            if not self._active[client]:
+                del self._active[client]
+
+    def close(self):
+        """Wake all workers and stop handing out work"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued": self.max_queued,
+                "per_client": self.per_client,
+                "clients": dict(self._active),
+            }
+
+
+class BlinkService:
+    """HTTP service: admission control in front of a shared agent"""
+
+    def __init__(
+        self,
+        agent=None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        per_client: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        token: Optional[str] = None,
+    ):
+        """
+        Args:
+            agent: EnhancedCodeAgent to serve (default: one on the configured workspace)
+            host, port: Listen address (default: SERVICE_HOST, SERVICE_PORT; port 0 picks a free one)
+            workers: Requests running at once (default: SERVICE_WORKERS)
+            max_queued: Requests waiting before 503 (default: SERVICE_MAX_QUEUE)
+            per_client: Requests per client before 429 (default: SERVICE_PER_CLIENT)
+            request_timeout: Seconds a request may take, queueing included (default: SERVICE_REQUEST_TIMEOUT)
+            token: Bearer token clients must send (default: SERVICE_TOKEN; "" disables auth)
+
+        Raises:
+            ValueError: If asked to listen beyond localhost without a token
+        """
+        from src.config import (
+            SERVICE_HOST,
+            SERVICE_PORT,
+            SERVICE_WORKERS,
+            SERVICE_MAX_QUEUE,
+            SERVICE_PER_CLIENT,
+            SERVICE_REQUEST_TIMEOUT,
+            SERVICE_TOKEN,
+        )
+
+        host = host or SERVICE_HOST
+        self.token = SERVICE_TOKEN if token is None else token
+        if not self.token and host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Refusing to listen on {host} without BLINK_SERVICE_TOKEN")
+
+        if agent is None:
+            from src.enhanced_agent import EnhancedCodeAgent
+            agent = EnhancedCodeAgent()
+        self.agent = agent
+        self.workers = max(1, workers or SERVICE_WORKERS)
+        self.request_timeout = request_timeout or SERVICE_REQUEST_TIMEOUT
+        self.queue = FairQueue(max_queued or SERVICE_MAX_QUEUE, per_client or SERVICE_PER_CLIENT)
+        self.started_at = time.time()
+        self.counters = {"accepted": 0, "rejected_busy": 0, "rejected_client": 0, "timed_out": 0}
+        # (client, session) -> [lock, requests holding or waiting for it]
+        self._session_locks: dict[tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer(
+            (host, SERVICE_PORT if port is None else port),
+            _make_handler(self)
+        )
+        self.httpd.daemon_threads = True
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"blink-service-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def start(self) -> "BlinkService":
+        """Serve in a background thread"""
+        threading.Thread(target=self.httpd.serve_forever, name="blink-service-http", daemon=True).start()
+        return self
+
+    def close(self):
+        self.queue.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "BlinkService":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _worker(self):
+        while True:
+            item = self.queue.take()
+            if item is None:
+                return
+            client, func, future, queued_at = item
+            try:
+                if not future.set_running_or_notify_cancel():
+                    # The caller gave up while this was queued
+                    continue
+                started = time.time()
+                try:
+                    result = func()
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result((result, round(started - queued_at, 3)))
+            finally:
+                self.queue.finished(client)
+
+    def call(self, client: str, func: Callable[[], Any]) -> tuple[Any, float]:
+        """
+        Run `func` through the queue on behalf of `client`
+
+        Returns:
+            (result, seconds spent queued)
+
+        Raises:
+            Saturated, ClientLimitExceeded: When admission is refused
+            TimeoutError: If the request did not finish within request_timeout
+        """
+        try:
+            future = self.queue.submit(client, func)
+        except Saturated:
+            self._count("rejected_busy")
+            raise
+        except ClientLimitExceeded:
+            self._count("rejected_client")
+            raise
+        self._count("accepted")
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeout:
+            future.cancel()
+            self._count("timed_out")
+            raise TimeoutError(f"Request did not finish within {self.request_timeout:.0f}s")
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            sessions = len(self._session_locks)
+        return {
+            "uptime": round(time.time() - self.started_at, 1),
+            "workers": self.workers,
+            "active_sessions": sessions,
+            **self.queue.stats(),
+            **counters,
+        }
+
+    def authorized(self, header: Optional[str]) -> bool:
+        """Whether an Authorization header carries the service token (always true without one)"""
+        if not self.token:
+            return True
+        scheme, _, credentials = (header or "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), self.token.encode())
+
+    def confine(self, path: Any) -> str:
+        """
+        Check that a request path stays inside the workspace
+
+        Raises:
+            PermissionError: For absolute paths or ".." escapes outside it
+        """
+        from src.file_handler import confine_path
+        return confine_path(self.agent.workspace_root, path)
+
+    # Request handlers (run on worker threads)
+
+    def generate(self, client: str, body: dict) -> str:
+        instruction = _require(body, "instruction")
+        files = [self.confine(path) for path in body.get("files") or []]
+        with self._session(client, body.get("session")) as memory:
+            prompt = instruction
+            if memory is not None and memory.conversation_history:
+                prompt = f"{memory.get_conversation_context()}\n\n{instruction}"
+            result = self.agent.generate_code_with_full_context(prompt, files)
+            if memory is not None:
+                memory.add_message("user", instruction, "generate")
+                memory.add_message("assistant", result[:2000], "generate")
+        return result
+
+    def analyze(self, client: str, body: dict) -> str:
+        instruction = _require(body, "instruction")
+        code = body.get("code")
+        if code is None:
+            path = self.confine(_require(body, "file"))
+            code = self.agent.read_file(path)
+            if code is None:
+                raise ValueError(f"File not found: {path}")
+        with self._session(client, body.get("session")) as memory:
+            result = self.agent.analyze_code(code, instruction)
+            if memory is not None:
+                memory.add_message("user", instruction, "analyze")
+                memory.add_message("assistant", result[:2000], "analyze")
+        return result
+
+    def plan(self, client: str, body: dict) -> list:
+        return self.agent.plan_tasks(_require(body, "objective"))
+
+    def mcp_call(self, client: str, body: dict) -> dict:
+        args = body.get("args") or {}
+        if not isinstance(args, dict):
+            raise ValueError("args must be an object")
+        from src.mcp_server import PATH_ARGS
+        for name in PATH_ARGS:
+            if name in args:
+                self.confine(args[name])
+        return json.loads(self.agent.call_mcp_tool(_require(body, "tool"), args))
+
+    def _session(self, client: str, session: Optional[str]):
+        """Context manager yielding the session's own ConversationMemory (None without a session)"""
+        return _SessionScope(self, client, session)
+
+
+class _SessionScope:
+    """
+    Holds a session's lock for one request so its history is written in order
+
+    Locks are reference-counted and dropped once no request holds or waits
+    for them, so idle sessions cost nothing.
+    """
+
+    def __init__(self, service: BlinkService, client: str, session: Optional[str]):
+        self.service = service
+        self.key = (client, session) if session else None
+        self.memory = None
+
+    def __enter__(self):
+        if self.key is None:
+            return None
+        from src.conversation_memory import ConversationMemory
+
+        with self.service._lock:
+            entry = self.service._session_locks.setdefault(self.key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            client, session = (_safe_name(part) for part in self.key)
+            workspace = Path(self.service.agent.workspace_root)
+            self.memory = ConversationMemory(
+                workspace,
+                history_dir=workspace / ".agent_history" / "service" / client / session
+            )
+            # Load now: this memory only lives for the request, so buffering
+            # messages until exit would only pin it in memory
+            self.memory.conversation_history
+        except BaseException:
+            self._release()
+            raise
+        return self.memory
+
+    def __exit__(self, *exc_info):
+        if self.key is None:
+            return
+        try:
+            self.memory.flush()
+        finally:
+            self._release()
+
+    def _release(self):
+        with self.service._lock:
+            entry = self.service._session_locks[self.key]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del self.service._session_locks[self.key]
+
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+ROUTES = {
+    "/v1/generate": BlinkService.generate,
+    "/v1/analyze": BlinkService.analyze,
+    "/v1/plan": BlinkService.plan,
+    "/v1/mcp/call": BlinkService.mcp_call,
+}
+
+
+def _require(body: dict, name: str) -> Any:
+    if body.get(name) in (None, ""):
+        raise ValueError(f"Missing field {name!r}")
+    return body[name]
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^\w.-]", "_", str(value))[:64] or "_"
+
+
+def _make_handler(service: BlinkService):
+    """Request handler class bound to `service`"""
+    from src.config import SERVICE_MAX_BODY_BYTES
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = urlparse(self.path).path.rstrip("/")
+            if path == "/healthz":
+                return self._send_json(200, {"success": True, "status": "ok"})
+            if not self._check_auth():
+                return
+            if path == "/v1/stats":
+                return self._send_json(200, {"success": True, **service.stats()})
+            if path == "/v1/mcp/tools":
+                return self._send_json(200, {"success": True, "tools": service.agent.get_mcp_tools()})
+            if path == "/metrics":
+                from src.metrics import get_metrics_registry
+                return self._send(200, get_metrics_registry().to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            self._send_json(404, {"success": False, "error": f"Unknown path {path}"})
+
+        def do_POST(self):
+            path = urlparse(self.path).path.rstrip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > SERVICE_MAX_BODY_BYTES:
+                self.close_connection = True
+                return self._send_json(413, {"success": False, "error": "Request body too large"})
+            raw = self.rfile.read(length) if length else b""
+            if not self._check_auth():
+                return
+
+            route = ROUTES.get(path)
+            if route is None:
+                return self._send_json(404, {"success": False, "error": f"Unknown path {path}"})
+            try:
+                body = json.loads(raw or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("Body must be a JSON object")
+            except ValueError as e:
+                return self._send_json(400, {"success": False, "error": f"Invalid JSON body: {e}"})
+
+            client = self.headers.get("X-Blink-Client") or self.client_address[0]
+            start = time.time()
+            try:
+                result, queued = service.call(client, lambda: route(service, client, body))
+            except Saturated as e:
+                return self._send_json(503, {"success": False, "error": str(e)}, {"Retry-After": "1"})
+            except ClientLimitExceeded as e:
+                return self._send_json(429, {"success": False, "error": str(e)}, {"Retry-After": "1"})
+            except TimeoutError as e:
+                return self._send_json(504, {"success": False, "error": str(e)})
+            except ValueError as e:
+                return self._send_json(400, {"success": False, "error": str(e)})
+            except PermissionError as e:
+                return self._send_json(403, {"success": False, "error": str(e)})
+            except Exception as e:
+                return self._send_json(500, {"success": False, "error": str(e)})
+
+            self._send_json(200, {
+                "success": True,
+                "result": result,
+                "queued": queued,
+                "elapsed": round(time.time() - start, 3),
+            })
+
+        def _check_auth(self) -> bool:
+            """Answer 401 unless the request carries the service token"""
+            if service.authorized(self.headers.get("Authorization")):
+                return True
+            self._send_json(401, {"success": False, "error": "Missing or invalid bearer token"}, {"WWW-Authenticate": "Bearer"})
+            return False
+
+        def _send_json(self, status: int, data: dict, headers: Optional[dict] = None):
+            self._send(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def load_test(
+    url: str,
+    requests: int = 100,
+    concurrency: int = 16,
+    clients: int = 4,
+    path: str = "/v1/generate",
+    body: Optional[dict] = None,
+    token: Optional[str] = None,
+) -> dict:
+    """
+    Fire requests at a running service and summarize the outcome
+
+    Args:
+        url: Service base URL
+        requests: Total requests
+        concurrency: Requests in flight at once
+        clients: Distinct X-Blink-Client ids to spread requests over
+        path: Endpoint to hit
+        body: Request body (default: a small generate instruction)
+        token: Bearer token to send
+
+    Returns:
+        {"requests", "statuses": {code: count}, "wall_time", "throughput", "latency": {"p50", "p95", "max"}}
+    """
+    import urllib.error
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    payload = json.dumps(body or {"instruction": "Write a function that adds two numbers"}).encode("utf-8")
+
+    def one(index: int) -> tuple[int, float]:
+        headers = {"Content-Type": "application/json", "X-Blink-Client": f"load-{index % max(1, clients)}"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(url.rstrip("/") + path, data=payload, headers=headers)
+        started = time.time()
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except OSError:
+            status = 0
+        return status, time.time() - started
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        outcomes = list(executor.map(one, range(requests)))
+    wall_time = time.time() - start
+
+    statuses: dict[int, int] = {}
+    for status, _ in outcomes:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(latency for status, latency in outcomes if status == 200) or [0.0]
+    return {
+        "requests": requests,
+        "statuses": statuses,
+        "wall_time": round(wall_time, 3),
+        "throughput": round(statuses.get(200, 0) / wall_time, 2) if wall_time else 0.0,
+        "latency": {
+            "p50": round(latencies[len(latencies) // 2], 3),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "max": round(latencies[-1], 3),
+        },
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py serve [loadtest]` and `python -m src.service [serve | loadtest]`"""
+    import sys
+    from src.config import SERVICE_TOKEN
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["loadtest"]:
+        load = argparse.ArgumentParser(prog="main.py serve loadtest", description="Load test a running Blink service")
+        load.add_argument("--url", default="http://127.0.0.1:8080")
+        load.add_argument("--requests", type=int, default=100)
+        load.add_argument("--concurrency", type=int, default=16)
+        load.add_argument("--clients", type=int, default=4)
+        load.add_argument("--path", default="/v1/generate")
+        load.add_argument("--token", default=SERVICE_TOKEN, help="Bearer token (default: BLINK_SERVICE_TOKEN)")
+        args = load.parse_args(argv[1:])
+        print(json.dumps(load_test(args.url, args.requests, args.concurrency, args.clients, args.path, token=args.token), indent=2))
+        return 0
+
+    if argv[:1] == ["serve"]:
+        argv = argv[1:]
+    serve = argparse.ArgumentParser(prog="main.py serve", description="Blink HTTP service")
+    serve.add_argument("--host")
+    serve.add_argument("--port", type=int)
+    serve.add_argument("--workers", type=int, help="Requests running at once")
+    serve.add_argument("--max-queue", type=int, help="Requests waiting before 503")
+    serve.add_argument("--per-client", type=int, help="Requests per client before 429")
+    serve.add_argument("--workspace", type=Path)
+    args = serve.parse_args(argv)
+
+    from src.enhanced_agent import EnhancedCodeAgent
+    agent = EnhancedCodeAgent(args.workspace)
+
+    try:
+        service = BlinkService(
+            agent,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            max_queued=args.max_queue,
+            per_client=args.per_client,
+        )
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 2
+    # Resolve the token (and warm the connection) before accepting traffic
+    agent.api_client
+    print(f"[OK] Blink service listening on {service.url} "
+          f"({service.workers} workers, queue {service.queue.max_queued}, {service.queue.per_client} per client"
+          f"{', token required' if service.token else ''})")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[EXIT] {service.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -1,10 +1,14 @@
 """Simplified AI Agent CLI - 6 essential commands only - WITH MCP SERVER"""
 
 import sys
+from contextlib import closing
 from pathlib import Path
+from typing import Iterator, Optional
 from src.enhanced_agent import EnhancedCodeAgent
 from src.robust_file_handler import RobustFileHandler
 from src.config import WORKSPACE_ROOT
+from src.prediction_tracker import cancel_all_predictions
+from src.metrics import get_metrics_registry
 
 
 class SimplifiedCLI:
@@ -33,6 +37,7 @@ list::          List files and folders (directory listing)
 generate::      AI code generation - analyze, extend, improve, create
 chat::          Chat with AI agent - paste code or ask questions
 history::       Show conversation history
+metrics::       Show API latency/traffic metrics (json or prometheus to dump)
 clear::         Clear session and conversation history (with confirmation)
 help::          Show this help message
 exit::          Exit and save session
@@ -73,14 +78,18 @@ USAGE EXAMPLES:
 6. VIEW HISTORY:
    blink> history::
 
-7. CLEAR SESSION:
+7. VIEW API METRICS:
+   blink> metrics::
+   blink> metrics:: prometheus
+
+8. CLEAR SESSION:
    blink> clear::
    (Clears current session with confirmation prompt)
 
-8. HELP:
+9. HELP:
    blink> help::
 
-9. EXIT:
+10. EXIT:
    blink> exit::
 
 ------------------------------------------------------------------------
@@ -169,12 +178,11 @@ USAGE EXAMPLES:
             
             print("[ANALYZING] Generating with full context...\n")
             
-            # Use the new full context method
-            result = self.agent.generate_code_with_full_context(instruction, paths)
-            
-            # Show result
+            # Use the new full context method, rendering output as it streams in
             print("─" * 70)
-            print(result)
+            result = self.stream_output(
+                self.agent.generate_code_with_full_context_stream(instruction, paths)
+            )
             print("─" * 70)
             print()
             
@@ -243,16 +251,19 @@ USAGE EXAMPLES:
         
         try:
             # Use the full context method for chat - same as generate
-            result = self.agent.generate_code_with_full_context(full_message, [])
+            # Very long outputs stop echoing after 5000 characters and are offered for saving
+            print("─" * 70)
+            result = self.stream_output(
+                self.agent.generate_code_with_full_context_stream(full_message, []),
+                display_limit=5000
+            )
+            print("─" * 70)
+            print()
             
             # If result is very long, offer to save directly
             result_length = len(result)
             if result_length > 5000:
                 print(f"[INFO] Generated {result_length} characters of code\n")
-                print("─" * 70)
-                print(result[:2000] + "\n... [OUTPUT TRUNCATED] ...\n" if result_length > 2000 else result)
-                print("─" * 70)
-                print()
                 
                 save = input("[SAVE] Save complete output to file? (y/n): ").strip().lower()
                 if save in ["y", "yes"]:
@@ -270,12 +281,6 @@ USAGE EXAMPLES:
                 else:
                     print("[INFO] Use 'read:: <filename>' to view saved files\n")
             else:
-                # Display result normally for shorter outputs
-                print("─" * 70)
-                print(result)
-                print("─" * 70)
-                print()
-                
                 save = input("[SAVE] Write to file? (y/n): ").strip().lower()
                 if save in ["y", "yes"]:
                     file_path = input("[PATH] Enter file path: ").strip().strip('"\'')
@@ -296,6 +301,35 @@ USAGE EXAMPLES:
             print(f"[ERROR] {e}\n")
             self.agent.memory.add_message("assistant", f"Error: {e}", "chat")
 
+    def stream_output(self, chunks: Iterator[str], display_limit: Optional[int] = None) -> str:
+        """
+        Print streamed output chunks as they arrive
+        
+        Args:
+            chunks: Iterator of text chunks
+            display_limit: Stop echoing after this many characters (still collects the rest)
+            
+        Returns:
+            The complete output
+        """
+        parts = []
+        shown = 0
+        
+        # closing() makes an interrupted stream cancel its prediction right away
+        with closing(chunks):
+            for chunk in chunks:
+                parts.append(chunk)
+                if display_limit is None or shown < display_limit:
+                    visible = chunk if display_limit is None else chunk[:display_limit - shown]
+                    print(visible, end="", flush=True)
+                    shown += len(visible)
+        
+        result = "".join(parts)
+        if display_limit is not None and len(result) > display_limit:
+            print("\n... [OUTPUT TRUNCATED] ...", end="")
+        print()
+        return result
+
     def handle_history_command(self):
         """Handle history command - show conversations"""
         print("\n" + "-" * 70)
@@ -322,6 +356,40 @@ USAGE EXAMPLES:
         
         print("\n" + "-" * 70 + "\n")
 
+    def handle_metrics_command(self, output_format: str = ""):
+        """Handle metrics command - show or dump prediction latency metrics"""
+        registry = get_metrics_registry()
+        
+        if output_format == "json":
+            print(registry.to_json() + "\n")
+            return
+        if output_format == "prometheus":
+            print(registry.to_prometheus())
+            return
+        
+        print("\n" + "-" * 70)
+        print("[METRICS] REPLICATE API")
+        print("-" * 70 + "\n")
+        
+        recent = registry.to_dict()["recent_predictions"]
+        if not recent:
+            print("No predictions recorded yet.\n")
+            return
+        
+        print(f"{'prediction':<28}{'status':<11}{'create':>8}{'queue':>8}{'run':>8}{'total':>8}{'polls':>7}{'retry':>6}")
+        for stats in recent[-10:]:
+            row = [
+                f"{stats[field]:.2f}" if stats.get(field) is not None else "-"
+                for field in ("create_seconds", "queue_seconds", "run_seconds", "total_seconds")
+            ]
+            print(
+                f"{stats['id'][:27]:<28}{str(stats.get('status')):<11}"
+                f"{row[0]:>8}{row[1]:>8}{row[2]:>8}{row[3]:>8}"
+                f"{stats.get('poll_count', 0):>7}{stats.get('retries', 0):>6}"
+            )
+        
+        print("\n" + "-" * 70 + "\n")
+
     def handle_clear_command(self):
         """Handle clear command - clear session and history with confirmation"""
         import os
@@ -379,11 +447,15 @@ USAGE EXAMPLES:
         
         return command, args
 
-    def main(self):
-        """Main CLI loop"""
+    def print_banner(self):
+        """Print everything shown before the first prompt"""
         self.print_header()
         print(f"Workspace: {WORKSPACE_ROOT}\n")
         print("Type 'help::' for commands or 'exit::' to quit.\n")
+
+    def main(self):
+        """Main CLI loop"""
+        self.print_banner()
         
         while True:
             try:
@@ -452,11 +524,16 @@ USAGE EXAMPLES:
                 elif command == "history":
                     self.handle_history_command()
                 
+                elif command == "metrics":
+                    self.handle_metrics_command(args.lower())
+                
                 else:
                     print(f"[ERROR] Unknown command: {command}\n")
                     print("Type 'help::' for available commands\n")
             
             except KeyboardInterrupt:
+                # Don't leave predictions running (and billing) on Replicate
+                cancel_all_predictions()
                 print("\n\n[EXIT] Session saved.")
                 try:
                     self.agent.memory.save_to_all_history()
@@ -470,6 +547,44 @@ USAGE EXAMPLES:
                 print(f"[ERROR] {e}\n")
 
 
+def measure_startup(started: float) -> dict:
+    """
+    Time from `started` until the CLI would show its first prompt
+    
+    Builds the CLI and renders the banner exactly as main() does, without
+    entering the input loop.
+    
+    Args:
+        started: time.perf_counter() taken before the CLI modules were imported
+        
+    Returns:
+        {"import_ms", "init_ms", "total_ms", "budget_ms", "within_budget",
+         "api_client_created", "memory_loaded"}
+    """
+    import io
+    import time
+    from contextlib import redirect_stdout
+    from src.config import STARTUP_BUDGET_MS
+    
+    imported = time.perf_counter()
+    cli = SimplifiedCLI()
+    with redirect_stdout(io.StringIO()):
+        cli.print_banner()
+    ready = time.perf_counter()
+    
+    total_ms = round((ready - started) * 1000, 1)
+    return {
+        "import_ms": round((imported - started) * 1000, 1),
+        "init_ms": round((ready - imported) * 1000, 1),
+        "total_ms": total_ms,
+        "budget_ms": STARTUP_BUDGET_MS,
+        "within_budget": total_ms <= STARTUP_BUDGET_MS,
+        # Both should stay False: nothing before the prompt needs them
+        "api_client_created": cli.agent._api_client is not None,
+        "memory_loaded": cli.agent._memory is not None,
+    }
+
+
 def main():
     """Entry point"""
     try:
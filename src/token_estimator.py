@@ -0,0 +1,102 @@
+"""Fast local approximation of model token counts"""
+
+import math
+import re
+
+
+# Context window and output cap per model family (tokens)
+MODEL_LIMITS = {
+    "claude": {"context_window": 200_000, "max_output": 8_192},
+    "llama": {"context_window": 128_000, "max_output": 4_096},
+    "gpt": {"context_window": 128_000, "max_output": 16_384},
+}
+DEFAULT_LIMITS = {"context_window": 32_000, "max_output": 4_096}
+
+# Words, numbers, runs of punctuation, and single non-ASCII characters
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]+|\S", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens `text` uses
+
+    BPE tokenizers for Claude-class models spend roughly one token per
+    short word, one per ~4 characters of a long word, one per 3 digits and
+    about one per 1-2 punctuation characters. Code-heavy prompts land
+    within ~10% of the real count, erring high.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isalpha() and first.isascii():
+            tokens += math.ceil(len(piece) / 4)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif first.isascii():
+            tokens += math.ceil(len(piece) / 2)
+        else:
+            # CJK, emoji, accented letters: usually one token or more each
+            tokens += len(piece)
+
+    # Newlines and indentation runs are their own tokens in code
+    tokens += text.count("\n")
+    return tokens
+
+
+def model_limits(model: str) -> dict:
+    """
+    Context window and maximum output tokens for a model
+
+    Args:
+        model: Model identifier, e.g. "anthropic/claude-4.5-sonnet"
+
+    Returns:
+        {"context_window": int, "max_output": int}
+    """
+    name = model.lower()
+    for family, limits in MODEL_LIMITS.items():
+        if family in name:
+            return dict(limits)
+    return dict(DEFAULT_LIMITS)
+
+
+def trim_to_tokens(text: str, max_tokens: int, marker: str = "\n... [TRUNCATED] ...\n") -> str:
+    """
+    Cut `text` so it fits in roughly `max_tokens`, keeping the head and tail
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget for the result
+        marker: Inserted where text was removed
+
+    Returns:
+        The original text if it fits, otherwise a trimmed version
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= estimate_tokens(marker):
+        return ""
+
+    # Binary search for the longest head+tail split that fits
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        head = text[: mid * 2 // 3]
+        tail = text[len(text) - mid // 3:] if mid // 3 else ""
+        if estimate_tokens(head + marker + tail) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+
+    head = text[: low * 2 // 3]
+    tail = text[len(text) - low // 3:] if low // 3 else ""
+    return head + marker + tail
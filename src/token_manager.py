@@ -2,9 +2,10 @@
 
 import os
 import sys
-import requests
 from pathlib import Path
 from typing import Optional
+from src.config import REPLICATE_API_BASE, REPLICATE_API_TOKEN
+from src.http_transport import get_transport
 
 
 class TokenManager:
@@ -57,8 +58,8 @@ class TokenManager:
             }
             
             # Simple test - check if we can access the account API
-            response = requests.get(
-                "https://api.replicate.com/v1/account",
+            response = get_transport().get(
+                f"{REPLICATE_API_BASE}/account",
                 headers=headers,
                 timeout=5
             )
@@ -68,7 +69,9 @@ class TokenManager:
             return False
     
     def get_token(self) -> str:
-        """Get token, prompt if not set"""
+        """Get token, from REPLICATE_API_TOKEN if set, otherwise prompt"""
+        if not self.token and REPLICATE_API_TOKEN:
+            self.token = REPLICATE_API_TOKEN
         if not self.token:
             self.prompt_for_token()
         return self.token
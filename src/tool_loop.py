@@ -0,0 +1,213 @@
+"""Multi-turn MCP tool-use loop: parse tool calls, run them, feed results back"""
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.config import (
+    MCP_MAX_TURNS,
+    MCP_MAX_TOKENS,
+    MCP_MAX_SECONDS,
+    MCP_TOOL_CONCURRENCY,
+    MCP_TOOL_RESULT_TOKENS,
+    MIN_OUTPUT_TOKENS,
+    PROMPT_SAFETY_MARGIN,
+)
+from src.token_estimator import estimate_tokens, trim_to_tokens
+
+
+TOOL_CALL_PATTERN = re.compile(
+    r"\[MCP_TOOL_CALL:\s*([\w.-]+)\s*\](.*?)\[/MCP_TOOL_CALL\]",
+    re.DOTALL
+)
+
+FINAL_ANSWER_PROMPT = "\n\nNo more tool calls are available. Give your final answer now."
+
+
+def parse_tool_calls(text: str) -> list[dict]:
+    """
+    Find the [MCP_TOOL_CALL: name]{json}[/MCP_TOOL_CALL] blocks in a response
+
+    Args:
+        text: Model output
+
+    Returns:
+        [{"name": str, "args": dict, "error": Optional[str]}] in order of appearance;
+        "error" is set when the arguments are not a JSON object
+    """
+    calls = []
+    for match in TOOL_CALL_PATTERN.finditer(text):
+        body = match.group(2).strip()
+        # Tolerate arguments wrapped in a code fence
+        body = re.sub(r"^```\w*\s*|\s*```$", "", body)
+        error = None
+        try:
+            args = json.loads(body) if body else {}
+            if not isinstance(args, dict):
+                args, error = {}, "Tool arguments must be a JSON object"
+        except json.JSONDecodeError as e:
+            args, error = {}, f"Invalid JSON arguments: {e}"
+        calls.append({"name": match.group(1), "args": args, "error": error})
+    return calls
+
+
+def strip_tool_calls(text: str) -> str:
+    """Remove tool-call blocks, leaving the model's prose/answer"""
+    return TOOL_CALL_PATTERN.sub("", text).strip()
+
+
+class MCPToolLoop:
+    """
+    Runs a model against BlinkMCPServer tools until it gives a final answer
+
+    Each turn the model's response is scanned for tool-call blocks. All calls
+    from one turn run concurrently, their results are appended to the
+    conversation and the model is asked again. A response without tool
+    calls is the final answer. Turn, token and wall-clock budgets bound the
+    loop, as does the model's context window. On the last allowed turn the
+    model is told to answer without tools; when another budget runs out
+    first, one extra turn asks it to answer from what it has gathered.
+    """
+
+    def __init__(
+        self,
+        client,
+        mcp_server,
+        max_turns: int = MCP_MAX_TURNS,
+        max_tokens: int = MCP_MAX_TOKENS,
+        max_seconds: float = MCP_MAX_SECONDS,
+        tool_concurrency: int = MCP_TOOL_CONCURRENCY,
+        result_tokens: int = MCP_TOOL_RESULT_TOKENS,
+    ):
+        """
+        Args:
+            client: ReplicateClient used for each turn
+            mcp_server: BlinkMCPServer that executes the tools
+            max_turns: Maximum model calls
+            max_tokens: Maximum prompt plus output tokens across all turns
+                (the closing answer turn may go over it)
+            max_seconds: Wall-clock budget for the whole loop
+            tool_concurrency: Maximum tool calls running at once
+            result_tokens: Each tool result is trimmed to this many tokens
+        """
+        self.client = client
+        self.mcp_server = mcp_server
+        self.max_turns = max(1, max_turns)
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.tool_concurrency = max(1, tool_concurrency)
+        self.result_tokens = result_tokens
+
+    def run(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        """
+        Run the loop
+
+        Args:
+            prompt: Task plus tool instructions
+            system_prompt: System prompt sent with every turn
+
+        Returns:
+            {"output": final answer, "turns": model calls, "tool_calls": [...],
+             "tokens": estimated tokens used, "elapsed": seconds,
+             "stopped": "final_answer" | "max_turns" | "max_tokens" | "max_seconds"}
+        """
+        start = time.time()
+        conversation = prompt
+        tokens_used = 0
+        tool_log = []
+        results_cache: dict[str, str] = {}
+        output = ""
+        stopped = "max_turns"
+        turns = 0
+
+        while turns < self.max_turns:
+            last_turn = turns == self.max_turns - 1
+            turn_prompt = conversation
+            if last_turn:
+                turn_prompt += FINAL_ANSWER_PROMPT
+
+            budget = self.client.prompt_budget(turn_prompt, system_prompt)
+            prompt_tokens = budget["prompt_tokens"]
+            if turns and (tokens_used + prompt_tokens > self.max_tokens or not budget["fits"]):
+                stopped = "max_tokens"
+                break
+            if turns and time.time() - start >= self.max_seconds:
+                stopped = "max_seconds"
+                break
+
+            response = self.client.generate(turn_prompt, system_prompt=system_prompt)
+            turns += 1
+            tokens_used += prompt_tokens + estimate_tokens(response)
+            output = response
+
+            calls = parse_tool_calls(response)
+            if not calls or last_turn:
+                stopped = "final_answer" if not calls else "max_turns"
+                break
+
+            results = self._run_tools(calls, results_cache)
+            tool_log.extend(
+                {"turn": turns, "name": call["name"], "args": call["args"], "elapsed": elapsed}
+                for call, (_, elapsed) in zip(calls, results)
+            )
+            conversation += f"\n\n{response.strip()}\n\n" + "\n\n".join(
+                f"[MCP_TOOL_RESULT: {call['name']}]\n{result}\n[/MCP_TOOL_RESULT]"
+                for call, (result, _) in zip(calls, results)
+            ) + "\n\nContinue. Call more tools if you still need information; otherwise give the final answer without any tool calls."
+
+        if stopped in ("max_tokens", "max_seconds"):
+            # The last response only asked for more tools; get an answer from what was gathered
+            turn_prompt = self._final_answer_prompt(conversation, system_prompt)
+            output = self.client.generate(turn_prompt, system_prompt=system_prompt)
+            turns += 1
+            tokens_used += self.client.prompt_budget(turn_prompt, system_prompt)["prompt_tokens"] + estimate_tokens(output)
+
+        return {
+            "output": strip_tool_calls(output),
+            "turns": turns,
+            "tool_calls": tool_log,
+            "tokens": tokens_used,
+            "elapsed": round(time.time() - start, 3),
+            "stopped": stopped
+        }
+
+    def _final_answer_prompt(self, conversation: str, system_prompt: Optional[str]) -> str:
+        """The conversation plus the answer-now instruction, trimmed to the model's window"""
+        prompt = conversation + FINAL_ANSWER_PROMPT
+        budget = self.client.prompt_budget(prompt, system_prompt)
+        if budget["fits"]:
+            return prompt
+
+        # Keep the task at the head and the newest tool results at the tail
+        room = (
+            budget["context_window"] - estimate_tokens(system_prompt or "") - estimate_tokens(FINAL_ANSWER_PROMPT)
+            - MIN_OUTPUT_TOKENS - PROMPT_SAFETY_MARGIN
+        )
+        return trim_to_tokens(conversation, room) + FINAL_ANSWER_PROMPT
+
+    def _run_tools(self, calls: list[dict], cache: dict[str, str]) -> list[tuple[str, float]]:
+        """Execute one turn's tool calls concurrently; returns (result, seconds) per call"""
+        def run(call: dict) -> tuple[str, float]:
+            started = time.time()
+            if call["error"]:
+                return json.dumps({"success": False, "error": call["error"]}), 0.0
+            key = json.dumps([call["name"], call["args"]], sort_keys=True)
+            if key in cache:
+                return cache[key], 0.0
+            try:
+                result = self.mcp_server.handle_tool_call(call["name"], call["args"])
+            except Exception as e:
+                result = json.dumps({"success": False, "error": str(e)})
+            result = trim_to_tokens(result, self.result_tokens)
+            cache[key] = result
+            return result, round(time.time() - started, 3)
+
+        if len(calls) == 1:
+            return [run(calls[0])]
+        with ThreadPoolExecutor(
+            max_workers=min(self.tool_concurrency, len(calls)),
+            thread_name_prefix="blink-mcp-tool"
+        ) as executor:
+            return list(executor.map(run, calls))
@@ -0,0 +1,153 @@
+"""Completion-wait strategies for Replicate predictions"""
+
+import random
+import statistics
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional
+
+
+class WaitStrategy(ABC):
+    """Decides how a prediction is created and how long to sleep between polls"""
+
+    name = "base"
+
+    # Request timeout for the create call
+    create_timeout: float = 30
+
+    def create_headers(self) -> dict:
+        """Extra headers to send with the create request"""
+        return {}
+
+    @abstractmethod
+    def next_delay(self, poll_count: int, elapsed: float) -> float:
+        """
+        Seconds to sleep before the next poll
+
+        Args:
+            poll_count: Number of polls already made for this prediction
+            elapsed: Seconds since the prediction was created
+
+        Returns:
+            Delay in seconds
+        """
+
+    def observe(self, run_time: float):
+        """Record how long a finished prediction took, end to end"""
+
+
+class FixedPollStrategy(WaitStrategy):
+    """Poll at a constant interval (the original behaviour)"""
+
+    name = "fixed"
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+
+    def next_delay(self, poll_count: int, elapsed: float) -> float:
+        return self.interval
+
+
+class AdaptivePollStrategy(WaitStrategy):
+    """
+    Poll fast at first, back off exponentially with jitter, and skip ahead
+    to the typical completion time learned from recent predictions
+    """
+
+    name = "adaptive"
+
+    def __init__(
+        self,
+        initial_delay: float = 0.2,
+        backoff: float = 1.5,
+        max_delay: float = 5.0,
+        jitter: float = 0.2,
+        history_size: int = 20,
+    ):
+        """
+        Args:
+            initial_delay: First delay, and the interval used near the expected finish
+            backoff: Multiplier applied per poll
+            max_delay: Upper bound on any single delay
+            jitter: Relative random spread applied to each delay (0.2 = +/-20%)
+            history_size: Number of recent run times used for tuning
+        """
+        self.initial_delay = initial_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.run_times: deque = deque(maxlen=history_size)
+
+    def observe(self, run_time: float):
+        self.run_times.append(run_time)
+
+    def expected_run_time(self) -> Optional[float]:
+        """Median of recently observed run times, if any"""
+        if not self.run_times:
+            return None
+        return statistics.median(self.run_times)
+
+    def next_delay(self, poll_count: int, elapsed: float) -> float:
+        delay = self.initial_delay * (self.backoff ** poll_count)
+
+        expected = self.expected_run_time()
+        if expected is not None:
+            if elapsed < expected * 0.8:
+                # Nothing to see yet: sleep until shortly before the usual finish
+                delay = max(delay, expected * 0.8 - elapsed)
+            elif elapsed < expected * 1.5:
+                # Around the usual finish: poll quickly
+                delay = self.initial_delay
+
+        delay = min(delay, self.max_delay)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(delay, 0.0)
+
+
+class SyncWaitStrategy(AdaptivePollStrategy):
+    """
+    Ask Replicate to hold the create request open until the prediction
+    finishes (`Prefer: wait`), then fall back to adaptive polling for
+    predictions that outlive the wait window
+    """
+
+    name = "sync"
+
+    def __init__(self, wait_seconds: int = 60, **kwargs):
+        """
+        Args:
+            wait_seconds: Seconds the API may block the create call (1-60)
+            **kwargs: Adaptive polling options for the fallback
+        """
+        super().__init__(**kwargs)
+        self.wait_seconds = max(1, min(int(wait_seconds), 60))
+        self.create_timeout = 30 + self.wait_seconds
+
+    def create_headers(self) -> dict:
+        return {"Prefer": f"wait={self.wait_seconds}"}
+
+
+WAIT_STRATEGIES = {
+    FixedPollStrategy.name: FixedPollStrategy,
+    AdaptivePollStrategy.name: AdaptivePollStrategy,
+    SyncWaitStrategy.name: SyncWaitStrategy,
+}
+
+
+def get_wait_strategy(name: str) -> WaitStrategy:
+    """
+    Build a wait strategy by name
+
+    Args:
+        name: One of "fixed", "adaptive" or "sync"
+
+    Returns:
+        A new strategy instance
+    """
+    try:
+        return WAIT_STRATEGIES[name.lower()]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown wait strategy: {name} (choose from {', '.join(WAIT_STRATEGIES)})"
+        )
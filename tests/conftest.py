@@ -0,0 +1,54 @@
+"""Shared fixtures: a local mock Replicate API and clients pointed at it"""
+
+import os
+import tempfile
+
+# src.config reads these at import time, so they must be set before src is imported
+os.environ.setdefault("REPLICATE_API_TOKEN", "mocktokenmocktokenmock")
+os.environ["BLINK_HTTP_PRECONNECT"] = "0"
+os.environ["BLINK_PREDICTION_ENDPOINT"] = "model"
+os.environ["BLINK_RESPONSE_CACHE"] = "0"
+os.environ["BLINK_MODEL_VERSION_CACHE"] = os.path.join(tempfile.mkdtemp(prefix="blink-tests-"), "model_versions.json")
+
+import pytest
+
+from src.mock_replicate import MockReplicateServer
+from src.model_versions import ModelVersionResolver
+from src.rate_limiter import RequestScheduler
+from src.replicate_api import ReplicateClient
+from src.wait_strategy import AdaptivePollStrategy
+
+
+MOCK_TOKEN = "mocktokenmocktokenmock"
+
+
+@pytest.fixture
+def mock_api():
+    """A running MockReplicateServer with short predictions"""
+    with MockReplicateServer(run_time=0.1, output_tokens=20, seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def client(mock_api):
+    """ReplicateClient against mock_api with fast polling and its own rate budget"""
+    return make_client(mock_api)
+
+
+@pytest.fixture
+def client_for():
+    """make_client, for tests that need non-default client options"""
+    return make_client
+
+
+def make_client(server: MockReplicateServer, **kwargs) -> ReplicateClient:
+    """ReplicateClient against `server`; keyword arguments override the test defaults"""
+    options = {
+        "api_token": MOCK_TOKEN,
+        "base_url": server.url,
+        "wait_strategy": AdaptivePollStrategy(initial_delay=0.02, jitter=0),
+        "scheduler": RequestScheduler(backoff_base=0.01),
+        "resolver": ModelVersionResolver(cache_path=None),
+    }
+    options.update(kwargs)
+    return ReplicateClient(**options)
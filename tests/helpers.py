@@ -0,0 +1,17 @@
+"""Small helpers shared by the test modules"""
+
+import time
+
+
+def full_output(tokens: int) -> str:
+    """What the mock API outputs for a prediction of `tokens` tokens"""
+    return "".join(f"token{i} " for i in range(tokens))
+
+
+def wait_until(condition, timeout: float = 5.0):
+    """Poll `condition` until it holds, failing the test after `timeout` seconds"""
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.02)
@@ -0,0 +1,85 @@
+"""AsyncReplicateClient against the mock API"""
+
+import asyncio
+import threading
+
+from helpers import full_output, wait_until
+from src.async_replicate_api import AsyncReplicateClient
+from src.mock_replicate import MOCK_VERSION
+from src.prediction_tracker import get_prediction_tracker
+from src.wait_strategy import AdaptivePollStrategy, SyncWaitStrategy
+
+
+def test_many_predictions_on_one_loop(client, mock_api):
+    async def main():
+        async_client = AsyncReplicateClient(client)
+        try:
+            return await asyncio.gather(*(async_client.generate(f"p{i}", max_tokens=50) for i in range(12)))
+        finally:
+            await async_client.aclose()
+
+    assert asyncio.run(main()) == [full_output(20)] * 12
+    assert mock_api.counters["created"] == 12
+
+
+def test_model_version_is_resolved_off_the_loop(client_for, mock_api):
+    client = client_for(mock_api, prediction_endpoint="version")
+    fetched_on = []
+    fetch = client._fetch_latest_version
+
+    def recording_fetch(model):
+        fetched_on.append(threading.current_thread())
+        return fetch(model)
+
+    client._fetch_latest_version = recording_fetch
+
+    async def main():
+        async_client = AsyncReplicateClient(client)
+        try:
+            return await async_client.generate("hello", max_tokens=50)
+        finally:
+            await async_client.aclose()
+
+    assert asyncio.run(main()) == full_output(20)
+    assert client.model_version() == MOCK_VERSION
+    assert fetched_on and threading.main_thread() not in fetched_on
+
+
+def test_sync_strategy_is_polled_instead(client_for, mock_api):
+    mock_api.run_time = 0.3
+    client = client_for(mock_api, wait_strategy=SyncWaitStrategy(wait_seconds=5))
+
+    async def main():
+        async_client = AsyncReplicateClient(client)
+        try:
+            assert isinstance(async_client.wait_strategy, AdaptivePollStrategy)
+            assert not async_client.wait_strategy.create_headers()
+            return await async_client.generate("hello", max_tokens=50)
+        finally:
+            await async_client.aclose()
+
+    assert asyncio.run(main()) == full_output(20)
+    # Prefer: wait would have answered the create with the finished prediction
+    assert mock_api.counters["requests"] > mock_api.counters["created"]
+
+
+def test_cancelling_the_task_cancels_the_prediction(client, mock_api):
+    mock_api.run_time = 10
+
+    async def main():
+        async_client = AsyncReplicateClient(client)
+        try:
+            task = async_client.submit("hello", max_tokens=50)
+            while not get_prediction_tracker().in_flight():
+                await asyncio.sleep(0.02)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        finally:
+            await async_client.aclose()
+
+    asyncio.run(main())
+    wait_until(lambda: mock_api.counters["canceled"] == 1)
+    assert get_prediction_tracker().in_flight() == []
@@ -0,0 +1,58 @@
+"""Workspace-wide refactoring: target resolution and staged application"""
+
+import pytest
+
+from src.batch_refactor import StagedRefactor, resolve_targets
+from src.file_handler import FileHandler
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "workspace"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "a.py").write_text("x = 1\n")
+    (root / "src" / "pkg" / "b.py").write_text("y = 2\n")
+    (root / "notes.txt").write_text("notes\n")
+    (tmp_path / "outside.py").write_text("secret = 3\n")
+    return root
+
+
+def test_globs_and_paths_resolve_to_workspace_relative_files(workspace):
+    assert resolve_targets(workspace, "src/**/*.py") == ["src/a.py", "src/pkg/b.py"]
+    assert resolve_targets(workspace, ["notes.txt", "src/*.py", "src/./a.py"]) == ["notes.txt", "src/a.py"]
+    assert resolve_targets(workspace, str(workspace / "src" / "*.py")) == ["src/a.py"]
+
+
+@pytest.mark.parametrize("target", ["../*.py", "/etc/*.conf", "../outside.py", "/etc/hosts", "src/../../outside.py"])
+def test_targets_outside_the_workspace_are_refused(workspace, target):
+    with pytest.raises(PermissionError, match="outside the workspace"):
+        resolve_targets(workspace, target)
+
+
+def test_symlinks_out_of_the_workspace_are_refused(workspace):
+    (workspace / "src" / "link.py").symlink_to(workspace.parent / "outside.py")
+
+    with pytest.raises(PermissionError):
+        resolve_targets(workspace, "src/*.py")
+
+
+def test_staged_changes_apply_together(workspace):
+    handler = FileHandler(workspace)
+    paths = resolve_targets(workspace, "src/**/*.py")
+    staged = StagedRefactor(handler, lambda code, rules: code.upper(), paths, "uppercase", concurrency=2)
+
+    assert staged.summary()["counts"] == {"changed": 2}
+    assert (workspace / "src" / "a.py").read_text() == "x = 1\n"
+
+    result = staged.apply()
+    assert result["counts"] == {"applied": 2}
+    assert (workspace / "src" / "pkg" / "b.py").read_text() == "Y = 2\n"
+
+
+def test_files_edited_after_staging_are_not_overwritten(workspace):
+    handler = FileHandler(workspace)
+    staged = StagedRefactor(handler, lambda code, rules: code.upper(), ["src/a.py"], "uppercase")
+    (workspace / "src" / "a.py").write_text("x = 10\n")
+
+    assert staged.apply()["counts"] == {"conflict": 1}
+    assert (workspace / "src" / "a.py").read_text() == "x = 10\n"
@@ -0,0 +1,42 @@
+"""Cancelling predictions: closed streams, and batches cancelling only their own calls"""
+
+import threading
+
+import pytest
+
+from helpers import wait_until
+from src.batch import BatchJob
+from src.prediction_tracker import get_prediction_tracker
+
+
+def test_closing_stream_cancels_prediction(client, mock_api):
+    mock_api.run_time = 10
+    mock_api.output_tokens = 500
+
+    stream = client.generate_stream("hello", max_tokens=1000)
+    assert next(stream) == "token0 "
+    stream.close()
+
+    assert mock_api.counters["canceled"] == 1
+    assert get_prediction_tracker().in_flight() == []
+
+
+def test_batch_cancel_only_cancels_its_own_predictions(client, mock_api):
+    mock_api.run_time = 10
+    tracker = get_prediction_tracker()
+
+    def outside_batch():
+        with pytest.raises(RuntimeError):
+            client.generate("outside", max_tokens=50)
+
+    other = threading.Thread(target=outside_batch, daemon=True)
+    other.start()
+    batch = BatchJob(lambda prompt: client.generate(prompt, max_tokens=50), ["a", "b", "c"], concurrency=3)
+    wait_until(lambda: len(tracker.in_flight(batch.job_id)) == 3 and len(tracker.in_flight()) == 4)
+
+    assert batch.cancel() == 3
+    assert all(not result["success"] for result in batch.results())
+    assert len(tracker.in_flight()) == 1
+
+    tracker.cancel_all()
+    other.join(5)
@@ -0,0 +1,56 @@
+"""Relevance-ranked context selection within a token budget"""
+
+from src.context_retrieval import ContextRetriever, chunk_text, tokenize
+from src.token_estimator import estimate_tokens
+
+
+def filler(name: str, count: int) -> str:
+    """A block of unrelated functions"""
+    return "".join(f"def {name}_{i}(value):\n    return value + {i}\n\n" for i in range(count))
+
+
+def test_tokenize_splits_identifiers():
+    terms = tokenize("class TemperatureSensor: read_celsius()")
+    assert {"temperaturesensor", "temperature", "sensor", "read", "celsius"} <= set(terms)
+    assert "class" not in terms
+
+
+def test_chunks_overlap_and_cover_the_file():
+    text = "".join(f"line {i}\n" for i in range(1, 151))
+    chunks = chunk_text("a.txt", text, max_lines=60, overlap=10)
+
+    assert chunks[0]["start"] == 1 and chunks[-1]["end"] == 150
+    assert all(b["start"] <= a["end"] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_small_files_are_used_whole(tmp_path):
+    files = {"a.py": "x = 1\n", "b.py": "y = 2\n"}
+
+    selected = ContextRetriever(tmp_path).select("anything", files, budget=1000)
+    assert [chunk["text"] for chunk in selected] == ["x = 1\n", "y = 2\n"]
+
+
+def test_relevant_chunks_win_within_the_budget(tmp_path):
+    code = filler("padding", 60) + "def parse_invoice_total(invoice):\n    return sum(invoice.lines)\n\n" + filler("more", 60)
+    files = {"billing.py": code}
+    budget = estimate_tokens(code) // 4
+
+    selected = ContextRetriever(tmp_path).select("fix parse_invoice_total for empty invoices", files, budget)
+
+    assert sum(estimate_tokens(chunk["text"]) for chunk in selected) <= budget
+    assert any("parse_invoice_total" in chunk["text"] for chunk in selected)
+
+
+def test_workspace_files_are_searched_and_cached(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "sensor.py").write_text("class TemperatureSensor:\n    def read_celsius(self):\n        return 21\n")
+    (tmp_path / "src" / "other.py").write_text(filler("unrelated", 5))
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "sensor.js").write_text("TemperatureSensor")
+    retriever = ContextRetriever(tmp_path)
+
+    selected = retriever.select("temperature sensor in celsius", {}, budget=200, include_workspace=True)
+    assert [chunk["path"] for chunk in selected] == ["src/sensor.py"]
+
+    retriever.warm()
+    assert set(retriever._workspace_chunks) == {"src/sensor.py", "src/other.py"}
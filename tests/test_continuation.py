@@ -0,0 +1,83 @@
+"""Continuing outputs cut off at max_tokens, and stitching the pieces"""
+
+import asyncio
+
+from helpers import full_output
+from src.async_replicate_api import AsyncReplicateClient
+from src.replicate_api import _stitch, _stitch_stream
+
+
+def test_stream_continues_truncated_output(client, mock_api):
+    mock_api.output_tokens = 100
+
+    output = "".join(client.generate_stream("hello", max_tokens=30, max_total_tokens=1000))
+
+    # The mock restarts from token0, so stitching must drop the repeated prefix
+    assert output == full_output(100)
+    assert mock_api.counters["created"] == 2
+
+
+def test_generate_continues_truncated_output(client, mock_api):
+    mock_api.output_tokens = 100
+
+    assert client.generate("hello", max_tokens=30, max_total_tokens=1000) == full_output(100)
+    assert mock_api.counters["created"] == 2
+
+
+def test_async_generate_continues_truncated_output(client, mock_api):
+    mock_api.output_tokens = 100
+
+    async def main():
+        async_client = AsyncReplicateClient(client)
+        try:
+            return await async_client.generate("hello", max_tokens=30, max_total_tokens=1000)
+        finally:
+            await async_client.aclose()
+
+    assert asyncio.run(main()) == full_output(100)
+    assert mock_api.counters["created"] == 2
+
+
+def test_continuation_can_be_disabled(client, mock_api):
+    mock_api.output_tokens = 100
+
+    output = "".join(client.generate_stream("hello", max_tokens=30, continue_truncated=False))
+    assert output == full_output(30)
+    assert mock_api.counters["created"] == 1
+
+
+def test_continuations_stop_at_the_total_cap(client, mock_api):
+    mock_api.output_tokens = 1000
+
+    # The first piece alone is ~90 estimated tokens, so one short continuation fills the cap
+    client.generate("hello", max_tokens=30, max_total_tokens=100)
+    assert mock_api.counters["created"] == 2
+
+
+def test_stitch_drops_overlap():
+    assert _stitch("def add(a, b):\n    return", "    return a + b\n") == "def add(a, b):\n    return a + b\n"
+    # Short coincidental overlaps are kept
+    assert _stitch("x = 1\n", "\ny = 2") == "x = 1\n\ny = 2"
+
+
+def test_stitch_stream_matches_stitch():
+    partial = "".join(f"line {i}\n" for i in range(100))
+    continuation = "".join(f"line {i}\n" for i in range(90, 200))
+    chunks = [continuation[i:i + 7] for i in range(0, len(continuation), 7)]
+
+    def stream():
+        yield from chunks
+        return {"status": "succeeded"}, continuation
+
+    stitched = _stitch_stream(partial, stream())
+    added = []
+    while True:
+        try:
+            added.append(next(stitched))
+        except StopIteration as stop:
+            prediction, piece, output = stop.value
+            break
+
+    assert output == _stitch(partial, continuation)
+    assert partial + "".join(added) == output
+    assert piece == continuation
@@ -0,0 +1,124 @@
+"""Resident daemon over a Unix socket (and the TCP fallback), with the agent pointed at the mock API"""
+
+import socket
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import src.daemon
+from src.daemon import BlinkDaemon, DaemonClient
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def start(daemon: BlinkDaemon, ready: Path):
+    """Serve `daemon` on a thread until `ready` exists; returns the thread"""
+    thread = threading.Thread(target=daemon.serve_forever, kwargs={"warm": False}, daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while not ready.exists() and time.time() < deadline:
+        time.sleep(0.02)
+    return thread
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    (workspace / "app.py").write_text("print('hi')\n", encoding="utf-8")
+    return workspace
+
+
+@pytest.fixture
+def daemon(workspace, client):
+    # Unix socket paths are limited to ~100 bytes, so keep this one short
+    socket_path = Path(tempfile.mkdtemp(prefix="blink-")) / "d.sock"
+
+    daemon = BlinkDaemon(socket_path=socket_path, workspace_root=workspace, token="")
+    daemon.agent().api_client = client
+    thread = start(daemon, socket_path)
+    yield daemon
+    daemon.shutdown()
+    thread.join(5)
+
+
+@pytest.fixture
+def tcp_daemon(workspace, client, monkeypatch):
+    monkeypatch.setattr(src.daemon, "_has_unix_sockets", lambda: False)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    socket_path = Path(tempfile.mkdtemp(prefix="blink-")) / "d.sock"
+
+    daemon = BlinkDaemon(socket_path=socket_path, port=port, workspace_root=workspace, token="")
+    daemon.agent().api_client = client
+    thread = start(daemon, daemon.token_path)
+    yield daemon
+    daemon.shutdown()
+    thread.join(5)
+
+
+def test_ping_and_errors(daemon):
+    with DaemonClient(socket_path=daemon.socket_path) as client:
+        assert client.request("ping")["requests"] == 1
+        with pytest.raises(RuntimeError, match="Unknown method"):
+            client.request("deploy")
+        with pytest.raises(RuntimeError, match="instruction"):
+            client.request("generate")
+
+
+def test_generate_streams_chunks(daemon, mock_api):
+    chunks = []
+    with DaemonClient(socket_path=daemon.socket_path) as client:
+        result = client.request("generate", {"instruction": "Add logging", "files": ["app.py"], "stream": True}, chunks.append)
+
+    assert len(chunks) == 20
+    assert "".join(chunks) == result
+
+
+def test_mcp_tool(daemon):
+    with DaemonClient(socket_path=daemon.socket_path) as client:
+        reply = client.request("mcp", {"tool": "read_file", "args": {"path": "app.py"}})
+    assert reply["content"] == "print('hi')\n"
+
+
+def test_refuses_to_start_twice(daemon):
+    with pytest.raises(RuntimeError, match="already running"):
+        BlinkDaemon(socket_path=daemon.socket_path).serve_forever(warm=False)
+
+
+def test_socket_is_owner_only_from_the_start(daemon):
+    assert stat.S_IMODE(daemon.socket_path.stat().st_mode) & 0o077 == 0
+
+
+def test_paths_outside_the_workspace_are_refused(daemon):
+    with DaemonClient(socket_path=daemon.socket_path) as client:
+        for method, params in (
+            ("generate", {"instruction": "x", "files": ["../secret.py"]}),
+            ("generate", {"instruction": "x", "output": "/tmp/out.py"}),
+            ("edit", {"instruction": "x", "file": "/etc/hosts"}),
+            ("mcp", {"tool": "list_directory", "args": {"directory": ".."}}),
+        ):
+            with pytest.raises(RuntimeError, match="outside the workspace"):
+                client.request(method, params)
+
+
+def test_tcp_fallback_requires_the_token(tcp_daemon):
+    assert stat.S_IMODE(tcp_daemon.token_path.stat().st_mode) == 0o600
+    assert tcp_daemon.token_path.read_text() == tcp_daemon.token
+
+    with DaemonClient(socket_path=tcp_daemon.socket_path, port=tcp_daemon.port, token="wrong") as client:
+        with pytest.raises(RuntimeError, match="Unauthorized"):
+            client.request("ping")
+        # The connection is closed after a bad token
+        with pytest.raises((ConnectionError, OSError)):
+            client.request("ping")
+
+    # Same-user clients pick the token up from the file
+    with DaemonClient(socket_path=tcp_daemon.socket_path, port=tcp_daemon.port) as client:
+        assert client.request("mcp", {"tool": "read_file", "args": {"path": "app.py"}})["content"] == "print('hi')\n"
@@ -0,0 +1,71 @@
+"""Hedged requests: percentile thresholds, and racing a slow prediction against the mock API"""
+
+import time
+
+from helpers import full_output
+from src.hedging import LatencyTracker, percentile
+
+
+def slow_first_prediction(server, run_time: float):
+    """Make the next prediction the mock creates take `run_time` seconds"""
+    real_create = server.create
+    slow = [True]
+
+    def create(payload, model):
+        normal = server.run_time
+        if slow[0]:
+            slow[0] = False
+            server.run_time = run_time
+        try:
+            return real_create(payload, model)
+        finally:
+            server.run_time = normal
+
+    server.create = create
+
+
+def warmed_tracker(seconds: float) -> LatencyTracker:
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(5):
+        tracker.record_start(0.0)
+        tracker.record_total(seconds)
+    return tracker
+
+
+def test_percentile():
+    assert percentile([5, 1, 4, 2, 3], 50) == 3
+    assert percentile([5, 1, 4, 2, 3], 100) == 5
+    assert percentile([7], 95) == 7
+
+
+def test_no_hedging_without_enough_samples():
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record_total(0.1)
+    assert not tracker.should_hedge("processing", 100, 95)
+
+    tracker.record_total(0.1)
+    tracker.record_total(0.1)
+    assert tracker.should_hedge("processing", 0.2, 95)
+    assert not tracker.should_hedge("processing", 0.05, 95)
+
+
+def test_slow_prediction_is_raced_and_the_loser_cancelled(client_for, mock_api):
+    client = client_for(mock_api, hedge=True)
+    client.latency = warmed_tracker(0.1)
+    slow_first_prediction(mock_api, 10)
+
+    start = time.time()
+    assert client.generate("hello", max_tokens=50, temperature=0) == full_output(20)
+
+    assert time.time() - start < 5
+    assert mock_api.counters["created"] == 2
+    assert mock_api.counters["canceled"] == 1
+
+
+def test_sampled_requests_are_never_hedged(client_for, mock_api):
+    client = client_for(mock_api, hedge=True)
+    client.latency = warmed_tracker(0.01)
+    mock_api.run_time = 0.3
+
+    client.generate("hello", max_tokens=50, temperature=0.7)
+    assert mock_api.counters["created"] == 1
@@ -0,0 +1,86 @@
+"""Headless job runner against the mock API"""
+
+import json
+
+import pytest
+
+from src.enhanced_agent import EnhancedCodeAgent
+from src.job_runner import JobRunner, completed_ids, load_jobs
+
+
+@pytest.fixture
+def agent(tmp_path, client):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    (workspace / "sensor.py").write_text("def read():\n    return 7.0\n", encoding="utf-8")
+    agent = EnhancedCodeAgent(workspace)
+    agent.api_client = client
+    return agent
+
+
+def write_jobs(path, jobs):
+    path.write_text("".join(json.dumps(job) + "\n" for job in jobs), encoding="utf-8")
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_load_jobs_reports_invalid_lines(tmp_path):
+    jobs_path = tmp_path / "jobs.jsonl"
+    jobs_path.write_text(
+        '{"id": "a", "instruction": "x"}\n'
+        "not json\n"
+        '{"id": "a", "instruction": "duplicate"}\n'
+        '{"type": "deploy", "instruction": "x"}\n',
+        encoding="utf-8",
+    )
+    jobs = load_jobs(jobs_path)
+
+    assert [job["id"] for job in jobs][:3] == ["a", "line-2", "line-3"]
+    assert [bool(job.get("invalid")) for job in jobs] == [False, True, True, True]
+
+
+def test_run_and_resume(agent, mock_api, tmp_path):
+    jobs_path = tmp_path / "jobs.jsonl"
+    results_path = tmp_path / "jobs.results.jsonl"
+    write_jobs(jobs_path, [
+        {"id": "gen", "instruction": "Create a pH sensor", "files": ["sensor.py"], "output": "ph.py"},
+        {"id": "review", "type": "analyze", "instruction": "Add docstrings", "files": ["sensor.py"]},
+        {"id": "broken", "type": "analyze", "instruction": "Review", "files": ["missing.py"]},
+    ])
+    runner = JobRunner(agent, workers=3)
+
+    summary = runner.run(load_jobs(jobs_path), results_path)
+    assert (summary["succeeded"], summary["failed"], summary["skipped"]) == (2, 1, 0)
+    assert (agent.workspace_root / "ph.py").exists()
+    assert completed_ids(results_path) == {"gen", "review"}
+    created = mock_api.counters["created"]
+
+    # Rerunning skips what succeeded and retries only the failure
+    summary = runner.run(load_jobs(jobs_path), results_path)
+    assert (summary["succeeded"], summary["failed"], summary["skipped"]) == (0, 1, 2)
+    assert mock_api.counters["created"] == created
+
+    results = read_results(results_path)
+    assert [result["id"] for result in results].count("broken") == 2
+    assert {result["status"] for result in results if result["id"] == "broken"} == {"failed"}
+
+
+def test_resume_ignores_partial_last_line(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    results_path.write_text('{"id": "a", "status": "succeeded"}\n{"id": "b", "sta', encoding="utf-8")
+    assert completed_ids(results_path) == {"a"}
+
+
+def test_no_resume_reruns_everything(agent, mock_api, tmp_path):
+    jobs_path = tmp_path / "jobs.jsonl"
+    results_path = tmp_path / "results.jsonl"
+    write_jobs(jobs_path, [{"id": "gen", "instruction": "Create a pH sensor"}])
+    runner = JobRunner(agent, workers=1)
+
+    runner.run(load_jobs(jobs_path), results_path)
+    summary = runner.run(load_jobs(jobs_path), results_path, resume=False)
+
+    assert summary["succeeded"] == 1
+    assert mock_api.counters["created"] == 2
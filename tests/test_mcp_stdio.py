@@ -0,0 +1,158 @@
+"""MCP JSON-RPC framing, concurrency and cancellation"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.mcp_server import BlinkMCPServer
+from src.mcp_stdio import INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR, MCPSession
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class SlowServer(BlinkMCPServer):
+    """BlinkMCPServer with a slow tool and a tool that blocks until released"""
+
+    def __init__(self, workspace_root: Path):
+        super().__init__(workspace_root)
+        self.release = threading.Event()
+
+    def tool_handlers(self) -> dict:
+        handlers = super().tool_handlers()
+        handlers["slow"] = lambda args: time.sleep(0.3) or {"success": True, "tool": "slow"}
+        handlers["block"] = lambda args: self.release.wait(5) and {"success": True}
+        return handlers
+
+
+def run_session(server, lines, delay: float = 0.0) -> list[dict]:
+    """Feed raw lines to an MCPSession and return the decoded replies in write order"""
+    replies = []
+
+    async def main():
+        pending = [line if isinstance(line, bytes) else line.encode("utf-8") for line in lines]
+
+        async def read_line() -> bytes:
+            await asyncio.sleep(delay)
+            return pending.pop(0) + b"\n" if pending else b""
+
+        async def write_line(data: bytes):
+            assert data.endswith(b"\n") and data.count(b"\n") == 1
+            replies.append(json.loads(data))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            await MCPSession(server, pool, read_line, write_line).run()
+
+    asyncio.run(asyncio.wait_for(main(), 10))
+    return replies
+
+
+def request(request_id, method, params=None) -> str:
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        message["params"] = params
+    return json.dumps(message)
+
+
+def test_initialize_and_tools(tmp_path):
+    (tmp_path / "app.py").write_text("print('hi')\n", encoding="utf-8")
+    replies = run_session(BlinkMCPServer(tmp_path), [
+        request(1, "initialize", {"protocolVersion": "2024-11-05"}),
+        json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}),
+        request(2, "tools/list"),
+        request(3, "tools/call", {"name": "read_file", "arguments": {"path": "app.py"}}),
+    ])
+    by_id = {reply["id"]: reply for reply in replies}
+
+    assert len(replies) == 3
+    assert by_id[1]["result"]["serverInfo"]["name"] == "blink"
+    assert "read_file" in [tool["name"] for tool in by_id[2]["result"]["tools"]]
+    assert by_id[3]["result"]["isError"] is False
+    assert "print('hi')" in by_id[3]["result"]["content"][0]["text"]
+
+
+def test_protocol_errors(tmp_path):
+    replies = run_session(BlinkMCPServer(tmp_path), [
+        "{not json",
+        json.dumps({"id": 5, "method": "ping"}),
+        request(6, "resources/list"),
+        request(7, "tools/call", {"name": "nope"}),
+        "",
+        request(8, "ping"),
+    ])
+    by_id = {reply["id"]: reply for reply in replies}
+
+    assert by_id[None]["error"]["code"] == PARSE_ERROR
+    assert by_id[5]["error"]["code"] == INVALID_REQUEST
+    assert by_id[6]["error"]["code"] == METHOD_NOT_FOUND
+    assert "Unknown tool" in by_id[7]["error"]["message"]
+    assert by_id[8]["result"] == {}
+    assert all(reply["jsonrpc"] == "2.0" for reply in replies)
+
+
+def test_malformed_ids_are_rejected_without_stopping_the_session(tmp_path):
+    replies = run_session(BlinkMCPServer(tmp_path), [
+        request({"nested": 1}, "ping"),
+        request([1, 2], "ping"),
+        request(True, "ping"),
+        request(9, "ping"),
+    ])
+
+    assert [reply["id"] for reply in replies] == [None, None, None, 9]
+    assert all(reply["error"]["code"] == INVALID_REQUEST for reply in replies[:3])
+    assert replies[3]["result"] == {}
+
+
+def test_batch_messages_are_answered_individually(tmp_path):
+    batch = json.dumps([json.loads(request(1, "ping")), json.loads(request(2, "ping"))])
+    replies = run_session(BlinkMCPServer(tmp_path), [batch])
+    assert sorted(reply["id"] for reply in replies) == [1, 2]
+
+
+def test_replies_arrive_as_requests_finish(tmp_path):
+    (tmp_path / "app.py").write_text("x = 1\n", encoding="utf-8")
+    replies = run_session(SlowServer(tmp_path), [
+        request("slow", "tools/call", {"name": "slow"}),
+        request("fast", "tools/call", {"name": "read_file", "arguments": {"path": "app.py"}}),
+    ])
+    assert [reply["id"] for reply in replies] == ["fast", "slow"]
+
+
+def test_cancelled_request_gets_no_reply(tmp_path):
+    server = SlowServer(tmp_path)
+    timer = threading.Timer(0.5, server.release.set)
+    timer.start()
+    replies = run_session(server, [
+        request(1, "tools/call", {"name": "block"}),
+        json.dumps({"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}}),
+        request(2, "ping"),
+    ], delay=0.05)
+    timer.join()
+
+    assert [reply["id"] for reply in replies] == [2]
+
+
+def test_stdio_entry_point(tmp_path):
+    (tmp_path / "app.py").write_text("x = 1\n", encoding="utf-8")
+    stdin = "\n".join([
+        request(1, "initialize"),
+        request(2, "tools/call", {"name": "list_directory", "arguments": {"path": "."}}),
+    ]) + "\n"
+    completed = subprocess.run(
+        [sys.executable, "main.py", "mcp", "--workspace", str(tmp_path)],
+        input=stdin.encode("utf-8"),
+        capture_output=True,
+        cwd=ROOT,
+        timeout=30,
+    )
+
+    lines = completed.stdout.decode("utf-8").splitlines()
+    replies = {reply["id"]: reply for reply in map(json.loads, lines)}
+    assert completed.returncode == 0
+    assert set(replies) == {1, 2}
+    assert "app.py" in replies[2]["result"]["content"][0]["text"]
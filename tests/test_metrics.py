@@ -0,0 +1,64 @@
+"""Per-prediction latency breakdown and the metrics registry"""
+
+import pytest
+
+from src.metrics import MetricsRegistry, PredictionRecorder, parse_timestamp, timestamp_delta
+
+
+def test_timestamps_with_nanoseconds_and_z_suffix():
+    parsed = parse_timestamp("2024-01-01T12:00:00.123456789Z")
+    assert parsed.microsecond == 123456
+    assert parsed.utcoffset().total_seconds() == 0
+    assert parse_timestamp("not a time") is None
+
+    prediction = {"created_at": "2024-01-01T12:00:00Z", "started_at": "2024-01-01T12:00:01.5Z"}
+    assert timestamp_delta(prediction, "created_at", "started_at") == 1.5
+    assert timestamp_delta(prediction, "started_at", "completed_at") is None
+
+
+def test_prometheus_dump():
+    registry = MetricsRegistry()
+    registry.inc("blink_predictions_total", help_text="Predictions", status="succeeded")
+    registry.observe("blink_prediction_total_seconds", 0.3, "Wall time", buckets=(0.1, 1))
+
+    text = registry.to_prometheus()
+    assert "# TYPE blink_predictions_total counter" in text
+    assert 'blink_predictions_total{status="succeeded"} 1' in text
+    assert 'blink_prediction_total_seconds_bucket{le="0.1"} 0' in text
+    assert 'blink_prediction_total_seconds_bucket{le="1"} 1' in text
+    assert 'blink_prediction_total_seconds_bucket{le="+Inf"} 1' in text
+
+
+def test_client_records_a_latency_breakdown(client, mock_api):
+    mock_api.queue_delay = 0.2
+    registry = MetricsRegistry()
+    client.recorder = PredictionRecorder(registry)
+
+    client.generate("hello", max_tokens=50)
+    stats = client.last_prediction_stats
+
+    assert stats["status"] == "succeeded"
+    assert stats["queue_seconds"] == pytest.approx(0.2, abs=0.05)
+    assert stats["run_seconds"] == pytest.approx(0.1, abs=0.05)
+    assert stats["total_seconds"] >= 0.3
+    assert stats["poll_count"] >= 1
+    assert stats["bytes_sent"] > 0 and stats["bytes_received"] > 0
+    assert stats["output_token_count"] == 20
+
+    dump = registry.to_dict()
+    assert dump["counters"]["blink_predictions_total"] == {'status="succeeded"': 1}
+    assert dump["histograms"]["blink_prediction_queue_seconds"]["count"] == 1
+    assert dump["recent_predictions"] == [stats]
+
+
+def test_cancelled_stream_is_recorded(client, mock_api):
+    mock_api.run_time = 10
+    registry = MetricsRegistry()
+    client.recorder = PredictionRecorder(registry)
+
+    stream = client.generate_stream("hello", max_tokens=50)
+    next(stream)
+    stream.close()
+
+    assert client.last_prediction_stats["status"] == "canceled"
+    assert registry.to_dict()["counters"]["blink_predictions_total"] == {'status="canceled"': 1}
@@ -0,0 +1,54 @@
+"""Model version resolution and its cache"""
+
+import time
+
+from helpers import full_output, wait_until
+from src.mock_replicate import MOCK_VERSION
+from src.model_versions import FALLBACK_VERSIONS, ModelVersionResolver
+
+
+def test_model_versions_are_cached_per_base_url(client_for, mock_api, tmp_path):
+    resolver = ModelVersionResolver(cache_path=tmp_path / "versions.json")
+    client = client_for(mock_api, prediction_endpoint="version", resolver=resolver)
+
+    assert client.model_version() == MOCK_VERSION
+    assert client.generate("hello", max_tokens=50) == full_output(20)
+
+    # A resolver reading the same file for the real API must not see the mock's version
+    reloaded = ModelVersionResolver(cache_path=tmp_path / "versions.json")
+    assert reloaded.resolve(client.model, lambda model: None) == FALLBACK_VERSIONS.get(client.model)
+    assert reloaded.resolve(client.model, lambda model: None, mock_api.url) == MOCK_VERSION
+
+
+def test_resolved_version_is_reused_and_refreshed_in_the_background(tmp_path):
+    resolver = ModelVersionResolver(cache_path=tmp_path / "versions.json", ttl=0.1)
+    fetches = []
+
+    def fetch(model):
+        fetches.append(model)
+        return f"v{len(fetches)}"
+
+    assert resolver.resolve("a/b", fetch) == "v1"
+    assert resolver.resolve("a/b", fetch) == "v1"
+    assert fetches == ["a/b"]
+
+    # A stale entry is still answered at once while a thread refreshes it
+    time.sleep(0.2)
+    assert resolver.resolve("a/b", fetch) == "v1"
+    wait_until(lambda: resolver.resolve("a/b", fetch) == "v2")
+
+
+def test_failed_lookup_falls_back_without_retrying_at_once():
+    resolver = ModelVersionResolver(cache_path=None)
+    fetches = []
+
+    def fetch(model):
+        fetches.append(model)
+        raise ConnectionError("offline")
+
+    model = next(iter(FALLBACK_VERSIONS))
+    assert resolver.resolve(model, fetch) == FALLBACK_VERSIONS[model]
+    assert resolver.resolve(model, fetch) == FALLBACK_VERSIONS[model]
+    assert len(fetches) == 1
+    # Fallbacks only apply to the real API
+    assert resolver.resolve(model, fetch, "http://localhost:1/v1") is None
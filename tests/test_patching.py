@@ -0,0 +1,72 @@
+"""Search/replace and unified-diff edits"""
+
+import pytest
+
+from src.patching import NO_CHANGES, PatchError, apply_edits, apply_response, parse_edits
+
+
+CODE = """def add(a, b):
+    return a + b
+
+
+def sub(a, b):
+    return a - b
+"""
+
+
+def block(search: str, replace: str) -> str:
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+
+def test_applies_search_replace_block():
+    response = block("    return a - b\n", "    return a - b - 0\n")
+    assert apply_response(CODE, response) == CODE.replace("a - b\n", "a - b - 0\n")
+
+
+def test_applies_unified_diff():
+    response = "```diff\n@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a + b\n+    return b + a\n```\n"
+    assert apply_response(CODE, response) == CODE.replace("a + b", "b + a")
+
+
+def test_whitespace_differences_are_tolerated():
+    edits = [("def sub(a,  b):\n  return a - b\n", "def sub(a, b):\n    return b - a\n")]
+    assert apply_edits(CODE, edits).endswith("def sub(a, b):\n    return b - a\n")
+
+
+def test_no_changes_response_keeps_code():
+    assert apply_response(CODE, NO_CHANGES) == CODE
+
+
+def test_response_without_edits_raises():
+    with pytest.raises(PatchError, match="no edits"):
+        apply_response(CODE, "Here is the updated file: ...")
+
+
+def test_missing_search_text_raises():
+    with pytest.raises(PatchError, match="not found"):
+        apply_edits(CODE, [("class Calculator:\n    pass\n", "")])
+
+
+def test_ambiguous_exact_match_raises():
+    with pytest.raises(PatchError, match="matches 2 places"):
+        apply_edits(CODE, [("(a, b):\n", "(a, b, c):\n")])
+
+
+def test_ambiguous_whitespace_match_raises():
+    code = "x = 1\ny = 2\n  x = 1\n"
+    with pytest.raises(PatchError, match="matches 2 places"):
+        apply_edits(code, [("x  =  1\n", "x = 3\n")])
+
+
+def test_empty_search_on_existing_file_raises():
+    with pytest.raises(PatchError, match="empty search"):
+        apply_response(CODE, block("", "print('appended')\n"))
+
+
+def test_empty_search_writes_new_file():
+    assert apply_response("", block("", "print('new')\n")) == "print('new')\n"
+
+
+def test_parse_edits_keeps_order():
+    response = block("a\n", "b\n") + "\n" + block("c\n", "d\n")
+    assert parse_edits(response) == [("a\n", "b\n"), ("c\n", "d\n")]
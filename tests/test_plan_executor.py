@@ -0,0 +1,61 @@
+"""Plan steps run as a dependency DAG"""
+
+import threading
+import time
+
+from src.plan_executor import PlanExecutor, normalize_step
+
+
+def test_normalize_step():
+    assert normalize_step("Write tests", 0) == {"id": 1, "task": "Write tests", "depends_on": []}
+    assert normalize_step({"id": "3", "task": "Ship", "depends_on": ["1", 3, 1]}, 2) == {
+        "id": 3, "task": "Ship", "depends_on": [1],
+    }
+
+
+def test_independent_steps_run_concurrently_and_dependents_get_inputs():
+    running = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def run_step(step, inputs):
+        with lock:
+            running.append(step["id"])
+            peak[0] = max(peak[0], len(running))
+        time.sleep(0.1)
+        with lock:
+            running.remove(step["id"])
+        return f"{step['task']}<-{sorted(inputs)}"
+
+    executor = PlanExecutor(run_step, concurrency=4)
+    for index, element in enumerate([
+        {"id": 1, "task": "a", "depends_on": []},
+        {"id": 2, "task": "b", "depends_on": []},
+        {"id": 3, "task": "c", "depends_on": [1, 2]},
+    ]):
+        executor.add(normalize_step(element, index))
+    results = executor.results()
+
+    assert peak[0] == 2
+    assert [result["status"] for result in results] == ["succeeded"] * 3
+    assert results[2]["result"] == "c<-[1, 2]"
+
+
+def test_failed_dependency_skips_dependents_and_cycles_fail():
+    def run_step(step, inputs):
+        if step["task"] == "boom":
+            raise RuntimeError("boom")
+        return step["task"]
+
+    executor = PlanExecutor(run_step, concurrency=2)
+    for index, element in enumerate([
+        {"id": 1, "task": "boom", "depends_on": []},
+        {"id": 2, "task": "after boom", "depends_on": [1]},
+        {"id": 3, "task": "independent", "depends_on": []},
+        {"id": 4, "task": "loop a", "depends_on": [5]},
+        {"id": 5, "task": "loop b", "depends_on": [4]},
+    ]):
+        executor.add(normalize_step(element, index))
+    statuses = {result["id"]: result["status"] for result in executor.results()}
+
+    assert statuses == {1: "failed", 2: "skipped", 3: "succeeded", 4: "failed", 5: "failed"}
@@ -0,0 +1,73 @@
+"""Request scheduling: 429 handling against the mock API, and the rate budgets"""
+
+import threading
+import time
+
+import pytest
+
+from helpers import full_output
+from src.rate_limiter import RequestScheduler, TokenBucket
+
+
+def throttle_first(server, count: int):
+    """Make the mock answer the next `count` creates with 429"""
+    remaining = [count]
+    real_inject = server.inject
+
+    def inject(kind):
+        if kind == "throttle" and remaining[0] > 0:
+            remaining[0] -= 1
+            return True
+        return real_inject(kind)
+
+    server.inject = inject
+
+
+def test_token_bucket_spaces_out_a_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+
+def test_create_retries_429_after_retry_after(client, mock_api):
+    mock_api.retry_after = 0.3
+    throttle_first(mock_api, 2)
+
+    start = time.time()
+    assert client.generate("hello", max_tokens=50) == full_output(20)
+
+    assert client.scheduler.throttled == 2
+    assert time.time() - start >= 0.6
+    assert mock_api.counters["created"] == 1
+
+
+def test_create_gives_up_after_max_retries(client_for, mock_api):
+    client = client_for(mock_api)
+    client.scheduler.max_retries = 1
+    mock_api.retry_after = 0.01
+    throttle_first(mock_api, 5)
+
+    with pytest.raises(RuntimeError):
+        client.generate("hello", max_tokens=50)
+    assert client.scheduler.throttled == 2
+
+
+def test_counters_are_exact_under_concurrency(mock_api):
+    mock_api.rate_limit_rate = 1.0
+    mock_api.retry_after = 0
+    scheduler = RequestScheduler(create_rate=1000, create_burst=1000, max_retries=3, backoff_base=0)
+
+    def create():
+        scheduler.request("create", "POST", f"{mock_api.url}/predictions", json={}, headers={"Authorization": "Bearer x"})
+
+    threads = [threading.Thread(target=create) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert scheduler.throttled == 16 * 4
+    assert scheduler.retries == 16 * 3
@@ -0,0 +1,14 @@
+"""ReplicateClient against the mock API: the basic create/wait and stream paths"""
+
+from helpers import full_output
+
+
+def test_generate(client, mock_api):
+    assert client.generate("hello", max_tokens=50) == full_output(20)
+    assert mock_api.counters["created"] == 1
+
+
+def test_generate_stream_yields_chunks(client, mock_api):
+    chunks = list(client.generate_stream("hello", max_tokens=50))
+    assert len(chunks) == 20
+    assert "".join(chunks) == full_output(20)
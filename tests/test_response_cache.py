@@ -0,0 +1,51 @@
+"""Response cache: keys, eviction, and deterministic calls skipping the API"""
+
+import time
+
+from helpers import full_output
+from src.response_cache import ResponseCache
+
+
+def test_key_covers_model_and_payload():
+    payload = {"input": {"prompt": "hi", "temperature": 0}}
+
+    assert ResponseCache.make_key("a/b", payload) == ResponseCache.make_key("a/b", dict(payload))
+    assert ResponseCache.make_key("a/b", payload) != ResponseCache.make_key("a/c", payload)
+    assert ResponseCache.make_key("a/b", payload) != ResponseCache.make_key(
+        "a/b", {"input": {"prompt": "hi", "temperature": 0.5}}
+    )
+
+
+def test_entries_persist_and_expire(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=0.2)
+    cache.put("k" * 64, "output")
+
+    assert ResponseCache(tmp_path, ttl=0.2).get("k" * 64) == "output"
+    time.sleep(0.3)
+    assert cache.get("k" * 64) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path, max_entries=2)
+    cache.put("a" * 64, "first")
+    cache.put("b" * 64, "second")
+    cache.get("a" * 64)
+    cache.put("c" * 64, "third")
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) == "first"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_deterministic_calls_are_served_from_the_cache(client_for, mock_api, tmp_path):
+    client = client_for(mock_api, cache=ResponseCache(tmp_path))
+
+    assert client.generate("hello", max_tokens=50, temperature=0) == full_output(20)
+    assert client.generate("hello", max_tokens=50, temperature=0) == full_output(20)
+    assert "".join(client.generate_stream("hello", max_tokens=50, temperature=0)) == full_output(20)
+    assert mock_api.counters["created"] == 1
+
+    client.generate("hello", max_tokens=50, temperature=0, use_cache=False)
+    client.generate("hello", max_tokens=50, temperature=0.7)
+    assert mock_api.counters["created"] == 3
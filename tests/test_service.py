@@ -0,0 +1,185 @@
+"""HTTP service: admission control, auth, path confinement"""
+
+import gc
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from src.conversation_memory import ConversationMemory
+from src.enhanced_agent import EnhancedCodeAgent
+from src.service import BlinkService, ClientLimitExceeded, FairQueue, Saturated
+
+
+class BlockingAgent:
+    """Agent stand-in whose generate calls wait until released"""
+
+    def __init__(self, workspace_root: Path):
+        self.workspace_root = workspace_root
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def generate_code_with_full_context(self, instruction, files):
+        self.started.release()
+        self.release.wait(10)
+        return f"done: {instruction}"
+
+
+def post(url: str, path: str, body: dict, headers=None) -> tuple[int, dict]:
+    request = urllib.request.Request(
+        url + path,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_fair_queue_limits_and_round_robin():
+    queue = FairQueue(max_queued=3, per_client=2)
+    queue.submit("a", lambda: "a1")
+    queue.submit("a", lambda: "a2")
+    with pytest.raises(ClientLimitExceeded):
+        queue.submit("a", lambda: "a3")
+    queue.submit("b", lambda: "b1")
+    with pytest.raises(Saturated):
+        queue.submit("c", lambda: "c1")
+
+    order = [queue.take()[1]() for _ in range(3)]
+    assert order == ["a1", "b1", "a2"]
+
+
+def test_full_queue_answers_503(tmp_path):
+    agent = BlockingAgent(tmp_path)
+    with BlinkService(agent, port=0, workers=1, max_queued=1, per_client=10, token="") as service:
+        replies = []
+
+        def send(index):
+            replies.append(post(service.url, "/v1/generate", {"instruction": f"job {index}"}))
+
+        running = threading.Thread(target=send, args=(0,))
+        running.start()
+        assert agent.started.acquire(timeout=5)
+        queued = threading.Thread(target=send, args=(1,))
+        queued.start()
+        threading.Event().wait(0.2)
+
+        status, body = post(service.url, "/v1/generate", {"instruction": "one too many"})
+        assert status == 503
+        assert not body["success"]
+        assert service.stats()["rejected_busy"] == 1
+
+        agent.release.set()
+        running.join(5)
+        queued.join(5)
+        assert sorted(status for status, _ in replies) == [200, 200]
+
+
+def test_client_over_its_cap_gets_429(tmp_path):
+    agent = BlockingAgent(tmp_path)
+    with BlinkService(agent, port=0, workers=1, max_queued=10, per_client=1, token="") as service:
+        first = threading.Thread(target=post, args=(service.url, "/v1/generate", {"instruction": "x"}, {"X-Blink-Client": "me"}))
+        first.start()
+        assert agent.started.acquire(timeout=5)
+
+        status, _ = post(service.url, "/v1/generate", {"instruction": "y"}, {"X-Blink-Client": "me"})
+        assert status == 429
+
+        agent.release.set()
+        first.join(5)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "app.py").write_text("print('hi')\n", encoding="utf-8")
+    (tmp_path / "secret.txt").write_text("do not read\n", encoding="utf-8")
+    return root
+
+
+def test_bearer_token_required(workspace):
+    with BlinkService(EnhancedCodeAgent(workspace), port=0, token="s3cret") as service:
+        body = {"tool": "read_file", "args": {"path": "app.py"}}
+        assert post(service.url, "/v1/mcp/call", body)[0] == 401
+        assert post(service.url, "/v1/mcp/call", body, {"Authorization": "Bearer wrong"})[0] == 401
+
+        status, reply = post(service.url, "/v1/mcp/call", body, {"Authorization": "Bearer s3cret"})
+        assert status == 200
+        assert reply["result"]["content"] == "print('hi')\n"
+
+        with urllib.request.urlopen(service.url + "/healthz", timeout=5) as response:
+            assert response.status == 200
+
+
+def test_paths_outside_workspace_are_refused(workspace):
+    secret = str(workspace.parent / "secret.txt")
+    with BlinkService(EnhancedCodeAgent(workspace), port=0, token="") as service:
+        for path, body in [
+            ("/v1/mcp/call", {"tool": "read_file", "args": {"path": secret}}),
+            ("/v1/mcp/call", {"tool": "get_file_info", "args": {"path": "../secret.txt"}}),
+            ("/v1/mcp/call", {"tool": "search_files", "args": {"pattern": "secret", "directory": ".."}}),
+            ("/v1/analyze", {"instruction": "review", "file": secret}),
+            ("/v1/generate", {"instruction": "review", "files": ["../secret.txt"]}),
+        ]:
+            status, reply = post(service.url, path, body)
+            assert status == 403, body
+            assert "outside the workspace" in reply["error"]
+
+
+def test_refuses_public_bind_without_token(workspace):
+    with pytest.raises(ValueError):
+        BlinkService(EnhancedCodeAgent(workspace), host="0.0.0.0", port=0, token="")
+
+
+def test_generate_with_session_against_mock(workspace, client):
+    agent = EnhancedCodeAgent(workspace)
+    agent.api_client = client
+    with BlinkService(agent, port=0, token="") as service:
+        for _ in range(2):
+            status, reply = post(service.url, "/v1/generate", {"instruction": "Add logging", "session": "s1"})
+            assert status == 200
+            assert reply["result"].startswith("token0")
+
+        history = workspace / ".agent_history" / "service" / "127.0.0.1" / "s1"
+        assert any(history.iterdir())
+        # Idle session locks are not kept around
+        assert service.stats()["active_sessions"] == 0
+
+
+def test_session_memories_do_not_outlive_their_requests(workspace, client, monkeypatch):
+    # Session memories are loaded up front, so nothing is buffered for exit
+    buffered = []
+    save_or_buffer = ConversationMemory._save_or_buffer
+
+    def recording_save_or_buffer(memory):
+        buffered.append(not memory._loaded)
+        save_or_buffer(memory)
+
+    monkeypatch.setattr(ConversationMemory, "_save_or_buffer", recording_save_or_buffer)
+    agent = EnhancedCodeAgent(workspace)
+    agent.api_client = client
+    with BlinkService(agent, port=0, token="") as service:
+        for session in ("a", "b", "c"):
+            status, _ = post(service.url, "/v1/analyze", {"instruction": "review", "code": "x = 1", "session": session})
+            assert status == 200
+        status, _ = post(service.url, "/v1/analyze", {"instruction": "again", "code": "x = 1", "session": "a"})
+        assert status == 200
+
+    assert buffered and not any(buffered)
+    gc.collect()
+    service_dir = workspace / ".agent_history" / "service"
+    alive = [
+        obj for obj in gc.get_objects()
+        if isinstance(obj, ConversationMemory) and service_dir in obj.history_dir.parents
+    ]
+    assert alive == []
+
+    history = ConversationMemory(workspace, history_dir=service_dir / "127.0.0.1" / "a").conversation_history
+    assert [m["content"] for m in history if m["role"] == "user"] == ["review", "again"]
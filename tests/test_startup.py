@@ -0,0 +1,70 @@
+"""Lazy construction: the CLI reaches its prompt fast, and memory loads on demand"""
+
+import gc
+import json
+import os
+import subprocess
+import sys
+import weakref
+from pathlib import Path
+
+from src.conversation_memory import ConversationMemory
+
+
+ROOT = Path(__file__).resolve().parent.parent
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from src.simplified_cli import measure_startup
+report = measure_startup(started)
+report["heavy_modules"] = sorted(name for name in ("requests", "asyncio", "urllib3") if name in sys.modules)
+print(json.dumps(report))
+"""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "REPLICATE_API_TOKEN": "mocktokenmocktokenmock"}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, timeout=30)
+
+
+def test_prompt_needs_no_client_memory_or_http_stack():
+    report = json.loads(run_python("-c", PROBE).stdout)
+
+    assert not report["api_client_created"]
+    assert not report["memory_loaded"]
+    assert report["heavy_modules"] == []
+
+
+def test_startup_is_within_budget():
+    # The first run may pay for writing bytecode caches
+    for _ in range(2):
+        result = run_python("main.py", "--startup-time")
+        if result.returncode == 0:
+            break
+    assert result.returncode == 0, result.stdout
+    assert "[OK] Startup within budget" in result.stdout
+
+
+def test_messages_before_loading_are_merged_into_the_session(tmp_path):
+    # Nothing is read or written for a message until the history is needed (or exit)
+    memory = ConversationMemory(tmp_path)
+    memory.add_message("user", "first")
+    assert not memory._loaded and not (tmp_path / ".agent_history").exists()
+    memory.flush()
+
+    memory = ConversationMemory(tmp_path)
+    memory.add_message("assistant", "second")
+    assert [m["content"] for m in memory.conversation_history] == ["first", "second"]
+
+
+def test_flushed_memory_is_not_kept_alive_until_exit(tmp_path):
+    refs = []
+    for _ in range(3):
+        memory = ConversationMemory(tmp_path)
+        memory.add_message("user", "hello")
+        memory.flush()
+        refs.append(weakref.ref(memory))
+    del memory
+    gc.collect()
+
+    assert all(ref() is None for ref in refs)
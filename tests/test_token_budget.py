@@ -0,0 +1,59 @@
+"""Prompt token budgeting before dispatch"""
+
+import pytest
+
+import src.replicate_api
+from src.replicate_api import PromptTooLargeError
+from src.token_estimator import estimate_tokens, model_limits, trim_to_tokens
+
+
+# Unknown model families get the 32k default window
+SMALL_MODEL = "someone/small-model"
+
+
+def sent_input(server) -> dict:
+    """Input of the only prediction the mock has received"""
+    (prediction,) = server.predictions.values()
+    return prediction.payload["input"]
+
+
+def test_estimate_and_limits():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("def add(a, b):\n    return a + b\n") > estimate_tokens("def add")
+    assert model_limits("anthropic/claude-4.5-sonnet")["context_window"] == 200_000
+    assert model_limits(SMALL_MODEL)["context_window"] == 32_000
+
+
+def test_trim_keeps_head_and_tail():
+    text = "start " + "word " * 5000 + "end"
+    trimmed = trim_to_tokens(text, 200)
+
+    assert estimate_tokens(trimmed) <= 200
+    assert trimmed.startswith("start") and trimmed.endswith("end")
+    assert "[TRUNCATED]" in trimmed
+
+
+def test_max_tokens_is_clamped_to_the_window(client_for, mock_api):
+    client = client_for(mock_api, model=SMALL_MODEL)
+    budget = client.prompt_budget("hello")
+
+    client.generate("hello", max_tokens=1_000_000)
+    assert sent_input(mock_api)["max_tokens"] == budget["available_output"] == 4_096
+
+
+def test_oversized_prompt_is_rejected_before_sending(client_for, mock_api):
+    client = client_for(mock_api, model=SMALL_MODEL)
+    prompt = "word " * 40_000
+    assert not client.prompt_budget(prompt)["fits"]
+
+    with pytest.raises(PromptTooLargeError):
+        client.generate(prompt)
+    assert mock_api.counters["requests"] == 0
+
+
+def test_oversized_prompt_is_trimmed_when_configured(client_for, mock_api, monkeypatch):
+    monkeypatch.setattr(src.replicate_api, "PROMPT_OVERFLOW", "trim")
+    client = client_for(mock_api, model=SMALL_MODEL)
+
+    client.generate("word " * 40_000, max_tokens=50)
+    assert client.prompt_budget(sent_input(mock_api)["prompt"])["fits"]
@@ -0,0 +1,101 @@
+"""MCP tool-use loop: tool calls, budgets and the closing answer turn"""
+
+import time
+
+from src.mcp_server import BlinkMCPServer
+from src.tool_loop import FINAL_ANSWER_PROMPT, MCPToolLoop, parse_tool_calls, strip_tool_calls
+
+
+def call(name: str, args: str) -> str:
+    return f"[MCP_TOOL_CALL: {name}]\n{args}\n[/MCP_TOOL_CALL]"
+
+
+def scripted(client, responses: list[str]) -> list[str]:
+    """Make `client.generate` answer with `responses` in turn; returns the prompts it saw"""
+    prompts = []
+    remaining = list(responses)
+
+    def generate(prompt, system_prompt=None, **kwargs):
+        prompts.append(prompt)
+        return remaining.pop(0)
+
+    client.generate = generate
+    return prompts
+
+
+def test_parse_and_strip_tool_calls():
+    text = "Let me look.\n" + call("read_file", '```json\n{"path": "a.py"}\n```') + call("list_directory", "[1]")
+
+    calls = parse_tool_calls(text)
+    assert [c["name"] for c in calls] == ["read_file", "list_directory"]
+    assert calls[0]["args"] == {"path": "a.py"} and calls[0]["error"] is None
+    assert calls[1]["error"] == "Tool arguments must be a JSON object"
+    assert strip_tool_calls(text) == "Let me look."
+
+
+def test_tool_results_are_fed_back_until_a_final_answer(client, tmp_path):
+    (tmp_path / "a.py").write_text("ANSWER = 42\n")
+    prompts = scripted(client, [
+        call("read_file", '{"path": "a.py"}') + call("list_directory", '{"path": "."}'),
+        "The answer is 42.",
+    ])
+
+    result = MCPToolLoop(client, BlinkMCPServer(tmp_path)).run("What is ANSWER?")
+
+    assert result["output"] == "The answer is 42."
+    assert result["stopped"] == "final_answer"
+    assert result["turns"] == 2
+    assert [c["name"] for c in result["tool_calls"]] == ["read_file", "list_directory"]
+    assert "ANSWER = 42" in prompts[1]
+
+
+def test_last_allowed_turn_asks_for_an_answer(client, tmp_path):
+    prompts = scripted(client, [call("list_directory", "{}"), "Done."])
+
+    result = MCPToolLoop(client, BlinkMCPServer(tmp_path), max_turns=2).run("task")
+
+    assert result["output"] == "Done."
+    assert prompts[1].endswith(FINAL_ANSWER_PROMPT)
+
+
+def test_token_budget_stop_still_ends_with_an_answer(client, tmp_path):
+    prompts = scripted(client, [call("list_directory", "{}"), "Best effort answer."])
+
+    result = MCPToolLoop(client, BlinkMCPServer(tmp_path), max_tokens=10).run("task")
+
+    assert result["stopped"] == "max_tokens"
+    assert result["output"] == "Best effort answer."
+    assert result["turns"] == 2
+    assert prompts[1].endswith(FINAL_ANSWER_PROMPT)
+
+
+def test_time_budget_stop_still_ends_with_an_answer(client, tmp_path):
+    def slow_generate(prompt, system_prompt=None, **kwargs):
+        time.sleep(0.2)
+        return call("list_directory", "{}") if not prompt.endswith(FINAL_ANSWER_PROMPT) else "Answer."
+
+    client.generate = slow_generate
+    result = MCPToolLoop(client, BlinkMCPServer(tmp_path), max_seconds=0.1).run("task")
+
+    assert result["stopped"] == "max_seconds"
+    assert result["output"] == "Answer."
+
+
+def test_conversation_is_kept_inside_the_model_window(client_for, mock_api, tmp_path):
+    # 32k-token window; each huge file result is ~20k tokens
+    client = client_for(mock_api, model="someone/small-model")
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.txt").write_text("word " * 20_000)
+    prompts = scripted(client, [
+        call("read_file", '{"path": "a.txt"}'),
+        call("read_file", '{"path": "b.txt"}'),
+        "Summary.",
+    ])
+
+    result = MCPToolLoop(client, BlinkMCPServer(tmp_path), max_tokens=10**6, result_tokens=25_000).run("Summarise")
+
+    assert result["stopped"] == "max_tokens"
+    assert result["output"] == "Summary."
+    assert all(client.prompt_budget(prompt)["fits"] for prompt in prompts)
+    # The closing turn keeps the task and the newest results
+    assert prompts[-1].startswith("Summarise") and prompts[-1].endswith(FINAL_ANSWER_PROMPT)
@@ -0,0 +1,91 @@
+"""Completion-wait strategies: the adaptive schedule, and Prefer: wait against the mock API"""
+
+import pytest
+
+from src.wait_strategy import (
+    AdaptivePollStrategy,
+    FixedPollStrategy,
+    SyncWaitStrategy,
+    WaitStrategy,
+    get_wait_strategy,
+)
+
+
+def polls(server) -> int:
+    """GETs the mock has answered for prediction state (everything but creates)"""
+    return server.counters["requests"] - server.counters["created"]
+
+
+def test_incomplete_strategy_fails_at_construction():
+    class NoDelay(WaitStrategy):
+        pass
+
+    with pytest.raises(TypeError):
+        NoDelay()
+
+
+def test_get_wait_strategy():
+    assert isinstance(get_wait_strategy("Fixed"), FixedPollStrategy)
+    assert isinstance(get_wait_strategy("sync"), SyncWaitStrategy)
+    with pytest.raises(ValueError):
+        get_wait_strategy("eager")
+
+
+def test_adaptive_backs_off_up_to_max_delay():
+    strategy = AdaptivePollStrategy(initial_delay=0.1, backoff=2, max_delay=1.0, jitter=0)
+
+    delays = [strategy.next_delay(poll_count, elapsed=0.0) for poll_count in range(6)]
+    assert delays == pytest.approx([0.1, 0.2, 0.4, 0.8, 1.0, 1.0])
+
+
+def test_adaptive_jitter_stays_in_bounds():
+    strategy = AdaptivePollStrategy(initial_delay=1.0, backoff=1, jitter=0.2)
+
+    delays = [strategy.next_delay(0, elapsed=0.0) for _ in range(200)]
+    assert all(0.8 <= delay <= 1.2 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_observed_run_times_tune_the_schedule():
+    strategy = AdaptivePollStrategy(initial_delay=0.1, backoff=2, max_delay=10, jitter=0)
+    for run_time in (4.0, 5.0, 6.0):
+        strategy.observe(run_time)
+    assert strategy.expected_run_time() == 5.0
+
+    # Long before the usual finish: sleep until shortly before it
+    assert strategy.next_delay(0, elapsed=1.0) == pytest.approx(3.0)
+    # Around the usual finish: poll at the initial rate, whatever the backoff reached
+    assert strategy.next_delay(5, elapsed=4.5) == pytest.approx(0.1)
+    # Well past it: plain backoff again
+    assert strategy.next_delay(5, elapsed=8.0) == pytest.approx(3.2)
+
+
+def test_adaptive_client_polls_less_once_it_has_history(client_for, mock_api):
+    mock_api.run_time = 0.5
+    strategy = AdaptivePollStrategy(initial_delay=0.02, backoff=1.2, jitter=0)
+    client = client_for(mock_api, wait_strategy=strategy)
+
+    client.generate("first", max_tokens=50)
+    first = polls(mock_api)
+    client.generate("second", max_tokens=50)
+    second = polls(mock_api) - first
+
+    assert len(strategy.run_times) == 2
+    assert second < first
+
+
+def test_sync_wait_finishes_inside_the_create_call(client_for, mock_api):
+    mock_api.run_time = 0.3
+    client = client_for(mock_api, wait_strategy=SyncWaitStrategy(wait_seconds=5, jitter=0))
+
+    assert client.generate("hello", max_tokens=50).startswith("token0 ")
+    assert mock_api.counters["created"] == 1
+    assert polls(mock_api) == 0
+
+
+def test_sync_wait_falls_back_to_polling(client_for, mock_api):
+    mock_api.run_time = 1.5
+    client = client_for(mock_api, wait_strategy=SyncWaitStrategy(wait_seconds=1, initial_delay=0.05, jitter=0))
+
+    assert client.generate("hello", max_tokens=50).startswith("token0 ")
+    assert polls(mock_api) >= 1